@@ -1,4 +1,4 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Body
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Body, Query
 from app.services.schema import save_and_index_schema, get_schema_content
 from app.services.runner import get_recent_runs
 from app.services.chain_generator import ChainStore
@@ -136,7 +136,8 @@ async def generate_tests(
     service_path: Path = Depends(get_service_or_404),
     schema_files: list = Depends(get_schema_files_or_400),
     endpoint_ids: Optional[List[str]] = Body(None, description="生成対象のエンドポイントIDのリスト。指定しない場合はスキーマ全体から生成します。"),
-    error_types: Optional[List[str]] = Body(None, description="生成する異常系テストの種類リスト")
+    error_types: Optional[List[str]] = Body(None, description="生成する異常系テストの種類リスト"),
+    force_refresh: bool = Body(False, description="キャッシュされたテストスイートを使用せずに生成し直すかどうか")
 ):
     """
     サービスのテストスイートを生成するAPIエンドポイント。
@@ -148,6 +149,8 @@ async def generate_tests(
         service_path: サービスのパス (Depends)
         schema_files: スキーマファイルのリスト (Depends)
         endpoint_ids: 生成対象のエンドポイントIDのリスト (Optional)
+        error_types: 生成する異常系テストの種類リスト (Optional)
+        force_refresh: キャッシュされたテストスイートを使用せずに生成し直すかどうか（エンドポイント指定時のみ）
         
     Returns:
         dict: 生成タスクの情報
@@ -155,7 +158,7 @@ async def generate_tests(
     
     try:
         if endpoint_ids:
-            task_id = generate_test_suites_for_endpoints_task.delay(str(id), endpoint_ids, error_types).id
+            task_id = generate_test_suites_for_endpoints_task.delay(str(id), endpoint_ids, error_types, force_refresh).id
             task_type = "endpoints"
         else:
             task_id = generate_test_suites_task.delay(str(id), error_types).id
@@ -565,13 +568,14 @@ async def list_endpoints(
 async def generate_test_suite_for_endpoints(
     id: int,
     endpoint_ids: List[int] = Body(..., description="テストスイートを生成するエンドポイントのIDのリスト"),
+    force_refresh: bool = Query(False, description="キャッシュされたテストスイートを使用せずに生成し直すかどうか"),
     service_path: Path = Depends(get_service_or_404)
 ):
     """
     指定されたエンドポイントIDに基づいてテストスイートを生成するAPIエンドポイント。
     """
     try:
-        task_id = generate_test_suites_for_endpoints_task.delay(id, endpoint_ids).id
+        task_id = generate_test_suites_for_endpoints_task.delay(id, endpoint_ids, None, force_refresh).id
 
         if not task_id:
             raise HTTPException(status_code=500, detail="Failed to start test suite generation task")
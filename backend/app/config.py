@@ -158,6 +158,60 @@ class LLMConfig:
         config_path="llm.anthropic_model_name",
         description="Anthropicモデル名"
     )
+    MAX_CONCURRENCY = ConfigValue[int](
+        default=4,
+        env_var="LLM_MAX_CONCURRENCY",
+        config_path="llm.max_concurrency",
+        description="LLM呼び出しの最大同時実行数"
+    )
+    CONTEXT_WINDOW = ConfigValue[int](
+        default=8192,
+        env_var="LLM_CONTEXT_WINDOW",
+        config_path="llm.context_window",
+        description="LLMのコンテキスト長（トークン数）"
+    )
+    OUTPUT_TOKEN_BUDGET = ConfigValue[int](
+        default=2048,
+        env_var="LLM_OUTPUT_TOKEN_BUDGET",
+        config_path="llm.output_token_budget",
+        description="LLMの出力用に確保するトークン数"
+    )
+    RESPONSE_CACHE_SIZE = ConfigValue[int](
+        default=256,
+        env_var="LLM_RESPONSE_CACHE_SIZE",
+        config_path="llm.response_cache_size",
+        description="生成済みテストスイートを保持する最大件数"
+    )
+    STRUCTURED_OUTPUT = ConfigValue[bool](
+        default=False,
+        env_var="LLM_STRUCTURED_OUTPUT",
+        config_path="llm.structured_output",
+        description="JSONスキーマで出力形式を制約するか（Structured Outputsに対応したサーバーでのみtrueにする）"
+    )
+    RERANK_ENABLED = ConfigValue[bool](
+        default=False,
+        env_var="RERANK_ENABLED",
+        config_path="llm.rerank_enabled",
+        description="ハイブリッド検索結果をクロスエンコーダーで再ランキングしてからLLMに渡すか"
+    )
+    RERANK_MODEL_NAME = ConfigValue[str](
+        default="BAAI/bge-reranker-base",
+        env_var="RERANK_MODEL_NAME",
+        config_path="llm.rerank_model_name",
+        description="再ランキングに使用するクロスエンコーダーのモデル名"
+    )
+    RERANK_CANDIDATES = ConfigValue[int](
+        default=30,
+        env_var="RERANK_CANDIDATES",
+        config_path="llm.rerank_candidates",
+        description="再ランキングの対象とするハイブリッド検索結果の件数"
+    )
+    RERANK_TOP_K = ConfigValue[int](
+        default=5,
+        env_var="RERANK_TOP_K",
+        config_path="llm.rerank_top_k",
+        description="再ランキング後にLLMに渡す検索結果の件数"
+    )
 
 
 class TestConfig:
@@ -328,6 +382,15 @@ class Settings(BaseSettings):
     LLM_PROVIDER: str = os.environ.get("LLM_PROVIDER", "")
     ANTHROPIC_API_KEY: str = os.environ.get("ANTHROPIC_API_KEY", "")
     ANTHROPIC_MODEL_NAME: str = os.environ.get("ANTHROPIC_MODEL_NAME", "claude-3-opus-20240229")
+    LLM_MAX_CONCURRENCY: int = int(os.environ.get("LLM_MAX_CONCURRENCY", "4"))
+    LLM_CONTEXT_WINDOW: int = int(os.environ.get("LLM_CONTEXT_WINDOW", "8192"))
+    LLM_OUTPUT_TOKEN_BUDGET: int = int(os.environ.get("LLM_OUTPUT_TOKEN_BUDGET", "2048"))
+    LLM_RESPONSE_CACHE_SIZE: int = int(os.environ.get("LLM_RESPONSE_CACHE_SIZE", "256"))
+    LLM_STRUCTURED_OUTPUT: bool = os.environ.get("LLM_STRUCTURED_OUTPUT", "False").lower() == "true"
+    RERANK_ENABLED: bool = os.environ.get("RERANK_ENABLED", "False").lower() == "true"
+    RERANK_MODEL_NAME: str = os.environ.get("RERANK_MODEL_NAME", "BAAI/bge-reranker-base")
+    RERANK_CANDIDATES: int = int(os.environ.get("RERANK_CANDIDATES", "30"))
+    RERANK_TOP_K: int = int(os.environ.get("RERANK_TOP_K", "5"))
     
     # テスト実行設定
     TEST_TARGET_URL: str = os.environ.get("TEST_TARGET_URL", "http://backend:8000")
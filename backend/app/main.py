@@ -5,10 +5,18 @@ from app.api import services
 from app.logging_config import logger
 from app.config import settings
 from app.models import init_db
+from app.services.rag.embeddings import get_embedding_fn
+from app.services.vector_db.embeddings import get_default_embedding_model
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    # 埋め込みモデルを起動時に読み込み、最初のリクエストでの初期化待ちを避ける
+    try:
+        get_default_embedding_model()
+        get_embedding_fn()
+    except Exception as e:
+        logger.warning(f"Failed to warm up embedding models: {e}")
     yield
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
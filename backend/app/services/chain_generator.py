@@ -3,7 +3,7 @@ import json
 import os
 import uuid
 from datetime import datetime
-from app.services.rag.embeddings import EmbeddingFunctionForCaseforge
+from app.services.rag.embeddings import get_embedding_fn
 from app.services.schema_analyzer import OpenAPIAnalyzer
 from app.config import settings
 from app.logging_config import logger
@@ -35,7 +35,7 @@ class DependencyAwareRAG:
         if is_testing:
             self.vectordb = None
         else:
-                embedding_fn = EmbeddingFunctionForCaseforge()
+                embedding_fn = get_embedding_fn()
                 
                 try:
                     from app.services.vector_db.manager import VectorDBManagerFactory
@@ -298,59 +298,60 @@ class DependencyAwareRAG:
     def _build_context_for_candidate(self, candidate: List[str]) -> str:
         """チェーン候補からLLMのためのコンテキストを構築する"""
         context_parts = []
+        paths = self.schema.get("paths", {})
         
         for node_id in candidate:
             method, path = node_id.split(" ", 1)
             
-            if path in self.schema.get("paths", {}):
-                path_item = self.schema["paths"][path]
-                if method.lower() in path_item:
-                    operation = path_item[method.lower()]
+            path_item = paths.get(path)
+            if path_item is not None:
+                operation = path_item.get(method.lower())
+                if operation is not None:
                     
-                    endpoint_info = f"Endpoint: {method} {path}\n"
+                    endpoint_parts = [f"Endpoint: {method} {path}\n"]
                     
                     if "summary" in operation:
-                        endpoint_info += f"Summary: {operation['summary']}\n"
+                        endpoint_parts.append(f"Summary: {operation['summary']}\n")
                     
                     if "description" in operation:
-                        endpoint_info += f"Description: {operation['description']}\n"
+                        endpoint_parts.append(f"Description: {operation['description']}\n")
                     
                     if "parameters" in operation:
-                        endpoint_info += "Parameters:\n"
+                        endpoint_parts.append("Parameters:\n")
                         for param in operation["parameters"]:
                             param_name = param.get("name", "unknown")
                             param_in = param.get("in", "unknown")
                             required = "required" if param.get("required", False) else "optional"
-                            endpoint_info += f"- {param_name} (in {param_in}, {required})\n"
+                            endpoint_parts.append(f"- {param_name} (in {param_in}, {required})\n")
                     
                     if "requestBody" in operation:
-                        endpoint_info += "Request Body:\n"
+                        endpoint_parts.append("Request Body:\n")
                         content = operation["requestBody"].get("content", {})
                         for media_type, media_content in content.items():
-                            endpoint_info += f"- Media Type: {media_type}\n"
+                            endpoint_parts.append(f"- Media Type: {media_type}\n")
                             if "schema" in media_content:
                                 schema = media_content["schema"]
                                 if "$ref" in schema:
                                     ref_name = schema["$ref"].split("/")[-1]
-                                    endpoint_info += f"  Schema: {ref_name}\n"
+                                    endpoint_parts.append(f"  Schema: {ref_name}\n")
                                 elif "type" in schema:
-                                    endpoint_info += f"  Type: {schema['type']}\n"
+                                    endpoint_parts.append(f"  Type: {schema['type']}\n")
                     
                     if "responses" in operation:
-                        endpoint_info += "Responses:\n"
+                        endpoint_parts.append("Responses:\n")
                         for status, response in operation["responses"].items():
-                            endpoint_info += f"- Status: {status}\n"
+                            endpoint_parts.append(f"- Status: {status}\n")
                             if "description" in response:
-                                endpoint_info += f"  Description: {response['description']}\n"
+                                endpoint_parts.append(f"  Description: {response['description']}\n")
                             if "content" in response:
                                 for media_type, media_content in response["content"].items():
                                     if "schema" in media_content:
                                         schema = media_content["schema"]
                                         if "$ref" in schema:
                                             ref_name = schema["$ref"].split("/")[-1]
-                                            endpoint_info += f"  Schema: {ref_name}\n"
+                                            endpoint_parts.append(f"  Schema: {ref_name}\n")
                     
-                    context_parts.append(endpoint_info)
+                    context_parts.append("".join(endpoint_parts))
         
         context_parts.append("\nDependencies:")
         for i in range(len(candidate) - 1):
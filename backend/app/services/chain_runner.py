@@ -4,12 +4,12 @@ import os
 import uuid
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timezone
-import jsonpath_ng
 from app.config import settings
 from app.logging_config import logger
 from app.models import Service, TestSuite, TestRun, StepResult, TestStep, TestCase, TestCaseResult, engine
 from sqlmodel import Session, select
 from app.services.chain_generator import ChainStore
+from app.utils.jsonpath import compile_jsonpath
 from app.utils.timeout import async_timeout
 from app.services.test.variable_manager import VariableManager, VariableScope
 
@@ -248,10 +248,9 @@ class ChainRunner:
         for key, path in extract_rules.items():
             try:
                 if path.startswith("$."):
-                    jsonpath_expr = jsonpath_ng.parse(path)
-                    matches = jsonpath_expr.find(response_body)
+                    matches = compile_jsonpath(path)(response_body)
                     if matches:
-                        extracted[key] = matches[0].value
+                        extracted[key] = matches[0]
             except Exception as e:
                 logger.error(f"Error extracting value for {key} with path {path}: {e}")
         
@@ -1,98 +1,277 @@
-from typing import List, Dict, Optional, Tuple, Set
+from typing import Any, AsyncIterator, Callable, Iterator, List, Dict, NamedTuple, Optional, Tuple, Set
+import asyncio
+import copy
+import hashlib
+import heapq
+import io
 import json
 import os
 import re
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+import fastjsonschema
+import orjson
 from app.models import Endpoint
 from app.schemas.service import Endpoint as EndpointSchema
-from app.services.rag.embeddings import EmbeddingFunctionForCaseforge
 from app.config import settings
 from app.logging_config import logger
 from app.utils.path_manager import path_manager
 from app.services.vector_db.manager import VectorDBManagerFactory
+from app.services.vector_db.reranker import get_default_reranker
+from app.services.llm.client import LLMClientFactory, LLMException, LLMProviderType, Message, MessageRole, run_llm_coroutine
+from app.services.llm.prompts import PromptTemplate, get_prompt_template
 from app.services.openapi.analyzer import OpenAPIAnalyzer, DependencyAnalyzer
+from app.services.rag.bm25 import BM25Index
 from langchain_core.documents import Document
 
-class EndpointChainGenerator:
-    """選択されたエンドポイントからテストチェーンを生成するクラス"""
+# パスパラメータ（例: /users/{id} の id）を抽出する正規表現
+_PATH_PARAM_RE = re.compile(r'\{([^}]+)\}')
+# TestStepデータのうち、文字列として格納されたJSONを辞書に変換するフィールド
+_STEP_JSON_FIELDS = ("request_headers", "request_body", "request_params", "extract_rules")
+# 空の辞書として扱う文字列値
+_EMPTY_JSON_STRINGS = frozenset({"None", "null", "", "{}"})
+# パス定義のうち、オペレーションを表すキー（HTTPメソッド）
+_HTTP_METHODS = frozenset({"get", "put", "post", "delete", "options", "head", "patch", "trace"})
+
+
+@lru_cache(maxsize=2048)
+def _first_path_segment(path: str) -> str:
+    """
+    パスの先頭のセグメントを取得する
     
-    def __init__(self, service_id: int, endpoints: List[Endpoint], schema: Dict = None, error_types: Optional[List[str]] = None): # error_types 引数を追加
-        """
-        Args:
-            service_id: サービスID (int)
-            endpoints: 選択されたエンドポイントのリスト
-            schema: OpenAPIスキーマ（オプション）
-        """
-        self.service_id = service_id
-        self.endpoints = endpoints
-        self.schema = schema
-        self.error_types = error_types
+    同じパスはクエリ・埋め込み・フォールバックチェーンの生成で繰り返し解析されるため、結果をキャッシュします。
+    
+    Args:
+        path: エンドポイントのパス
         
-        # 依存関係解析器の初期化
-        self.dependency_analyzer = None
-        self.dependencies = []
-        if self.schema:
-            self._initialize_dependency_analysis()
+    Returns:
+        先頭のセグメント（ルートパスの場合は空文字列）
+    """
+    return path.strip("/").split("/", 1)[0]
+
+
+@lru_cache(maxsize=2048)
+def _path_params(path: str) -> Tuple[str, ...]:
+    """
+    パスに含まれるパスパラメータ名を取得する
     
-    def _initialize_dependency_analysis(self):
-        """依存関係解析器を初期化し、依存関係を抽出する"""
-        try:
-            openapi_analyzer = OpenAPIAnalyzer(self.schema)
-            self.dependencies = openapi_analyzer.extract_dependencies()
-            self.dependency_analyzer = DependencyAnalyzer(self.schema)
-            logger.info(f"Extracted {len(self.dependencies)} dependencies from schema")
-        except Exception as e:
-            logger.error(f"Error initializing dependency analysis: {e}", exc_info=True)
-            self.dependencies = []
+    _first_path_segment と同様に、同じパスの解析結果をキャッシュします。
     
-    def generate_chains(self) -> List[Dict]:
-        """
-        選択されたエンドポイントからテストチェーンを生成する (TO-BE: エンドポイントごとに生成)
+    Args:
+        path: エンドポイントのパス
         
-        Returns:
-            生成されたテストチェーンのリスト
-        """
-        generated_chains = []
-        
-        model_name = settings.LLM_MODEL_NAME
-        api_base = settings.OPENAI_API_BASE
+    Returns:
+        パスパラメータ名（パス中の順序）
+    """
+    return tuple(_PATH_PARAM_RE.findall(path))
+
+
+def _dumps_json(obj) -> str:
+    """
+    オブジェクトをプロンプトに埋め込むための空白を含まないJSON文字列に変換する
+    
+    インデントや改行もLLMの入力トークンとして数えられるため、整形せずに出力します。
+    orjson で変換できない値（64ビットを超える整数など）を含む場合は標準の json で変換します。
+    
+    Args:
+        obj: 変換対象のオブジェクト
         
-        from app.services.llm.client import LLMClientFactory, LLMProviderType, Message, MessageRole, LLMException, LLMResponseFormatException
-        from app.services.llm.prompts import get_prompt_template
+    Returns:
+        JSON文字列
+    """
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    except TypeError:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _with_str_keys(obj):
+    """
+    辞書のキーを再帰的に文字列に変換する（YAMLの 200: のような整数キーと文字列キーを混在させたままソートできないため）
+    
+    Args:
+        obj: 変換対象のオブジェクト
         
+    Returns:
+        キーを文字列に変換したオブジェクト
+    """
+    if isinstance(obj, dict):
+        return {str(key): _with_str_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_with_str_keys(item) for item in obj]
+    return obj
+
+
+def _signature_bytes(obj) -> bytes:
+    """
+    ハッシュ計算用にオブジェクトをキー順でソートしたJSONバイト列に変換する
+    
+    orjson は64ビットを超える整数に default を適用せずに TypeError を送出するため、
+    その場合は標準の json で変換します。
+    
+    Args:
+        obj: 変換対象のオブジェクト
         
-        try:
-            llm_client = LLMClientFactory.create(
-                provider_type=LLMProviderType.LOCAL,
-                model_name=model_name,
-                temperature=0.2,
-            )
-        except Exception as e:
-            logger.error(f"Error initializing LLM client: {e}", exc_info=True)
-            raise
+    Returns:
+        JSONバイト列
+    """
+    try:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return json.dumps(_with_str_keys(obj), sort_keys=True, default=str).encode()
+
+
+# ベクトル検索クエリの最大文字数（埋め込みモデルの入力上限を超える部分は切り捨てられるため事前に切り詰める）
+_MAX_QUERY_CHARS = 1000
+# ベクトル検索で取得するドキュメント数
+_VECTOR_SEARCH_K = 5
+# キーワード（BM25）検索で取得するドキュメント数
+_KEYWORD_SEARCH_K = 5
+# ベクトル検索クエリに加える、HTTPメソッドごとの操作を表すキーワード
+_OPERATION_TYPE_KEYWORDS = {
+    "GET": "retrieve read fetch",
+    "POST": "create add insert",
+    "PUT": "update modify replace",
+    "PATCH": "update modify partial",
+    "DELETE": "remove delete destroy"
+}
+# Reciprocal Rank Fusion の定数k（上位の順位差を緩やかにするための値で、一般的な60を使用）
+_RRF_K = 60
+
+
+# プロンプト長の見積もりに使う1トークンあたりの文字数（ローカルモデルのトークナイザーに依存しない概算値）
+_CHARS_PER_TOKEN = 4
+# 関連スキーマ情報に含める検索結果1件あたりの最大トークン数
+_MAX_TOKENS_PER_SEARCH_RESULT = 1024
+
+
+def _estimate_tokens(text: str) -> int:
+    """
+    テキストのトークン数を概算する
+    
+    Args:
+        text: 対象のテキスト
         
-        # 依存関係対応プロンプトテンプレートの使用を試行
-        prompt_template = None
-        use_dependency_aware_prompt = False
+    Returns:
+        概算トークン数
+    """
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def _truncate_to_token_budget(text: str, max_tokens: int) -> str:
+    """
+    テキストをトークン数の上限に収まるように切り詰める
+    
+    できるだけ見出し（## / ###）の直前で切り、後続のセクションを丸ごと省略します。
+    
+    Args:
+        text: 対象のテキスト
+        max_tokens: 最大トークン数
         
-        try:
-            if self.dependencies:
-                # 依存関係が検出された場合は依存関係対応プロンプトを使用
-                prompt_template = get_prompt_template("dependency_aware_rag")
-                use_dependency_aware_prompt = True
-                logger.info("Using dependency-aware prompt template")
-            else:
-                # 依存関係が検出されない場合は従来のプロンプトを使用
-                prompt_template = get_prompt_template("endpoint_test_generation")
-                logger.info("Using standard endpoint test generation prompt")
-        except KeyError as e:
-            logger.warning(f"Prompt template not found: {e}, using hardcoded prompt")
-            prompt_template_str = """You are an expert in API testing. Based on the following target endpoint and related OpenAPI schema information, generate a complete test suite (TestSuite) in strict JSON format.
+    Returns:
+        切り詰めたテキスト
+    """
+    if _estimate_tokens(text) <= max_tokens:
+        return text
+    
+    max_chars = max(0, max_tokens) * _CHARS_PER_TOKEN
+    cut = max(text.rfind("\n## ", 0, max_chars), text.rfind("\n### ", 0, max_chars))
+    if cut <= 0:
+        cut = max_chars
+    return f"{text[:cut].rstrip()}\n\n(Remaining schema information omitted due to context length.)"
+
+
+class _SampleBodyTemplate(NamedTuple):
+    """
+    サンプルリクエストボディのテンプレート
+    
+    不変の値は base に値そのものを保持し、生成時は base をコピーするだけで済むようにします。
+    可変のコンテナ（配列とオブジェクト）の値のみ、(プロパティ名, 生成関数) の組として保持し、
+    呼び出しごとに新しく作ります。
+    """
+    base: Dict[str, Any]
+    containers: Tuple[Tuple[str, Callable[[], Any]], ...]
+
+
+# プロパティの型ごとに、プロパティ名からサンプル値を作る関数
+_SAMPLE_VALUES: Dict[str, Callable[[str], Any]] = {
+    "string": lambda prop_name: f"Test {prop_name}",
+    "integer": lambda prop_name: 1,
+    "number": lambda prop_name: 1,
+    "boolean": lambda prop_name: True,
+}
+# 配列とオブジェクトは呼び出し元で変更されうるため、呼び出しごとに新しく作る
+_SAMPLE_CONTAINER_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "array": list,
+    "object": dict,
+}
 
-Target endpoint:
+# スキーマからプロパティが得られない場合のサンプルリクエストボディ
+_DEFAULT_SAMPLE_BODY = {"name": "Test name", "description": "Test description"}
+_DEFAULT_SAMPLE_BODY_TEMPLATE = _SampleBodyTemplate(_DEFAULT_SAMPLE_BODY, ())
+# リクエストボディを送信するHTTPメソッド
+_BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+
+# LLMが生成するTestSuiteの構造を表すJSONスキーマ
+# （JSONを表すフィールドは、_normalize_step_data_fields で正規化できるJSON文字列とnullも許容する）
+_JSON_FIELD_SCHEMA = {"type": ["object", "string", "null"]}
+TEST_SUITE_SCHEMA = {
+    "type": "object",
+    "required": ["name", "target_method", "target_path", "test_cases"],
+    "properties": {
+        "name": {"type": "string"},
+        "target_method": {"type": ["string", "null"]},
+        "target_path": {"type": ["string", "null"]},
+        "test_cases": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["name", "description", "error_type", "test_steps"],
+                "properties": {
+                    "name": {"type": "string"},
+                    "description": {"type": ["string", "null"]},
+                    "error_type": {"type": ["string", "null"]},
+                    "test_steps": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": [
+                                "method", "path",
+                                "request_headers", "request_body", "request_params",
+                                "extract_rules", "expected_status"
+                            ],
+                            "properties": {
+                                "method": {"type": "string"},
+                                "path": {"type": "string"},
+                                "request_headers": _JSON_FIELD_SCHEMA,
+                                "request_body": {"type": ["object", "array", "string", "null"]},
+                                "request_params": _JSON_FIELD_SCHEMA,
+                                "extract_rules": _JSON_FIELD_SCHEMA,
+                                "expected_status": {"type": "integer"}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+# スキーマ検証関数はモジュール読み込み時に一度だけコンパイルする（不正な場合はValueErrorのサブクラスを送出）
+_validate_test_suite = fastjsonschema.compile(TEST_SUITE_SCHEMA)
+
+# プロンプトテンプレートが登録されていない場合に使用するテンプレート
+_FALLBACK_PROMPT_TEMPLATE = PromptTemplate(
+    """Target endpoint:
 {target_endpoint_info}
 
 Related OpenAPI schema:
 {relevant_schema_info}
+""",
+    system_template="""You are an expert in API testing. Based on the target endpoint and related OpenAPI schema information given in the user message, generate a complete test suite (TestSuite) in strict JSON format.
 
 The test suite must include the following test cases:
 1. **Normal case**: A request that successfully triggers the expected behavior. Include any necessary setup steps (e.g. creating required resources).
@@ -173,215 +352,850 @@ Return only a single valid JSON object matching the following format. **Do not i
 9. For each test case, the `"name"` field should indicate the case type (e.g., "Normal case", "Invalid input").
 10. Use the appropriate `error_type` for abnormal cases: `"missing_field"`, `"invalid_input"`, `"unauthorized"`, `"not_found"`, etc. Use `null` for normal cases.
 """
-            prompt_template = prompt_template_str
+)
+
+class LRUCache:
+    """エントリ数に上限のあるスレッドセーフなLRUキャッシュ"""
+    
+    def __init__(self, maxsize: int = 512):
+        """
+        キャッシュの初期化
+        
+        Args:
+            maxsize: 保持する最大エントリ数
+        """
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        キャッシュから値を取得
+        
+        Args:
+            key: キャッシュキー
+            
+        Returns:
+            キャッシュされた値、存在しない場合はNone
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Any, value: Any) -> None:
+        """
+        値をキャッシュに保存
+        
+        Args:
+            key: キャッシュキー
+            value: キャッシュする値
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """キャッシュをクリア"""
+        with self._lock:
+            self._entries.clear()
+
+
+class SchemaInfoCache(LRUCache):
+    """
+    関連スキーマ情報のプロセス内LRUキャッシュ
+    
+    関連スキーマ情報はスキーマとエンドポイントの内容だけで決まるため、
+    同じワーカープロセス内での再生成時や、ジェネレータのインスタンス間で再利用します。
+    """
+
+
+schema_info_cache = SchemaInfoCache()
+
+
+class SuiteResponseCache(LRUCache):
+    """
+    検証・正規化済みのテストスイートのプロセス内LRUキャッシュ
+    
+    LLMに送信するメッセージとモデル名から求めたハッシュをキーとし、
+    同じプロンプトでの再生成時にLLMの呼び出しを省略します。
+    """
+
+
+suite_response_cache = SuiteResponseCache(maxsize=settings.LLM_RESPONSE_CACHE_SIZE)
+
+
+class _GenerationSetup(NamedTuple):
+    """全エンドポイントで共通のテストスイート生成の設定"""
+    llm_client: Any
+    prompt_template: PromptTemplate
+    system_prompt: Optional[str]
+    use_dependency_aware_prompt: bool
+    error_types_instruction: str
+    model_name: str
+    response_schema: Optional[Dict]
+
+
+async def _next_or_none(iterator: AsyncIterator[Any]) -> Optional[Any]:
+    """
+    非同期イテレータの次の要素を取得する
+    
+    Args:
+        iterator: 非同期イテレータ
+        
+    Returns:
+        次の要素（終端に達した場合はNone）
+    """
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+class EndpointChainGenerator:
+    """選択されたエンドポイントからテストチェーンを生成するクラス"""
+    
+    def __init__(self, service_id: int, endpoints: List[Endpoint], schema: Dict = None, error_types: Optional[List[str]] = None, # error_types 引数を追加
+                 sample_body_cache_size: int = 1024):
+        """
+        Args:
+            service_id: サービスID (int)
+            endpoints: 選択されたエンドポイントのリスト
+            schema: OpenAPIスキーマ（オプション）
+            sample_body_cache_size: サンプルリクエストボディのテンプレートを保持する最大スキーマ数
+        """
+        self.service_id = service_id
+        self.endpoints = endpoints
+        self.schema = schema
+        self.error_types = error_types
+        
+        # ベクトルDBマネージャーは初回検索時に生成し、全エンドポイントで再利用する
+        self._vectordb_manager = None
+        self._vectordb_manager_lock = threading.Lock()
+        
+        # 初回のベクトル検索でまとめて取得した、クエリごとの検索結果
+        self._prefetched_vector_docs: Dict[str, List[Document]] = {}
+        self._vector_search_prefetched = False
+        self._vector_search_lock = threading.Lock()
+        
+        # キーワード検索用のBM25インデックスと、インデックス内の順序に対応する (パス, メソッド)（初回検索時に構築）
+        self._keyword_index: Optional[BM25Index] = None
+        self._keyword_operations: List[Tuple[str, str]] = []
+        self._keyword_index_lock = threading.Lock()
+        
+        # スキーマのフィンガープリントは関連スキーマ情報のキャッシュキーに使用する（初回利用時に計算）
+        self._schema_fingerprint = None
+        
+        # $ref 解決用の索引と、スキーマノードごとのJSON文字列のキャッシュ
+        self._ref_index = self._build_ref_index(self.schema) if self.schema else {}
+        self._json_dump_cache: Dict[int, str] = {}
+        
+        # エンドポイントごとのコンテキストと、依存元エンドポイントの情報のキャッシュ
+        self._endpoint_context_cache: Dict[int, Tuple[Endpoint, str]] = {}
+        self._endpoint_info_cache: Dict[Tuple[str, str], Optional[str]] = {}
+        # リクエストボディごとのIDフィールドと関連リソース名のキャッシュ（キーはid(request_body)、値は(request_body, 結果)）
+        self._id_field_resources_cache: Dict[int, Tuple[Dict, List[Tuple[str, Optional[str]]]]] = {}
+        # エンドポイントごとの検証済みモデルのキャッシュ（キーはid(endpoint)、値は(endpoint, モデル)）
+        self._endpoint_models: Dict[int, Tuple[Endpoint, EndpointSchema]] = {}
+        
+        # エンドポイントごとに参照するパス定義とコンポーネントスキーマ
+        self._paths: Dict[str, Dict] = (self.schema or {}).get("paths") or {}
+        self._components_schemas: Dict[str, Dict] = ((self.schema or {}).get("components") or {}).get("schemas") or {}
+        self._operations: Dict[Tuple[str, str], Dict] = self._build_operation_index(self._paths)
+        # 関連スキーマの部分一致検索用に、小文字化したスキーマ名を事前に計算しておく
+        self._components_schemas_lower: List[Tuple[str, str, Dict]] = [
+            (schema_name.lower(), schema_name, schema) for schema_name, schema in self._components_schemas.items()
+        ]
+        # リソース名（小文字）ごとの関連コンポーネントスキーマのキャッシュ
+        self._related_schemas_cache: Dict[str, List[Tuple[str, Dict]]] = {}
+        
+        # ハイブリッド検索の結果統合に使う検索方法ごとの重みと、統合後に残す最大件数
+        self.vector_search_weight = 1.0
+        self.dependency_search_weight = 1.5
+        self.keyword_search_weight = 1.0
+        self.max_results = 10
+        
+        # 統合後の検索結果をクロスエンコーダーで再ランキングする場合の設定
+        # （再ランキングの対象として rerank_candidates 件を残し、LLMには上位 rerank_top_k 件だけを渡す）
+        self.rerank_enabled = settings.RERANK_ENABLED
+        self.rerank_candidates = settings.RERANK_CANDIDATES
+        self.rerank_top_k = settings.RERANK_TOP_K
+        
+        # スキーマごとのサンプルリクエストボディのテンプレート（キーはid(schema)、値は(schema, テンプレート)）
+        self._sample_body_templates = LRUCache(maxsize=sample_body_cache_size)
+        
+        # 依存関係解析器の初期化
+        self.dependency_analyzer = None
+        self.dependencies: List[Dict] = []
+        if self.schema:
+            self._initialize_dependency_analysis()
+    
+    @staticmethod
+    def _build_operation_index(paths: Dict[str, Dict]) -> Dict[Tuple[str, str], Dict]:
+        """
+        パス定義からパスとHTTPメソッドをキーとするオペレーションの索引を構築する
+        
+        Args:
+            paths: スキーマのpaths
+            
+        Returns:
+            (パス, 小文字のHTTPメソッド)をキーとするオペレーションの辞書
+        """
+        return {
+            (path, method): operation
+            for path, path_item in paths.items() if isinstance(path_item, dict)
+            for method, operation in path_item.items() if method in _HTTP_METHODS
+        }
+    
+    @staticmethod
+    def _build_ref_index(schema: Dict) -> Dict[str, Dict]:
+        """
+        components 配下の定義を $ref のパスで引ける索引を構築する
+        
+        Args:
+            schema: OpenAPIスキーマ
+            
+        Returns:
+            "#/components/{section}/{name}" をキーとする定義の辞書
+        """
+        ref_index = {}
+        components = schema.get("components", {})
+        if not isinstance(components, dict):
+            return ref_index
+        
+        for section, definitions in components.items():
+            if not isinstance(definitions, dict):
+                continue
+            for name, definition in definitions.items():
+                # $ref では名前中の "~" と "/" がJSON Pointerの規則でエスケープされる
+                escaped_name = name.replace("~", "~0").replace("/", "~1")
+                ref_index[f"#/components/{section}/{escaped_name}"] = definition
+        return ref_index
+    
+    def _resolve_ref(self, ref_path: str) -> Optional[Dict]:
+        """
+        $ref を解決する
+        
+        索引にないパス（components 以外を指す参照など）はJSON Pointerとして辿ります。
+        
+        Args:
+            ref_path: $ref の値
+            
+        Returns:
+            参照先の定義（解決できない場合はNone）
+        """
+        resolved = self._ref_index.get(ref_path)
+        if resolved is not None:
+            return resolved
+        
+        if not ref_path.startswith("#/") or not self.schema:
+            return None
+        
+        node = self.schema
+        for part in ref_path[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+    
+    def _dumps_schema_node(self, node) -> str:
+        """
+        スキーマのノードをJSON文字列に変換する
+        
+        スキーマのノードは生成処理中に変更されないため、同じノードの変換結果を再利用します。
+        
+        Args:
+            node: スキーマのノード
+            
+        Returns:
+            JSON文字列
+        """
+        node_id = id(node)
+        dumped = self._json_dump_cache.get(node_id)
+        if dumped is None:
+            dumped = _dumps_json(node)
+            self._json_dump_cache[node_id] = dumped
+        return dumped
+    
+    @property
+    def dependencies(self) -> List[Dict]:
+        """スキーマから抽出された依存関係のリスト"""
+        return self._dependencies
+    
+    @dependencies.setter
+    def dependencies(self, dependencies: List[Dict]) -> None:
+        self._dependencies = dependencies
+        # 索引と循環の検出結果は次回の参照時に構築し直す
+        self._dependency_index = None
+        self._circular_endpoints = None
+    
+    def _get_target_dependencies(self, endpoint: Endpoint, dependency_type: Optional[str] = None) -> List[Dict]:
+        """
+        指定したエンドポイントをターゲットとする依存関係を取得する
+        
+        依存関係は (種類, パス, メソッド) をキーとする索引から取得するため、
+        エンドポイントごとに依存関係のリスト全体を走査せずに済みます。
+        
+        Args:
+            endpoint: ターゲットとなるエンドポイント
+            dependency_type: 依存関係の種類（指定しない場合はすべての種類）
+            
+        Returns:
+            依存関係のリスト（元のリストでの順序を保持）
+        """
+        index = self._dependency_index
+        if index is None:
+            index = {}
+            for dep in self._dependencies:
+                target_info = dep.get("target", {})
+                target_key = (target_info.get("path"), (target_info.get("method") or "").lower())
+                index.setdefault((None,) + target_key, []).append(dep)
+                index.setdefault((dep.get("type"),) + target_key, []).append(dep)
+            self._dependency_index = index
+        return index.get((dependency_type, endpoint.path, endpoint.method.lower()), [])
+    
+    def _initialize_dependency_analysis(self):
+        """依存関係解析器を初期化し、依存関係を抽出する"""
+        try:
+            openapi_analyzer = OpenAPIAnalyzer(self.schema)
+            self.dependencies = openapi_analyzer.extract_dependencies()
+            self.dependency_analyzer = DependencyAnalyzer(self.schema)
+            logger.info(f"Extracted {len(self.dependencies)} dependencies from schema")
+        except Exception as e:
+            logger.error(f"Error initializing dependency analysis: {e}", exc_info=True)
+            self.dependencies = []
+    
+    def generate_chains(self, force_refresh: bool = False) -> List[Dict]:
+        """
+        選択されたエンドポイントからテストチェーンを生成する (TO-BE: エンドポイントごとに生成)
+        
+        結果は入力されたエンドポイントの順序を保持します。
+        
+        Args:
+            force_refresh: Trueの場合、キャッシュされたテストスイートを使用せずにLLMを呼び出す
+        
+        Returns:
+            生成されたテストチェーンのリスト
+        """
+        signatures = [self._get_endpoint_signature(endpoint) for endpoint in self.endpoints]
+        chains_by_signature = dict(self._iter_unique_chains(signatures, force_refresh))
+
+        generated_chains = []
+        emitted_signatures: Set[bytes] = set()
+        for signature in signatures:
+            chain = chains_by_signature.get(signature)
+            if chain is None:
+                continue
+            # 重複したエンドポイントには独立したコピーを返す（保存時に別々に変更されても影響しないように）
+            generated_chains.append(copy.deepcopy(chain) if signature in emitted_signatures else chain)
+            emitted_signatures.add(signature)
+
+        return generated_chains
+
+    def generate_chains_stream(self, force_refresh: bool = False) -> Iterator[Dict]:
+        """
+        選択されたエンドポイントからテストチェーンを生成し、生成が完了したものから順に返す
+        
+        全エンドポイントの生成完了を待たずに結果を受け取れるため、最初の結果が得られるまでの時間が短くなります。
+        結果の順序はエンドポイントの順序ではなく、生成が完了した順序になります。
+        
+        Args:
+            force_refresh: Trueの場合、キャッシュされたテストスイートを使用せずにLLMを呼び出す
+        
+        Yields:
+            生成されたテストチェーン
+        """
+        signatures = [self._get_endpoint_signature(endpoint) for endpoint in self.endpoints]
+        signature_counts = Counter(signatures)
+        for signature, chain in self._iter_unique_chains(signatures, force_refresh):
+            yield chain
+            # 重複したエンドポイントには独立したコピーを返す
+            for _ in range(signature_counts[signature] - 1):
+                yield copy.deepcopy(chain)
+
+    def _prepare_generation(self) -> _GenerationSetup:
+        """
+        全エンドポイントで共通のLLMクライアントとプロンプトを準備する
+        
+        Returns:
+            テストスイート生成の共通設定
+        """
+        model_name = settings.LLM_MODEL_NAME
+        
+        try:
+            llm_client = LLMClientFactory.get_shared(
+                provider_type=LLMProviderType.LOCAL,
+                model_name=model_name,
+                temperature=0.2,
+            )
+        except Exception as e:
+            logger.error(f"Error initializing LLM client: {e}", exc_info=True)
+            raise
+        
+        # 依存関係対応プロンプトテンプレートの使用を試行
+        prompt_template = None
+        use_dependency_aware_prompt = False
+        
+        try:
+            if self.dependencies:
+                # 依存関係が検出された場合は依存関係対応プロンプトを使用
+                prompt_template = get_prompt_template("dependency_aware_rag")
+                use_dependency_aware_prompt = True
+                logger.info("Using dependency-aware prompt template")
+            else:
+                # 依存関係が検出されない場合は従来のプロンプトを使用
+                prompt_template = get_prompt_template("endpoint_test_generation")
+                logger.info("Using standard endpoint test generation prompt")
+        except KeyError as e:
+            logger.warning(f"Prompt template not found: {e}, using hardcoded prompt")
+            prompt_template = _FALLBACK_PROMPT_TEMPLATE
+
+        error_types_instruction = "以下の異常系の種類（missing_field, invalid_input, unauthorized, not_found など）"
+        if self.error_types and len(self.error_types) > 0:
+            error_types_instruction = f"以下の異常系の種類（{', '.join(self.error_types)}）"
+        
+        # エンドポイントに依存しない指示はシステムメッセージとして一度だけ組み立て、
+        # 全リクエストで同一のプレフィックスを送ることでLLMサーバーのプレフィックスキャッシュを活用する
+        system_prompt = prompt_template.format_system(error_types_instruction=error_types_instruction)
+        # 全エンドポイントで共通の変数はループの前に埋め込み、エンドポイントごとには残りの変数だけを埋める
+        prompt_template = prompt_template.partial(error_types_instruction=error_types_instruction)
+        
+        return _GenerationSetup(
+            llm_client=llm_client,
+            prompt_template=prompt_template,
+            system_prompt=system_prompt,
+            use_dependency_aware_prompt=use_dependency_aware_prompt,
+            error_types_instruction=error_types_instruction,
+            model_name=model_name,
+            # 対応するサーバーではスキーマによる制約付きデコードで生成させ、不正なJSONの出力を防ぐ
+            response_schema=TEST_SUITE_SCHEMA if settings.LLM_STRUCTURED_OUTPUT else None
+        )
+
+    def _iter_unique_chains(self, signatures: List[bytes], force_refresh: bool = False) -> Iterator[Tuple[bytes, Dict]]:
+        """
+        構造が同一のエンドポイントを除いてテストスイートを生成し、完了したものから順に返す
+        
+        生成処理は共有のイベントループ上で実行し、結果を1件ずつ呼び出し元のスレッドに受け渡します。
+        
+        Args:
+            signatures: エンドポイントごとのシグネチャ（self.endpoints と同じ順序）
+            force_refresh: Trueの場合、キャッシュされたテストスイートを使用しない
+        
+        Yields:
+            (シグネチャ, 生成されたテストチェーン) のタプル
+        """
+        setup = self._prepare_generation()
+        
+        unique_endpoints: Dict[bytes, Endpoint] = {}
+        for signature, endpoint in zip(signatures, self.endpoints):
+            unique_endpoints.setdefault(signature, endpoint)
+        if len(unique_endpoints) < len(signatures):
+            logger.info(f"Skipping {len(signatures) - len(unique_endpoints)} duplicate endpoints for test suite generation")
+        
+        chains = self._generate_chains_as_completed(unique_endpoints, setup, force_refresh)
+        try:
+            while True:
+                item = run_llm_coroutine(_next_or_none(chains))
+                if item is None:
+                    return
+                yield item
+        finally:
+            run_llm_coroutine(chains.aclose())
+
+    async def _generate_chains_as_completed(self, unique_endpoints: Dict[bytes, Endpoint], setup: _GenerationSetup,
+                                            force_refresh: bool = False) -> AsyncIterator[Tuple[bytes, Dict]]:
+        """
+        エンドポイントごとのテストスイート生成を並行して実行し、完了したものから順に返す
+
+        各エンドポイントについて、プロンプトの構築（スレッドプール）、LLMの呼び出し（同時実行数は
+        LLM_MAX_CONCURRENCY で制限）、レスポンスの検証・正規化を並行して実行します。
+        途中で反復を終了した場合、未完了の生成処理はキャンセルされます。
+
+        Args:
+            unique_endpoints: シグネチャをキーとする、構造が重複しないエンドポイント
+            setup: テストスイート生成の共通設定
+            force_refresh: Trueの場合、キャッシュされたテストスイートを使用しない
+
+        Yields:
+            (シグネチャ, 生成されたテストチェーン) のタプル
+        """
+        # コンテキスト構築（ベクトル検索・埋め込み）はスレッドプールで、LLM呼び出しはセマフォで同時実行数を制限して
+        # エンドポイントごとにパイプライン処理し、プロンプトが揃ったものから順にLLMへ送信する
+        semaphore = asyncio.Semaphore(max(1, settings.LLM_MAX_CONCURRENCY))
+        executor = ThreadPoolExecutor(max_workers=max(1, min(8, len(unique_endpoints))))
+        tasks = {
+            asyncio.ensure_future(
+                self._generate_one_async(target_endpoint, setup, semaphore, executor, force_refresh)
+            ): signature
+            for signature, target_endpoint in unique_endpoints.items()
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    chain = task.result()
+                    if chain is not None:
+                        yield tasks[task], chain
+        finally:
+            for task in pending:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _generate_one_async(self, target_endpoint: Endpoint, setup: _GenerationSetup, semaphore: asyncio.Semaphore,
+                                  executor: ThreadPoolExecutor, force_refresh: bool = False) -> Optional[Dict]:
+        """
+        1つのエンドポイントのテストスイートを非同期で生成する
+
+        Args:
+            target_endpoint: 対象エンドポイント
+            setup: テストスイート生成の共通設定
+            semaphore: LLMの同時呼び出し数を制限するセマフォ
+            executor: コンテキスト構築に使用するスレッドプール
+            force_refresh: Trueの場合、キャッシュされたテストスイートを使用しない
+
+        Returns:
+            生成されたテストチェーン（LLM呼び出しに失敗した場合はフォールバックチェーン、生成できなかった場合はNone）
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            messages = await loop.run_in_executor(
+                executor,
+                self._build_prompt_messages,
+                target_endpoint,
+                setup.prompt_template,
+                setup.system_prompt,
+                setup.use_dependency_aware_prompt,
+                setup.error_types_instruction
+            )
+            cache_key = self._get_response_cache_key(messages, setup.model_name)
+            if not force_refresh:
+                cached_chain = suite_response_cache.get(cache_key)
+                if cached_chain is not None:
+                    logger.debug(f"Using cached test suite for {target_endpoint.method} {target_endpoint.path}")
+                    return copy.deepcopy(cached_chain)
+            async with semaphore:
+                suite_data = await setup.llm_client.acall_with_json_response(
+                    messages, response_schema=setup.response_schema
+                )
+        except LLMException as e:
+            logger.error(f"Error invoking LLM for endpoint {target_endpoint.method} {target_endpoint.path}: {e}", exc_info=True)
+            return self._generate_fallback_chain(target_endpoint)
+        except Exception as e:
+            logger.error(f"Error generating test suite for {target_endpoint.method} {target_endpoint.path}: {e}", exc_info=True)
+            return None
+
+        chain = self._process_suite_response(suite_data, target_endpoint, setup.use_dependency_aware_prompt)
+        if chain is not None:
+            # 呼び出し元で変更されてもキャッシュに影響しないようにコピーを保存する
+            suite_response_cache.set(cache_key, copy.deepcopy(chain))
+        return chain
+
+    @staticmethod
+    def _get_response_cache_key(messages: List[Message], model_name: str) -> bytes:
+        """
+        テストスイートのキャッシュキーを生成する
+
+        Args:
+            messages: LLMに送信するメッセージ
+            model_name: 使用するモデル名
+
+        Returns:
+            キャッシュキー
+        """
+        payload = orjson.dumps([model_name, [message.to_dict() for message in messages]])
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    @staticmethod
+    def _get_endpoint_signature(endpoint: Endpoint) -> bytes:
+        """
+        エンドポイントの構造を表すシグネチャを生成する
+
+        メソッド、パス、リクエスト・レスポンス定義が同じエンドポイントは同じシグネチャになります。
+
+        Args:
+            endpoint: 対象エンドポイント
+
+        Returns:
+            シグネチャ
+        """
+        return hashlib.blake2b(_signature_bytes({
+            "method": endpoint.method,
+            "path": endpoint.path,
+            "request_body": endpoint.request_body,
+            "request_headers": endpoint.request_headers,
+            "request_query_params": endpoint.request_query_params,
+            "responses": endpoint.responses,
+        }), digest_size=16).digest()
+
+    def _build_prompt_messages(self, target_endpoint: Endpoint, prompt_template, system_prompt: Optional[str],
+                               use_dependency_aware_prompt: bool, error_types_instruction: str) -> List:
+        """
+        単一のエンドポイントに対するLLMへのメッセージを構築する
+
+        Args:
+            target_endpoint: 対象エンドポイント
+            prompt_template: 使用するプロンプトテンプレート
+            system_prompt: 全エンドポイントで共通のシステムプロンプト
+            use_dependency_aware_prompt: 依存関係対応プロンプトを使用するかどうか
+            error_types_instruction: 異常系の種類に関する指示
+
+        Returns:
+            LLMに送信するメッセージのリスト
+        """
+        context = self._build_prompt_context(
+            target_endpoint,
+            use_dependency_aware_prompt,
+            error_types_instruction,
+            variables=prompt_template.variables
+        )
+        user_prompt = prompt_template.format(**context)
+
+        # コンテキスト長を超える場合のみ、関連スキーマ情報を残りのトークン数に収めて組み立て直す
+        available_tokens = settings.LLM_CONTEXT_WINDOW - settings.LLM_OUTPUT_TOKEN_BUDGET - _estimate_tokens(system_prompt or "")
+        user_prompt_tokens = _estimate_tokens(user_prompt)
+        if user_prompt_tokens > available_tokens:
+            schema_info = context["relevant_schema_info"]
+            schema_info_budget = available_tokens - (user_prompt_tokens - _estimate_tokens(schema_info))
+            context["relevant_schema_info"] = _truncate_to_token_budget(schema_info, schema_info_budget)
+            user_prompt = prompt_template.format(**context)
+
+        messages = []
+        if system_prompt:
+            messages.append(Message(MessageRole.SYSTEM, system_prompt))
+        messages.append(Message(MessageRole.USER, user_prompt))
+        return messages
+
+    def _process_suite_response(self, suite_data: Dict, target_endpoint: Endpoint,
+                                use_dependency_aware_prompt: bool) -> Optional[Dict]:
+        """
+        LLMのレスポンスを検証・正規化してテストスイートにする
+
+        Args:
+            suite_data: LLMのレスポンス
+            target_endpoint: 対象エンドポイント
+            use_dependency_aware_prompt: 依存関係対応プロンプトを使用したかどうか
+
+        Returns:
+            テストスイート（レスポンスが不正な場合はNone）
+        """
+        try:
+            if use_dependency_aware_prompt:
+                suite_data = self._validate_and_normalize_dependency_aware_response(suite_data, target_endpoint)
+
+            _validate_test_suite(suite_data)
+
+            for case_data in suite_data["test_cases"]:
+                case_data["test_steps"] = [
+                    self._normalize_step_data_fields(step_data) for step_data in case_data["test_steps"]
+                ]
+
+            if 'target_method' not in suite_data or suite_data['target_method'] is None:
+                suite_data['target_method'] = target_endpoint.method
+                logger.warning(f"target_method not found in LLM response, using endpoint method: {target_endpoint.method}")
+            if 'target_path' not in suite_data or suite_data['target_path'] is None:
+                suite_data['target_path'] = target_endpoint.path
+                logger.warning(f"target_path not found in LLM response, using endpoint path: {target_endpoint.path}")
+
+            return suite_data
+
+        except Exception as e:
+            logger.error(f"Error processing LLM response for {target_endpoint.method} {target_endpoint.path}: {e}", exc_info=True)
+
+        return None
+
+    def _build_prompt_context(self, target_endpoint: Endpoint, use_dependency_aware_prompt: bool,
+                              error_types_instruction: str, variables: Optional[Set[str]] = None) -> Dict[str, str]:
+        """
+        プロンプトテンプレートに埋め込むコンテキストを構築する
+        
+        Args:
+            target_endpoint: 対象エンドポイント
+            use_dependency_aware_prompt: 依存関係対応プロンプトを使用するかどうか
+            error_types_instruction: 異常系の種類に関する指示
+            variables: テンプレートが参照する変数名（指定した場合は参照されない項目の構築を省略）
+            
+        Returns:
+            プロンプトテンプレート用のコンテキスト
+        """
+        target_endpoint_info = self._build_endpoint_context(target_endpoint)
+        relevant_schema_info = self._get_relevant_schema_info(target_endpoint)
+        
+        if use_dependency_aware_prompt:
+            # 依存関係対応プロンプト用のコンテキスト構築
+            return self._build_dependency_aware_context(
+                target_endpoint,
+                target_endpoint_info,
+                relevant_schema_info,
+                error_types_instruction,
+                variables=variables
+            )
+        
+        # 従来のプロンプト用のコンテキスト構築
+        return {
+            "target_endpoint_info": target_endpoint_info,
+            "relevant_schema_info": relevant_schema_info,
+            "error_types_instruction": error_types_instruction
+        }
 
-        error_types_instruction = "以下の異常系の種類（missing_field, invalid_input, unauthorized, not_found など）"
-        if self.error_types and len(self.error_types) > 0:
-            error_types_instruction = f"以下の異常系の種類（{', '.join(self.error_types)}）"
+    def _build_endpoint_context(self, endpoint: Endpoint) -> str:
+        """
+        単一のエンドポイント情報からLLMのためのコンテキストを構築する
+        
+        同じジェネレータで再生成する場合に備えて、エンドポイントごとに構築結果を再利用します。
         
-        for target_endpoint in self.endpoints:
+        Args:
+            endpoint: 対象エンドポイント
             
-            try:
-                target_endpoint_info = self._build_endpoint_context(target_endpoint)
-                relevant_schema_info = self._get_relevant_schema_info(target_endpoint)
-                
-                if use_dependency_aware_prompt:
-                    # 依存関係対応プロンプト用のコンテキスト構築
-                    context = self._build_dependency_aware_context(
-                        target_endpoint,
-                        target_endpoint_info,
-                        relevant_schema_info,
-                        error_types_instruction
-                    )
-                else:
-                    # 従来のプロンプト用のコンテキスト構築
-                    context = {
-                        "target_endpoint_info": target_endpoint_info,
-                        "relevant_schema_info": relevant_schema_info,
-                        "error_types_instruction": error_types_instruction
-                    }
-                
-                try:
-                    if 'prompt_template' in locals():
-                        suite_data = llm_client.call_with_json_response(
-                            [Message(MessageRole.USER,
-                                    prompt_template.format(**context))]
-                        )
-                    else:
-                        suite_data = llm_client.call_with_json_response(
-                            [Message(MessageRole.USER,
-                                    prompt_template_str.format(**context))]
-                        )
-                    
-                
-                except (LLMException, LLMResponseFormatException) as llm_error:
-                    logger.error(f"Error invoking LLM for endpoint {target_endpoint.method} {target_endpoint.path}: {llm_error}", exc_info=True)
-                    chain = self._generate_fallback_chain(target_endpoint)
-                    generated_chains.append(chain)
-                    continue
-                
-                try:
-                    if use_dependency_aware_prompt:
-                        suite_data = self._validate_and_normalize_dependency_aware_response(suite_data, target_endpoint)
-                    else:
-                        if not isinstance(suite_data, dict) or \
-                            "name" not in suite_data or \
-                            "target_method" not in suite_data or \
-                            "target_path" not in suite_data or \
-                            "test_cases" not in suite_data or \
-                            not isinstance(suite_data["test_cases"], list):
-                            raise ValueError("LLM response does not match expected TestSuite structure")
-
-                    for case_data in suite_data["test_cases"]:
-                        if not isinstance(case_data, dict) or \
-                            "name" not in case_data or \
-                            "description" not in case_data or \
-                            "error_type" not in case_data or \
-                            "test_steps" not in case_data or \
-                            not isinstance(case_data["test_steps"], list):
-                            raise ValueError("LLM response contains invalid TestCase structure")
-
-                        for step_data in case_data["test_steps"]:
-                             if not isinstance(step_data, dict) or \
-                                "method" not in step_data or \
-                                "path" not in step_data or \
-                                "request_headers" not in step_data or \
-                                "request_body" not in step_data or \
-                                "request_params" not in step_data or \
-                                "extract_rules" not in step_data or \
-                                "expected_status" not in step_data:
-                                raise ValueError("LLM response contains invalid TestStep structure")
-                             
-                             step_data = self._normalize_step_data_fields(step_data)
-
-                    if 'target_method' not in suite_data or suite_data['target_method'] is None:
-                        suite_data['target_method'] = target_endpoint.method
-                        logger.warning(f"target_method not found in LLM response, using endpoint method: {target_endpoint.method}")
-                    if 'target_path' not in suite_data or suite_data['target_path'] is None:
-                        suite_data['target_path'] = target_endpoint.path
-                        logger.warning(f"target_path not found in LLM response, using endpoint path: {target_endpoint.path}")
-
-                    generated_chains.append(suite_data)
-
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse LLM response as JSON for {target_endpoint.method} {target_endpoint.path}: {e}")
-                    try:
-                        import re
-                        json_match = re.search(r'```json\s*(.*?)\s*```', suite_data, re.DOTALL)
-                        if json_match:
-                            json_str = json_match.group(1)
-                            suite_data = json.loads(json_str)
-
-                            if not isinstance(suite_data, dict) or \
-                                "name" not in suite_data or \
-                                "target_method" not in suite_data or \
-                                "target_path" not in suite_data or \
-                                "test_cases" not in suite_data or \
-                                not isinstance(suite_data["test_cases"], list):
-                                    raise ValueError("Extracted JSON does not match expected TestSuite structure")
-
-                            for case_data in suite_data["test_cases"]:
-                                if not isinstance(case_data, dict) or \
-                                "name" not in case_data or \
-                                "description" not in case_data or \
-                                "error_type" not in case_data or \
-                                "test_steps" not in case_data or \
-                                not isinstance(case_data["test_steps"], list):
-                                    raise ValueError("Extracted JSON contains invalid TestCase structure")
-
-                                for step_data in case_data["test_steps"]:
-                                    required_fields = [
-                                        "method", "path",
-                                        "request_headers", "request_body", "request_params",
-                                        "extract_rules", "expected_status"
-                                    ]
-                                    if not isinstance(step_data, dict) or any(field not in step_data for field in required_fields):
-                                        raise ValueError("Extracted JSON contains invalid TestStep structure")
-
-                            generated_chains.append(suite_data)
-                        else:
-                            logger.error(f"Could not find JSON code block in response for {target_endpoint.method} {target_endpoint.path}")
-                    except Exception as extract_error:
-                        logger.error(f"Error extracting or parsing JSON from response: {extract_error}")
+        Returns:
+            エンドポイント情報のテキスト表現
+        """
+        cached = self._endpoint_context_cache.get(id(endpoint))
+        if cached is not None and cached[0] is endpoint:
+            return cached[1]
+        
+        context = self._format_endpoint_context(endpoint)
+        self._endpoint_context_cache[id(endpoint)] = (endpoint, context)
+        return context
 
-                except Exception as e:
-                    logger.error(f"Error processing LLM response for {target_endpoint.method} {target_endpoint.path}: {e}", exc_info=True)
+    def _get_endpoint_model(self, endpoint: Endpoint) -> EndpointSchema:
+        """
+        エンドポイントを検証済みのスキーマモデルに変換する
+        
+        コンテキスト構築とスキーマ情報の抽出で同じエンドポイントを参照するため、変換結果を再利用します。
+        
+        Args:
+            endpoint: 対象エンドポイント
+            
+        Returns:
+            エンドポイントのスキーマモデル
+        """
+        cached = self._endpoint_models.get(id(endpoint))
+        if cached is not None and cached[0] is endpoint:
+            return cached[1]
+        
+        endpoint_model = EndpointSchema.model_validate(endpoint)
+        self._endpoint_models[id(endpoint)] = (endpoint, endpoint_model)
+        return endpoint_model
 
-            except Exception as e:
-                logger.error(f"Error generating test suite for {target_endpoint.method} {target_endpoint.path}: {e}", exc_info=True)
+    def _get_endpoint_json_field(self, endpoint: Endpoint, field: str) -> Dict:
+        """
+        エンドポイントのJSONフィールド（request_bodyやresponsesなど）を辞書として取得する
+        
+        通常は辞書として読み込まれているためそのまま返し、JSON文字列などの場合のみ
+        スキーマモデルによる変換結果を使用します。
+        
+        Args:
+            endpoint: 対象エンドポイント
+            field: フィールド名
+            
+        Returns:
+            フィールドの値（値がない場合は空の辞書）
+        """
+        value = getattr(endpoint, field)
+        if isinstance(value, dict):
+            return value
+        return getattr(self._get_endpoint_model(endpoint), field)
 
-        return generated_chains
+    def _get_related_schemas(self, resource_name: str) -> List[Tuple[str, Dict]]:
+        """
+        名前にリソース名を含むコンポーネントスキーマを取得する
+        
+        大文字小文字を区別せずに部分一致で判定します。
+        同じリソースのエンドポイントでは同じ結果になるため、リソース名ごとに結果を再利用します。
+        
+        Args:
+            resource_name: リソース名
+            
+        Returns:
+            (スキーマ名, スキーマ) のリスト（components.schemas での順序を保持）
+        """
+        resource_lower = resource_name.lower()
+        related = self._related_schemas_cache.get(resource_lower)
+        if related is None:
+            related = [
+                (schema_name, schema)
+                for schema_name_lower, schema_name, schema in self._components_schemas_lower
+                if resource_lower in schema_name_lower
+            ]
+            self._related_schemas_cache[resource_lower] = related
+        return related
 
-    def _build_endpoint_context(self, endpoint: Endpoint) -> str:
-        """単一のエンドポイント情報からLLMのためのコンテキストを構築する"""
-        endpoint_info = f"Endpoint: {endpoint.method} {endpoint.path}\n"
-        endpoint_model = EndpointSchema.from_orm(endpoint)
+    def _format_endpoint_context(self, endpoint: Endpoint) -> str:
+        """単一のエンドポイント情報をLLMのためのテキストに整形する"""
+        parts = [f"Endpoint: {endpoint.method} {endpoint.path}\n"]
+        endpoint_model = self._get_endpoint_model(endpoint)
         
         if endpoint.summary:
-            endpoint_info += f"Summary: {endpoint.summary}\n"
+            parts.append(f"Summary: {endpoint.summary}\n")
         
         if endpoint.description:
-            endpoint_info += f"Description: {endpoint.description}\n"
+            parts.append(f"Description: {endpoint.description}\n")
         
         if endpoint_model.request_body:
-            endpoint_info += "Request Body:\n"
-            endpoint_info += f"```json\n{json.dumps(endpoint_model.request_body, indent=2)}\n```\n"
+            parts.append("Request Body:\n")
+            parts.append(f"```json\n{_dumps_json(endpoint_model.request_body)}\n```\n")
         
         if endpoint_model.request_headers:
-            endpoint_info += "Request Headers:\n"
+            parts.append("Request Headers:\n")
             for header_name, header_info in endpoint_model.request_headers.items():
                 required = "required" if header_info.get("required", False) else "optional"
-                endpoint_info += f"- {header_name} (in header, {required})\n"
+                parts.append(f"- {header_name} (in header, {required})\n")
         
         if endpoint_model.request_query_params:
-            endpoint_info += "Query Parameters:\n"
+            parts.append("Query Parameters:\n")
             for param_name, param_info in endpoint_model.request_query_params.items():
                 required = "required" if param_info.get("required", False) else "optional"
-                endpoint_info += f"- {param_name} (in query, {required})\n"
+                parts.append(f"- {param_name} (in query, {required})\n")
         
         path_parameters = []
         
-        if self.schema:
-            if endpoint.path in self.schema.get("paths", {}):
-                path_item = self.schema["paths"][endpoint.path]
-                if "parameters" in path_item:
-                    path_parameters.extend(path_item["parameters"])
-            
-            if endpoint.path in self.schema.get("paths", {}):
-                path_item = self.schema["paths"][endpoint.path]
-                if endpoint.method.lower() in path_item:
-                    operation = path_item[endpoint.method.lower()]
-                    if "parameters" in operation:
-                        path_parameters.extend(operation["parameters"])
-
-        unique_path_parameters = {}
+        path_item = self._paths.get(endpoint.path)
+        if path_item is not None and "parameters" in path_item:
+            path_parameters.extend(path_item["parameters"])
+        
+        operation = self._operations.get((endpoint.path, endpoint.method.lower()))
+        if operation is not None and "parameters" in operation:
+            path_parameters.extend(operation["parameters"])
+
+        # 同じ (name, in) のパラメータは最初に現れたものだけを使う
+        seen_parameters = set()
+        unique_path_parameters = []
         for param in path_parameters:
             key = (param.get("name"), param.get("in"))
-            if key not in unique_path_parameters:
-                unique_path_parameters[key] = param
+            if key not in seen_parameters:
+                seen_parameters.add(key)
+                unique_path_parameters.append(param)
         
         if unique_path_parameters:
-            endpoint_info += "Path Parameters:\n"
-            for param in unique_path_parameters.values():
+            parts.append("Path Parameters:\n")
+            for param in unique_path_parameters:
                 param_name = param.get("name", "unknown")
                 required = "required" if param.get("required", False) else "optional"
                 param_schema = param.get("schema", {})
                 param_type = param_schema.get("type", "any")
-                endpoint_info += f"- {param_name} (in path, {required}, type: {param_type})\n"
+                parts.append(f"- {param_name} (in path, {required}, type: {param_type})\n")
 
         if endpoint_model.responses:
-            endpoint_info += "Responses:\n"
+            parts.append("Responses:\n")
             for status, response in endpoint_model.responses.items():
-                endpoint_info += f"- Status: {status}\n"
+                parts.append(f"- Status: {status}\n")
                 if "description" in response:
-                    endpoint_info += f"  Description: {response['description']}\n"
+                    parts.append(f"  Description: {response['description']}\n")
                 if "content" in response:
                     for media_type, content in response["content"].items():
                         if "schema" in content:
-                            endpoint_info += f"  Content Type: {media_type}\n"
-                            endpoint_info += f"  Schema:\n```json\n{json.dumps(content['schema'], indent=2)}\n```\n"
+                            parts.append(f"  Content Type: {media_type}\n")
+                            parts.append(f"  Schema:\n```json\n{_dumps_json(content['schema'])}\n```\n")
         
-        return endpoint_info
+        return "".join(parts)
 
     def _get_relevant_schema_info(self, target_endpoint: Endpoint) -> str:
         """
@@ -393,6 +1207,11 @@ Return only a single valid JSON object matching the following format. **Do not i
         Returns:
             関連スキーマ情報のテキスト表現
         """
+        cache_key = self._get_schema_info_cache_key("hybrid", target_endpoint)
+        cached_info = schema_info_cache.get(cache_key) if cache_key is not None else None
+        if cached_info is not None:
+            return cached_info
+        
         try:
             # ハイブリッド検索の実行
             hybrid_results = self._perform_hybrid_search(target_endpoint)
@@ -405,7 +1224,10 @@ Return only a single valid JSON object matching the following format. **Do not i
                     return "No relevant schema information found."
 
             # 検索結果の統合とフォーマット
-            return self._format_hybrid_search_results(target_endpoint, hybrid_results)
+            schema_info = self._format_hybrid_search_results(target_endpoint, hybrid_results)
+            if cache_key is not None:
+                schema_info_cache.set(cache_key, schema_info)
+            return schema_info
 
         except Exception as e:
             logger.error(f"Error during hybrid search for endpoint {target_endpoint.method} {target_endpoint.path}: {e}", exc_info=True)
@@ -415,29 +1237,103 @@ Return only a single valid JSON object matching the following format. **Do not i
             else:
                 return "Error retrieving relevant schema information."
     
-    def _perform_hybrid_search(self, target_endpoint: Endpoint) -> List[Dict]:
+    def _get_schema_fingerprint(self) -> str:
+        """
+        スキーマ全体のハッシュ値を取得する
+        
+        Returns:
+            スキーマのフィンガープリント
+        """
+        if self._schema_fingerprint is None:
+            self._schema_fingerprint = hashlib.blake2b(_signature_bytes(self.schema), digest_size=16).hexdigest()
+        return self._schema_fingerprint
+    
+    def _get_schema_info_cache_key(self, kind: str, target_endpoint: Endpoint) -> Optional[str]:
         """
-        ハイブリッド検索を実行する（ベクトル検索 + 依存関係ベース検索）
+        関連スキーマ情報のキャッシュキーを生成する
+        
+        サービス、スキーマの内容、エンドポイントの内容が同じであれば同じキーになります。
+        キーを生成できない場合はキャッシュを使わずに処理を続けられるよう、例外を送出せずにNoneを返します。
         
         Args:
+            kind: キャッシュする情報の種類
             target_endpoint: ターゲットとなるエンドポイント
             
         Returns:
-            統合された検索結果のリスト
+            キャッシュキー（生成できない場合はNone）
+        """
+        try:
+            signature = _signature_bytes({
+                "kind": kind,
+                "generator": type(self).__name__,
+                "service_id": self.service_id,
+                "schema": self._get_schema_fingerprint(),
+                "method": target_endpoint.method,
+                "path": target_endpoint.path,
+                "summary": target_endpoint.summary,
+                "description": target_endpoint.description,
+                "request_body": target_endpoint.request_body,
+                "request_headers": target_endpoint.request_headers,
+                "request_query_params": target_endpoint.request_query_params,
+                "responses": target_endpoint.responses,
+            })
+        except Exception as e:
+            logger.warning(f"Failed to build schema info cache key for endpoint {target_endpoint.method} {target_endpoint.path}, skipping cache: {e}")
+            return None
+        return hashlib.blake2b(signature, digest_size=16).hexdigest()
+    
+    def _perform_hybrid_search(self, target_endpoint: Endpoint, vector_results: Optional[List[Dict]] = None,
+                               dependency_results: Optional[List[Dict]] = None) -> List[Dict]:
         """
-        hybrid_results = []
+        ハイブリッド検索を実行する（ベクトル検索 + 依存関係ベース検索 + キーワード検索）
         
+        同じエンドポイントのベクトル検索・依存関係ベース検索の結果が既にある場合は、
+        それを渡すことで検索（クエリの埋め込みとベクトルDBへの問い合わせを含む）をやり直さずに統合します。
+        
+        Args:
+            target_endpoint: ターゲットとなるエンドポイント
+            vector_results: 実行済みのベクトル検索結果（オプション）
+            dependency_results: 実行済みの依存関係ベース検索結果（オプション）
+            
+        Returns:
+            統合された検索結果のリスト
+        """
         # 1. ベクトル検索の実行
-        vector_results = self._perform_vector_search(target_endpoint)
+        if vector_results is None:
+            vector_results = self._perform_vector_search(target_endpoint)
         
         # 2. 依存関係ベース検索の実行
-        dependency_results = self._perform_dependency_based_search(target_endpoint)
+        if dependency_results is None:
+            dependency_results = self._perform_dependency_based_search(target_endpoint)
+        
+        # 3. キーワード検索の実行
+        keyword_results = self._perform_keyword_search(target_endpoint)
         
-        # 3. 検索結果の統合とランキング
-        hybrid_results = self._merge_and_rank_results(vector_results, dependency_results, target_endpoint)
+        # 4. 検索結果の統合とランキング
+        hybrid_results = self._merge_and_rank_results(vector_results, dependency_results, target_endpoint, keyword_results)
+        
+        # 5. 再ランキングによるLLMに渡す結果の絞り込み
+        if self.rerank_enabled:
+            hybrid_results = self._rerank(self._build_enhanced_query(target_endpoint), hybrid_results)
         
         return hybrid_results
     
+    def _get_vectordb_manager(self):
+        """
+        ベクトルDBマネージャーを取得する
+
+        初回呼び出し時にのみ生成し、以降は同じインスタンスを返します。
+        エンドポイントごとにDB接続や埋め込みモデルを初期化し直すことを避けるためのものです。
+
+        Returns:
+            ベクトルDBマネージャー
+        """
+        if self._vectordb_manager is None:
+            with self._vectordb_manager_lock:
+                if self._vectordb_manager is None:
+                    self._vectordb_manager = VectorDBManagerFactory.create_default(service_id=self.service_id)
+        return self._vectordb_manager
+
     def _perform_vector_search(self, target_endpoint: Endpoint) -> List[Dict]:
         """
         従来のベクトル検索を実行する
@@ -450,13 +1346,13 @@ Return only a single valid JSON object matching the following format. **Do not i
         """
         try:
             # PGVectorManagerのインスタンスを取得
-            vectordb_manager = VectorDBManagerFactory.create_default(service_id=self.service_id)
+            vectordb_manager = self._get_vectordb_manager()
 
             # 拡張されたクエリの生成
             query = self._build_enhanced_query(target_endpoint)
 
-            # similarity_searchを実行
-            docs: List[Document] = vectordb_manager.similarity_search(query, k=5)
+            # similarity_searchを実行（初回は他のエンドポイントのクエリとまとめて検索する）
+            docs: List[Document] = self._search_vector_documents(vectordb_manager, query)
 
             vector_results = []
             for i, doc in enumerate(docs):
@@ -475,6 +1371,121 @@ Return only a single valid JSON object matching the following format. **Do not i
             logger.error(f"Error during vector search: {e}", exc_info=True)
             return []
     
+    def _search_vector_documents(self, vectordb_manager, query: str) -> List[Document]:
+        """
+        クエリに類似するドキュメントを検索する
+
+        初回の検索時に、関連スキーマ情報が未取得の全エンドポイントのクエリを similarity_search_batch で
+        まとめて検索し、クエリの埋め込みとDBへの問い合わせをエンドポイントごとに行わずに済むようにします。
+        まとめて検索できなかった場合は、クエリごとの検索にフォールバックします。
+
+        Args:
+            vectordb_manager: ベクトルDBマネージャー
+            query: 検索クエリ
+
+        Returns:
+            類似度の高いドキュメントのリスト
+        """
+        with self._vector_search_lock:
+            if not self._vector_search_prefetched:
+                self._vector_search_prefetched = True
+                queries = self._collect_vector_search_queries(query)
+                try:
+                    results = vectordb_manager.similarity_search_batch(queries, k=_VECTOR_SEARCH_K)
+                    if len(results) != len(queries):
+                        raise ValueError(f"expected {len(queries)} results, got {len(results)}")
+                    self._prefetched_vector_docs.update(zip(queries, results))
+                except Exception as e:
+                    logger.warning(f"Batch vector search failed, falling back to per-endpoint search: {e}")
+            docs = self._prefetched_vector_docs.pop(query, None)
+        
+        if docs is None:
+            docs = vectordb_manager.similarity_search(query, k=_VECTOR_SEARCH_K)
+        return docs
+
+    def _collect_vector_search_queries(self, query: str) -> List[str]:
+        """
+        まとめて検索するベクトル検索クエリを収集する
+
+        Args:
+            query: 最初に検索するクエリ
+
+        Returns:
+            指定したクエリと、関連スキーマ情報が未取得のエンドポイントのクエリ（重複なし）
+        """
+        queries = [query]
+        seen = {query}
+        for endpoint in self.endpoints:
+            cache_key = self._get_schema_info_cache_key("hybrid", endpoint)
+            if cache_key is not None and schema_info_cache.get(cache_key) is not None:
+                continue
+            endpoint_query = self._build_enhanced_query(endpoint)
+            if endpoint_query not in seen:
+                seen.add(endpoint_query)
+                queries.append(endpoint_query)
+        return queries
+
+    def _get_keyword_index(self) -> BM25Index:
+        """
+        スキーマの各エンドポイント情報を対象とするBM25インデックスを取得する
+
+        インデックスは初回呼び出し時にのみ構築し、全エンドポイントの検索で再利用します。
+        対象のテキストは依存関係ベース検索と同じエンドポイント情報のため、同じエンドポイントの結果は統合時にまとめられます。
+
+        Returns:
+            BM25インデックス
+        """
+        with self._keyword_index_lock:
+            if self._keyword_index is None:
+                operations = []
+                documents = []
+                for path, method in self._operations:
+                    endpoint_info = self._get_endpoint_info_from_schema(path, method)
+                    if endpoint_info:
+                        operations.append((path, method))
+                        documents.append(endpoint_info)
+                self._keyword_operations = operations
+                self._keyword_index = BM25Index(documents)
+            return self._keyword_index
+
+    def _perform_keyword_search(self, target_endpoint: Endpoint) -> List[Dict]:
+        """
+        BM25によるキーワード検索を実行する
+
+        パスやフィールド名などの識別子は埋め込みでは近くなりにくいため、
+        ベクトル検索と同じ拡張クエリの単語で完全一致に近い検索を行います。
+
+        Args:
+            target_endpoint: ターゲットとなるエンドポイント
+
+        Returns:
+            キーワード検索結果のリスト
+        """
+        if not self._operations:
+            return []
+        
+        try:
+            index = self._get_keyword_index()
+            query = self._build_enhanced_query(target_endpoint)
+            
+            keyword_results = []
+            for rank, (doc_id, score) in enumerate(index.search(query, _KEYWORD_SEARCH_K), start=1):
+                path, method = self._keyword_operations[doc_id]
+                keyword_results.append({
+                    "source": "keyword_search",
+                    "rank": rank,
+                    "score": score,
+                    "content": self._get_endpoint_info_from_schema(path, method),
+                    "metadata": {"path": path, "method": method.upper()},
+                    "search_type": "keyword"
+                })
+            
+            return keyword_results
+
+        except Exception as e:
+            logger.error(f"Error during keyword search: {e}", exc_info=True)
+            return []
+
     def _perform_dependency_based_search(self, target_endpoint: Endpoint) -> List[Dict]:
         """
         依存関係ベースの構造的検索を実行する
@@ -522,41 +1533,36 @@ Return only a single valid JSON object matching the following format. **Do not i
         results = []
         
         # ターゲットエンドポイントに関連するbody_reference依存関係を検索
-        for dep in self.dependencies:
-            if dep.get("type") == "body_reference":
-                target_info = dep.get("target", {})
-                source_info = dep.get("source", {})
+        for dep in self._get_target_dependencies(target_endpoint, "body_reference"):
+            target_info = dep.get("target", {})
+            source_info = dep.get("source", {})
+            
+            # 依存元エンドポイントの情報を取得
+            source_endpoint_info = self._get_endpoint_info_from_schema(
+                source_info.get("path"),
+                source_info.get("method")
+            )
+            
+            if source_endpoint_info:
+                confidence = dep.get("confidence", 0.8)
+                strength = dep.get("strength", "required")
                 
-                # ターゲットエンドポイントが依存関係のターゲットと一致する場合
-                if (target_info.get("path") == target_endpoint.path and
-                    target_info.get("method", "").lower() == target_endpoint.method.lower()):
-                    
-                    # 依存元エンドポイントの情報を取得
-                    source_endpoint_info = self._get_endpoint_info_from_schema(
-                        source_info.get("path"),
-                        source_info.get("method")
-                    )
-                    
-                    if source_endpoint_info:
-                        confidence = dep.get("confidence", 0.8)
-                        strength = dep.get("strength", "required")
-                        
-                        results.append({
-                            "source": "dependency_analysis",
-                            "rank": 1 if strength == "required" else 2,
-                            "score": confidence,
-                            "content": source_endpoint_info,
-                            "metadata": {
-                                "dependency_type": "body_reference",
-                                "field": target_info.get("field"),
-                                "strength": strength,
-                                "confidence": confidence,
-                                "source_path": source_info.get("path"),
-                                "source_method": source_info.get("method")
-                            },
-                            "search_type": "structural"
-                        })
-        
+                results.append({
+                    "source": "dependency_analysis",
+                    "rank": 1 if strength == "required" else 2,
+                    "score": confidence,
+                    "content": source_endpoint_info,
+                    "metadata": {
+                        "dependency_type": "body_reference",
+                        "field": target_info.get("field"),
+                        "strength": strength,
+                        "confidence": confidence,
+                        "source_path": source_info.get("path"),
+                        "source_method": source_info.get("method")
+                    },
+                    "search_type": "structural"
+                })
+
         return results
     
     def _search_path_parameter_dependencies(self, target_endpoint: Endpoint) -> List[Dict]:
@@ -571,36 +1577,31 @@ Return only a single valid JSON object matching the following format. **Do not i
         """
         results = []
         
-        for dep in self.dependencies:
-            if dep.get("type") == "path_parameter":
-                target_info = dep.get("target", {})
-                source_info = dep.get("source", {})
-                
-                # ターゲットエンドポイントが依存関係のターゲットと一致する場合
-                if (target_info.get("path") == target_endpoint.path and
-                    target_info.get("method", "").lower() == target_endpoint.method.lower()):
-                    
-                    # 依存元エンドポイントの情報を取得
-                    source_endpoint_info = self._get_endpoint_info_from_schema(
-                        source_info.get("path"),
-                        source_info.get("method")
-                    )
-                    
-                    if source_endpoint_info:
-                        results.append({
-                            "source": "dependency_analysis",
-                            "rank": 1,
-                            "score": 0.9,  # パスパラメータ依存関係は高信頼度
-                            "content": source_endpoint_info,
-                            "metadata": {
-                                "dependency_type": "path_parameter",
-                                "parameter": target_info.get("parameter"),
-                                "source_path": source_info.get("path"),
-                                "source_method": source_info.get("method")
-                            },
-                            "search_type": "structural"
-                        })
-        
+        for dep in self._get_target_dependencies(target_endpoint, "path_parameter"):
+            target_info = dep.get("target", {})
+            source_info = dep.get("source", {})
+            
+            # 依存元エンドポイントの情報を取得
+            source_endpoint_info = self._get_endpoint_info_from_schema(
+                source_info.get("path"),
+                source_info.get("method")
+            )
+            
+            if source_endpoint_info:
+                results.append({
+                    "source": "dependency_analysis",
+                    "rank": 1,
+                    "score": 0.9,  # パスパラメータ依存関係は高信頼度
+                    "content": source_endpoint_info,
+                    "metadata": {
+                        "dependency_type": "path_parameter",
+                        "parameter": target_info.get("parameter"),
+                        "source_path": source_info.get("path"),
+                        "source_method": source_info.get("method")
+                    },
+                    "search_type": "structural"
+                })
+
         return results
     
     def _search_resource_operation_dependencies(self, target_endpoint: Endpoint) -> List[Dict]:
@@ -615,35 +1616,30 @@ Return only a single valid JSON object matching the following format. **Do not i
         """
         results = []
         
-        for dep in self.dependencies:
-            if dep.get("type") == "resource_operation":
-                target_info = dep.get("target", {})
-                source_info = dep.get("source", {})
-                
-                # ターゲットエンドポイントが依存関係のターゲットと一致する場合
-                if (target_info.get("path") == target_endpoint.path and
-                    target_info.get("method", "").lower() == target_endpoint.method.lower()):
-                    
-                    # 依存元エンドポイントの情報を取得
-                    source_endpoint_info = self._get_endpoint_info_from_schema(
-                        source_info.get("path"),
-                        source_info.get("method")
-                    )
-                    
-                    if source_endpoint_info:
-                        results.append({
-                            "source": "dependency_analysis",
-                            "rank": 2,
-                            "score": 0.7,  # リソース操作依存関係は中程度の信頼度
-                            "content": source_endpoint_info,
-                            "metadata": {
-                                "dependency_type": "resource_operation",
-                                "source_path": source_info.get("path"),
-                                "source_method": source_info.get("method")
-                            },
-                            "search_type": "structural"
-                        })
-        
+        for dep in self._get_target_dependencies(target_endpoint, "resource_operation"):
+            target_info = dep.get("target", {})
+            source_info = dep.get("source", {})
+            
+            # 依存元エンドポイントの情報を取得
+            source_endpoint_info = self._get_endpoint_info_from_schema(
+                source_info.get("path"),
+                source_info.get("method")
+            )
+            
+            if source_endpoint_info:
+                results.append({
+                    "source": "dependency_analysis",
+                    "rank": 2,
+                    "score": 0.7,  # リソース操作依存関係は中程度の信頼度
+                    "content": source_endpoint_info,
+                    "metadata": {
+                        "dependency_type": "resource_operation",
+                        "source_path": source_info.get("path"),
+                        "source_method": source_info.get("method")
+                    },
+                    "search_type": "structural"
+                })
+
         return results
     
     def _get_endpoint_info_from_schema(self, path: str, method: str) -> Optional[str]:
@@ -660,35 +1656,47 @@ Return only a single valid JSON object matching the following format. **Do not i
         if not self.schema or not path or not method:
             return None
         
-        try:
-            paths = self.schema.get("paths", {})
-            if path not in paths:
-                return None
-            
-            path_item = paths[path]
-            method_lower = method.lower()
+        # 同じ依存元エンドポイントは複数の依存関係・ターゲットから参照されるため、結果を再利用する
+        cache_key = (path, method.lower())
+        if cache_key in self._endpoint_info_cache:
+            return self._endpoint_info_cache[cache_key]
+        
+        endpoint_info = self._format_endpoint_info_from_schema(path, method)
+        self._endpoint_info_cache[cache_key] = endpoint_info
+        return endpoint_info
+    
+    def _format_endpoint_info_from_schema(self, path: str, method: str) -> Optional[str]:
+        """
+        スキーマから指定されたエンドポイントの情報をテキストに整形する
+        
+        Args:
+            path: エンドポイントのパス
+            method: HTTPメソッド
             
-            if method_lower not in path_item:
+        Returns:
+            エンドポイント情報のテキスト表現（エンドポイントが存在しない場合はNone）
+        """
+        try:
+            operation = self._operations.get((path, method.lower()))
+            if operation is None:
                 return None
             
-            operation = path_item[method_lower]
-            
             # エンドポイント情報をフォーマット
-            endpoint_info = f"## {method.upper()} {path}\n"
+            parts = [f"## {method.upper()} {path}\n"]
             
             if "summary" in operation:
-                endpoint_info += f"**Summary:** {operation['summary']}\n"
+                parts.append(f"**Summary:** {operation['summary']}\n")
             
             if "description" in operation:
-                endpoint_info += f"**Description:** {operation['description']}\n"
+                parts.append(f"**Description:** {operation['description']}\n")
             
             if "requestBody" in operation:
-                endpoint_info += f"**Request Body:**\n```json\n{json.dumps(operation['requestBody'], indent=2)}\n```\n"
+                parts.append(f"**Request Body:**\n```json\n{self._dumps_schema_node(operation['requestBody'])}\n```\n")
             
             if "responses" in operation:
-                endpoint_info += f"**Responses:**\n```json\n{json.dumps(operation['responses'], indent=2)}\n```\n"
+                parts.append(f"**Responses:**\n```json\n{self._dumps_schema_node(operation['responses'])}\n```\n")
             
-            return endpoint_info
+            return "".join(parts)
             
         except Exception as e:
             logger.error(f"Error extracting endpoint info for {method} {path}: {e}", exc_info=True)
@@ -718,10 +1726,7 @@ Return only a single valid JSON object matching the following format. **Do not i
         # IDフィールドの抽出と追加
         if target_endpoint.request_body and self.dependency_analyzer:
             try:
-                id_fields = self.dependency_analyzer.extract_id_fields(target_endpoint.request_body)
-                for field_name in id_fields.keys():
-                    # IDフィールドからリソース名を抽出
-                    resource_name = self.dependency_analyzer._extract_resource_name(field_name)
+                for field_name, resource_name in self._get_id_field_resources(target_endpoint.request_body):
                     if resource_name:
                         query_parts.append(f"{resource_name} resource")
                         query_parts.append(f"{field_name} field")
@@ -729,22 +1734,56 @@ Return only a single valid JSON object matching the following format. **Do not i
                 logger.debug(f"Error extracting ID fields for query enhancement: {e}")
         
         # パスパラメータの抽出
-        path_params = re.findall(r'{([^}]+)}', target_endpoint.path)
+        path_params = _path_params(target_endpoint.path)
         for param in path_params:
             query_parts.append(f"{param} parameter")
         
+        # クエリパラメータ名とリクエストボディの最上位プロパティ名（スキーマ全体は埋め込まない）
+        if target_endpoint.request_query_params:
+            query_parts.append(f"params: {','.join(target_endpoint.request_query_params)}")
+        
+        body_keys = []
+        if isinstance(target_endpoint.request_body, dict):
+            for content in target_endpoint.request_body.get("content", {}).values():
+                properties = (content.get("schema") or {}).get("properties") or {}
+                body_keys.extend(key for key in properties if key not in body_keys)
+        if body_keys:
+            query_parts.append(f"body_keys: {','.join(body_keys)}")
+        
         # リソース名の抽出
-        path_parts = target_endpoint.path.strip("/").split("/")
-        if path_parts:
-            resource_name = path_parts[0]
-            query_parts.append(f"{resource_name} resource")
+        resource_name = _first_path_segment(target_endpoint.path)
+        query_parts.append(f"{resource_name} resource")
         
         # 操作タイプの追加
         operation_type = self._get_operation_type(target_endpoint.method)
         if operation_type:
             query_parts.append(operation_type)
         
-        return " ".join(query_parts)
+        return " ".join(query_parts)[:_MAX_QUERY_CHARS]
+    
+    def _get_id_field_resources(self, request_body: Dict) -> List[Tuple[str, Optional[str]]]:
+        """
+        リクエストボディのIDフィールドと、フィールド名から推定される関連リソース名を取得する
+        
+        検索クエリと埋め込み用テキストの両方で同じリクエストボディを解析するため、結果を再利用します。
+        
+        Args:
+            request_body: エンドポイントのリクエストボディ
+            
+        Returns:
+            (IDフィールド名, リソース名) のリスト（リソース名が推定できない場合はNone）
+        """
+        cached = self._id_field_resources_cache.get(id(request_body))
+        if cached is not None and cached[0] is request_body:
+            return cached[1]
+        
+        id_fields = self.dependency_analyzer.extract_id_fields(request_body)
+        field_resources = [
+            (field_name, self.dependency_analyzer._extract_resource_name(field_name))
+            for field_name in id_fields
+        ]
+        self._id_field_resources_cache[id(request_body)] = (request_body, field_resources)
+        return field_resources
     
     def _get_operation_type(self, method: str) -> str:
         """
@@ -756,70 +1795,76 @@ Return only a single valid JSON object matching the following format. **Do not i
         Returns:
             操作タイプの説明
         """
-        method_mapping = {
-            "GET": "retrieve read fetch",
-            "POST": "create add insert",
-            "PUT": "update modify replace",
-            "PATCH": "update modify partial",
-            "DELETE": "remove delete destroy"
-        }
-        
-        return method_mapping.get(method.upper(), "")
+        return _OPERATION_TYPE_KEYWORDS.get(method.upper(), "")
     
-    def _merge_and_rank_results(self, vector_results: List[Dict], dependency_results: List[Dict], target_endpoint: Endpoint) -> List[Dict]:
+    def _merge_and_rank_results(self, vector_results: List[Dict], dependency_results: List[Dict], target_endpoint: Endpoint,
+                                keyword_results: Optional[List[Dict]] = None) -> List[Dict]:
         """
-        ベクトル検索結果と依存関係ベース検索結果を統合し、ランキングする
+        ベクトル検索・依存関係ベース検索・キーワード検索の結果を Reciprocal Rank Fusion で統合し、ランキングする
+        
+        検索方法ごとにスコアの尺度が異なるため、スコアそのものではなく各結果リスト内の順位から
+        weight / (k + 順位) を計算し、同じ内容の結果については合算します。
+        入力の検索結果は変更せず、final_score を付与したコピーを返します。
+        再ランキングが有効な場合は、再ランキングの対象として rerank_candidates 件まで返します。
         
         Args:
             vector_results: ベクトル検索結果
             dependency_results: 依存関係ベース検索結果
             target_endpoint: ターゲットエンドポイント
+            keyword_results: キーワード検索結果（オプション）
             
         Returns:
             統合・ランキングされた検索結果
         """
-        all_results = []
-        
-        # 依存関係ベース検索結果に重み付けを適用（優先度を高く）
-        for result in dependency_results:
-            result["final_score"] = result["score"] * 1.5  # 依存関係ベースの結果を優遇
-            all_results.append(result)
-        
-        # ベクトル検索結果を追加
-        for result in vector_results:
-            result["final_score"] = result["score"] * 1.0
-            all_results.append(result)
-        
-        # 重複除去（同じソースからの結果）
-        unique_results = self._remove_duplicate_results(all_results)
-        
-        # 最終スコアでソート
-        unique_results.sort(key=lambda x: x["final_score"], reverse=True)
+        # 依存関係ベース検索結果は依存関係の種類ごとに並んでいるため、スコア順に並べ替えて順位を決める
+        ranked_lists = (
+            (sorted(dependency_results, key=lambda x: x["score"], reverse=True), self.dependency_search_weight),
+            (vector_results, self.vector_search_weight),
+            (keyword_results or [], self.keyword_search_weight),
+        )
+        
+        fused_results: Dict[bytes, Dict] = {}
+        for results, weight in ranked_lists:
+            for rank, result in enumerate(results, start=1):
+                # 内容全体が同じ結果を1件にまとめる（先頭が共通するだけの別のスキーマ情報は区別する）
+                content_hash = hashlib.blake2b(result["content"].encode("utf-8"), digest_size=16).digest()
+                rrf_score = weight / (_RRF_K + rank)
+                fused = fused_results.get(content_hash)
+                if fused is None:
+                    fused_results[content_hash] = {**result, "final_score": rrf_score}
+                else:
+                    fused["final_score"] += rrf_score
         
-        # 最大10件に制限
-        return unique_results[:10]
+        # 上位の結果だけが必要なため全体はソートしない（同点の場合は統合前の順序を保つ）
+        limit = self.rerank_candidates if self.rerank_enabled else self.max_results
+        return heapq.nlargest(limit, fused_results.values(), key=itemgetter("final_score"))
     
-    def _remove_duplicate_results(self, results: List[Dict]) -> List[Dict]:
+    def _rerank(self, query: str, results: List[Dict]) -> List[Dict]:
         """
-        重複する検索結果を除去する
+        統合済みの検索結果をクロスエンコーダーで再ランキングし、上位の結果に絞り込む
+        
+        クエリと各結果の内容の組をまとめて採点し、rerank_score を付与したコピーを返します。
+        再ランキングモデルを利用できない場合は、統合時のランキングの上位 max_results 件を返します。
         
         Args:
-            results: 検索結果のリスト
+            query: 検索クエリ
+            results: 統合・ランキングされた検索結果
             
         Returns:
-            重複除去後の検索結果
+            再ランキングされた上位 rerank_top_k 件の検索結果
         """
-        seen_content = set()
-        unique_results = []
+        reranker = get_default_reranker()
+        if reranker is None:
+            return results[:self.max_results]
         
-        for result in results:
-            content_hash = hash(result["content"][:200])  # 最初の200文字でハッシュ化
-            
-            if content_hash not in seen_content:
-                seen_content.add(content_hash)
-                unique_results.append(result)
+        try:
+            scores = reranker.score([(query, result["content"]) for result in results])
+        except Exception as e:
+            logger.warning(f"Error during reranking: {e}. Using fused ranking instead.")
+            return results[:self.max_results]
         
-        return unique_results
+        reranked = [{**result, "rerank_score": score} for result, score in zip(results, scores)]
+        return heapq.nlargest(self.rerank_top_k, reranked, key=itemgetter("rerank_score"))
     
     def _format_hybrid_search_results(self, target_endpoint: Endpoint, hybrid_results: List[Dict]) -> str:
         """
@@ -849,7 +1894,7 @@ Return only a single valid JSON object matching the following format. **Do not i
             source_type = result.get("search_type", "unknown")
             score = result.get("final_score", 0.0)
             
-            formatted_parts.append(f"### Source {i+1}: {source_type.title()} Search (Score: {score:.2f})")
+            formatted_parts.append(f"### Source {i+1}: {source_type.title()} Search (Score: {score:.4f})")
             
             # メタデータ情報の追加
             metadata = result.get("metadata", {})
@@ -863,7 +1908,7 @@ Return only a single valid JSON object matching the following format. **Do not i
                 if metadata.get("confidence"):
                     formatted_parts.append(f"**Confidence:** {metadata['confidence']:.2f}")
             
-            formatted_parts.append(f"```\n{result['content']}\n```\n")
+            formatted_parts.append(f"```\n{_truncate_to_token_budget(result['content'], _MAX_TOKENS_PER_SEARCH_RESULT)}\n```\n")
         
         return "\n".join(formatted_parts)
     
@@ -880,13 +1925,7 @@ Return only a single valid JSON object matching the following format. **Do not i
         if not self.dependencies:
             return ""
         
-        relevant_deps = []
-        
-        for dep in self.dependencies:
-            target_info = dep.get("target", {})
-            if (target_info.get("path") == target_endpoint.path and
-                target_info.get("method", "").lower() == target_endpoint.method.lower()):
-                relevant_deps.append(dep)
+        relevant_deps = self._get_target_dependencies(target_endpoint)
         
         if not relevant_deps:
             return ""
@@ -934,70 +1973,81 @@ Return only a single valid JSON object matching the following format. **Do not i
         if not self.schema:
             return "No schema available for direct extraction."
         
-        relevant_info_parts = []
-        endpoint_model = EndpointSchema.from_orm(target_endpoint)
+        cache_key = self._get_schema_info_cache_key("direct", target_endpoint)
+        cached_info = schema_info_cache.get(cache_key) if cache_key is not None else None
+        if cached_info is not None:
+            return cached_info
+        
+        buffer = io.StringIO()
+        # 同じコンポーネントを複数箇所（リクエスト・各ステータスのレスポンスなど）から参照していても本文は1回だけ出力する
+        seen_refs: Set[str] = set()
+        path = target_endpoint.path
+        request_body = self._get_endpoint_json_field(target_endpoint, "request_body")
+        responses = self._get_endpoint_json_field(target_endpoint, "responses")
+        
+        def write_section(header: str, node=None, ref_path: Optional[str] = None) -> None:
+            if buffer.tell():
+                buffer.write("\n")
+            buffer.write(header)
+            if ref_path is not None and ref_path in seen_refs:
+                buffer.write("\nSame schema as shown above.\n")
+                return
+            if ref_path is not None:
+                seen_refs.add(ref_path)
+            buffer.write("\n```json\n")
+            buffer.write(self._dumps_schema_node(node))
+            buffer.write("\n```\n")
         
         try:
-            if endpoint_model.path in self.schema.get("paths", {}):
-                path_item = self.schema["paths"][endpoint_model.path]
-                relevant_info_parts.append(f"## Path: {endpoint_model.path}")
-                relevant_info_parts.append(f"```json\n{json.dumps(path_item, indent=2)}\n```\n")
+            path_item = self._paths.get(path)
+            if path_item is not None:
+                write_section(f"## Path: {path}", path_item)
             
-            if endpoint_model.request_body:
-                for content_type, content in endpoint_model.request_body.get("content", {}).items():
+            if request_body:
+                for content_type, content in request_body.get("content", {}).items():
                     if "schema" in content:
                         schema = content["schema"]
                         if "$ref" in schema:
                             ref_path = schema["$ref"]
-                            if ref_path.startswith("#/"):
-                                ref_parts = ref_path.lstrip("#/").split("/")
-                                ref_value = self.schema
-                                for part in ref_parts:
-                                    if part in ref_value:
-                                        ref_value = ref_value[part]
-                                
-                                relevant_info_parts.append(f"## Request Body Schema Reference: {ref_path}")
-                                relevant_info_parts.append(f"```json\n{json.dumps(ref_value, indent=2)}\n```\n")
-            
-            if endpoint_model.responses:
-                for status, response in endpoint_model.responses.items():
+                            ref_value = self._resolve_ref(ref_path)
+                            if ref_value is not None:
+                                write_section(f"## Request Body Schema Reference: {ref_path}", ref_value, ref_path)
+            
+            if responses:
+                for status, response in responses.items():
                     if "content" in response:
                         for content_type, content in response["content"].items():
                             if "schema" in content:
                                 schema = content["schema"]
                                 if "$ref" in schema:
                                     ref_path = schema["$ref"]
-                                    if ref_path.startswith("#/"):
-                                        ref_parts = ref_path.lstrip("#/").split("/")
-                                        ref_value = self.schema
-                                        for part in ref_parts:
-                                            if part in ref_value:
-                                                ref_value = ref_value[part]
-                                        
-                                        relevant_info_parts.append(f"## Response Schema Reference for status {status}: {ref_path}")
-                                        relevant_info_parts.append(f"```json\n{json.dumps(ref_value, indent=2)}\n```\n")
-            
-            if "components" in self.schema and "schemas" in self.schema["components"]:
-                path_parts = endpoint_model.path.strip("/").split("/")
-                resource_name = path_parts[0] if path_parts else ""
-                
-                for schema_name, schema in self.schema["components"]["schemas"].items():
-                    if resource_name.lower() in schema_name.lower():
-                        relevant_info_parts.append(f"## Related Component Schema: {schema_name}")
-                        relevant_info_parts.append(f"```json\n{json.dumps(schema, indent=2)}\n```\n")
+                                    ref_value = self._resolve_ref(ref_path)
+                                    if ref_value is not None:
+                                        write_section(f"## Response Schema Reference for status {status}: {ref_path}", ref_value, ref_path)
             
-            relevant_info = "\n".join(relevant_info_parts)
+            if self._components_schemas:
+                for schema_name, schema in self._get_related_schemas(_first_path_segment(path)):
+                    ref_path = f"#/components/schemas/{schema_name}"
+                    if ref_path in seen_refs:
+                        continue
+                    seen_refs.add(ref_path)
+                    write_section(f"## Related Component Schema: {schema_name}", schema)
+            
+            relevant_info = buffer.getvalue()
             
             if not relevant_info.strip():
                 return "No relevant schema information found through direct extraction."
             
-            return f"""
-# Relevant Schema Information for {endpoint_model.method.upper()} {endpoint_model.path} (Direct Extraction)
+            schema_info = f"""
+# Relevant Schema Information for {target_endpoint.method.upper()} {path} (Direct Extraction)
 
 {relevant_info}
 """
+            if cache_key is not None:
+                schema_info_cache.set(cache_key, schema_info)
+            return schema_info
         except Exception as e:
-            logger.error(f"Error during direct schema extraction for endpoint {endpoint_model.method} {endpoint_model.path}: {e}", exc_info=True)
+            logger.error(f"Error during direct schema extraction for endpoint {target_endpoint.method} {path}: {e}", exc_info=True)
             return "Error during direct schema extraction."
             
     def _generate_fallback_chain(self, target_endpoint: Endpoint) -> Dict:
@@ -1017,20 +2067,15 @@ Return only a single valid JSON object matching the following format. **Do not i
         
         steps = []
         
-        path_params = []
-        param_pattern = r'\{([^}]+)\}'
-        import re
-        path_params = re.findall(param_pattern, path)
+        path_params = _path_params(path)
+        
+        # パスの先頭のセグメントを単数形にしたものを、パラメータ名から判別できない場合のリソース名とする
+        path_resource_name = _first_path_segment(path)
+        if path_resource_name.endswith('s'):
+            path_resource_name = path_resource_name[:-1]
         
         for param in path_params:
-            param_type = "id"
-            resource_name = "resource"
-            
-            path_parts = path.strip('/').split('/')
-            if len(path_parts) > 0:
-                resource_name = path_parts[0]
-                if resource_name.endswith('s'):
-                    resource_name = resource_name[:-1]
+            resource_name = path_resource_name
             
             if param.endswith('_id') or param == 'id':
                 param_parts = param.split('_')
@@ -1056,7 +2101,7 @@ Return only a single valid JSON object matching the following format. **Do not i
             "request": {}
         }
         
-        if method in ["POST", "PUT", "PATCH"]:
+        if method in _BODY_METHODS:
             if target_endpoint.request_body and "content" in target_endpoint.request_body:
                 for content_type, content in target_endpoint.request_body["content"].items():
                     if "application/json" in content_type and "schema" in content:
@@ -1066,7 +2111,7 @@ Return only a single valid JSON object matching the following format. **Do not i
                         break
             else:
                 target_step["request"]["headers"] = {"Content-Type": "application/json"}
-                target_step["request"]["body"] = {"name": "Test name", "description": "Test description"}
+                target_step["request"]["body"] = dict(_DEFAULT_SAMPLE_BODY)
         
         steps.append(target_step)
         
@@ -1081,39 +2126,82 @@ Return only a single valid JSON object matching the following format. **Do not i
         """
         スキーマからサンプルリクエストボディを生成する
         
+        スキーマは初回のみ走査してテンプレートに変換し、以降はテンプレートから生成します。
+        
         Args:
             schema: JSONスキーマ
             
         Returns:
             サンプルリクエストボディ
         """
-        sample_body = {}
-        
-        if "$ref" in schema:
-            return {"name": "Test name", "description": "Test description"}
+        template = self._get_sample_body_template(schema)
+        sample_body = template.base.copy()
+        for name, factory in template.containers:
+            sample_body[name] = factory()
+        return sample_body
+    
+    def _get_sample_body_template(self, schema: Dict, seen_refs: frozenset = frozenset()) -> _SampleBodyTemplate:
+        """
+        スキーマに対応するサンプルリクエストボディのテンプレートを取得する（初回のみ変換）
         
-        if "properties" in schema:
-            for prop_name, prop_schema in schema["properties"].items():
-                prop_type = prop_schema.get("type", "string")
-                
-                if prop_type == "string":
-                    sample_body[prop_name] = f"Test {prop_name}"
-                elif prop_type == "integer" or prop_type == "number":
-                    sample_body[prop_name] = 1
-                elif prop_type == "boolean":
-                    sample_body[prop_name] = True
-                elif prop_type == "array":
-                    sample_body[prop_name] = []
-                elif prop_type == "object":
-                    sample_body[prop_name] = {}
-        
-        if not sample_body:
-            sample_body = {"name": "Test name", "description": "Test description"}
+        Args:
+            schema: JSONスキーマ
+            seen_refs: 解決中の $ref（循環参照の検出用）
+            
+        Returns:
+            サンプルリクエストボディのテンプレート
+        """
+        cached = self._sample_body_templates.get(id(schema))
+        if cached is None or cached[0] is not schema:
+            cached = (schema, self._compile_sample_body_template(schema, seen_refs))
+            self._sample_body_templates.set(id(schema), cached)
+        return cached[1]
+    
+    def _compile_sample_body_template(self, schema: Dict, seen_refs: frozenset = frozenset()) -> _SampleBodyTemplate:
+        """
+        スキーマを走査してサンプルリクエストボディのテンプレートに変換する
         
-        return sample_body
+        Args:
+            schema: JSONスキーマ
+            seen_refs: 解決中の $ref（循環参照の検出用）
+            
+        Returns:
+            サンプルリクエストボディのテンプレート
+        """
+        # $ref は参照先のスキーマのテンプレートを使う（参照先ごとに一度だけ変換し、参照元の間で共有する）
+        # 循環参照や解決できない参照は既定のボディにする
+        if "$ref" in schema:
+            ref_path = schema["$ref"]
+            target = self._resolve_ref(ref_path) if ref_path not in seen_refs else None
+            if not isinstance(target, dict):
+                return _DEFAULT_SAMPLE_BODY_TEMPLATE
+            return self._get_sample_body_template(target, seen_refs | {ref_path})
+        
+        if "properties" not in schema:
+            return _DEFAULT_SAMPLE_BODY_TEMPLATE
+        
+        base = {}
+        containers = []
+        for prop_name, prop_schema in schema["properties"].items():
+            prop_type = prop_schema.get("type", "string")
+            # 未対応の型や型の配列のプロパティは含めない
+            if not isinstance(prop_type, str):
+                continue
+            if prop_type in _SAMPLE_VALUES:
+                base[prop_name] = _SAMPLE_VALUES[prop_type](prop_name)
+            elif prop_type in _SAMPLE_CONTAINER_FACTORIES:
+                # キーの順序を保つため仮の値を入れておき、生成時に新しいコンテナで上書きする
+                base[prop_name] = None
+                containers.append((prop_name, _SAMPLE_CONTAINER_FACTORIES[prop_type]))
+        
+        if not base:
+            return _DEFAULT_SAMPLE_BODY_TEMPLATE
+        
+        return _SampleBodyTemplate(base, tuple(containers))
     
     def _build_dependency_aware_context(self, target_endpoint: Endpoint, target_endpoint_info: str,
-                                      relevant_schema_info: str, error_types_instruction: str) -> Dict:
+                                      relevant_schema_info: str, error_types_instruction: str,
+                                      variables: Optional[Set[str]] = None) -> Dict:
         """
         依存関係対応プロンプト用のコンテキストを構築する
         
@@ -1122,26 +2210,31 @@ Return only a single valid JSON object matching the following format. **Do not i
             target_endpoint_info: ターゲットエンドポイント情報
             relevant_schema_info: 関連スキーマ情報
             error_types_instruction: エラータイプ指示
+            variables: テンプレートが参照する変数名（指定した場合は参照されない項目の構築を省略）
             
         Returns:
             依存関係対応プロンプト用のコンテキスト
         """
         # 依存関係グラフの構築
-        dependency_graph = self._build_dependency_graph_text(target_endpoint)
+        dependency_graph = ""
+        if variables is None or "dependency_graph" in variables:
+            dependency_graph = self._build_dependency_graph_text(target_endpoint)
         
-        # 実行順序の決定
-        execution_order = self._determine_execution_order(target_endpoint)
+        # 実行順序の決定（標準のテンプレートでは参照されない）
+        execution_order = ""
+        if variables is None or "execution_order" in variables:
+            execution_order = self._determine_execution_order(target_endpoint)
         
         # ターゲットエンドポイント情報の構築
-        target_endpoint_text = f"{target_endpoint.method.upper()} {target_endpoint.path}"
+        target_endpoint_lines = [f"{target_endpoint.method.upper()} {target_endpoint.path}"]
         if target_endpoint.summary:
-            target_endpoint_text += f"\nSummary: {target_endpoint.summary}"
+            target_endpoint_lines.append(f"Summary: {target_endpoint.summary}")
         if target_endpoint.description:
-            target_endpoint_text += f"\nDescription: {target_endpoint.description}"
+            target_endpoint_lines.append(f"Description: {target_endpoint.description}")
         
         return {
             "dependency_graph": dependency_graph,
-            "target_endpoint": target_endpoint_text,
+            "target_endpoint": "\n".join(target_endpoint_lines),
             "relevant_schema_info": relevant_schema_info,
             "execution_order": execution_order,
             "error_types_instruction": error_types_instruction
@@ -1160,12 +2253,7 @@ Return only a single valid JSON object matching the following format. **Do not i
         if not self.dependencies:
             return "No dependencies detected."
         
-        relevant_deps = []
-        for dep in self.dependencies:
-            target_info = dep.get("target", {})
-            if (target_info.get("path") == target_endpoint.path and
-                target_info.get("method", "").lower() == target_endpoint.method.lower()):
-                relevant_deps.append(dep)
+        relevant_deps = self._get_target_dependencies(target_endpoint)
         
         if not relevant_deps:
             return "No dependencies detected for this endpoint."
@@ -1269,45 +2357,47 @@ Return only a single valid JSON object matching the following format. **Do not i
         """
         TestStepデータのフィールドを正規化し、Pydanticシリアライゼーション警告を回避する
         
+        変換が必要なフィールドがない場合は、コピーせずに入力をそのまま返します。
+        
         Args:
             step_data: TestStepデータ
             
         Returns:
             正規化されたTestStepデータ
         """
-        import json
-        
-        normalized_step = step_data.copy()
-        
-        # 文字列として格納されたJSONデータを辞書に変換
-        json_fields = ["request_headers", "request_body", "request_params", "extract_rules"]
-        
-        for field in json_fields:
-            if field in normalized_step:
-                value = normalized_step[field]
-                
-                # 文字列の場合はJSONとしてパース
-                if isinstance(value, str):
+        normalized_step = step_data
+        
+        for field in _STEP_JSON_FIELDS:
+            if field not in step_data:
+                continue
+            value = step_data[field]
+            
+            # 既に辞書の場合はそのまま
+            if isinstance(value, dict):
+                continue
+            # 文字列の場合はJSONとしてパース
+            if isinstance(value, str):
+                stripped = value.strip()
+                if stripped in _EMPTY_JSON_STRINGS:
+                    normalized_value = {}
+                else:
                     try:
-                        if value.strip() in ["None", "null", ""]:
-                            normalized_step[field] = {}
-                        elif value.strip() == "{}":
-                            normalized_step[field] = {}
-                        else:
-                            parsed_value = json.loads(value)
-                            normalized_step[field] = parsed_value if parsed_value is not None else {}
-                    except json.JSONDecodeError:
+                        parsed_value = orjson.loads(stripped)
+                    except orjson.JSONDecodeError:
                         logger.warning(f"Failed to parse {field} as JSON: {value}, using empty dict")
-                        normalized_step[field] = {}
-                # Noneの場合は空辞書に変換
-                elif value is None:
-                    normalized_step[field] = {}
-                # 既に辞書の場合はそのまま
-                elif isinstance(value, dict):
-                    normalized_step[field] = value
-                else:
-                    logger.warning(f"Unexpected type for {field}: {type(value)}, using empty dict")
-                    normalized_step[field] = {}
+                        parsed_value = None
+                    normalized_value = parsed_value if parsed_value is not None else {}
+            # Noneの場合は空辞書に変換
+            elif value is None:
+                normalized_value = {}
+            else:
+                logger.warning(f"Unexpected type for {field}: {type(value)}, using empty dict")
+                normalized_value = {}
+            
+            # 最初に変換が必要になったときだけコピーする
+            if normalized_step is step_data:
+                normalized_step = dict(step_data)
+            normalized_step[field] = normalized_value
         
         return normalized_step
     
@@ -1325,12 +2415,7 @@ Return only a single valid JSON object matching the following format. **Do not i
             return f"1. {target_endpoint.method.upper()} {target_endpoint.path} (target endpoint)"
         
         # 依存関係の解析
-        relevant_deps = []
-        for dep in self.dependencies:
-            target_info = dep.get("target", {})
-            if (target_info.get("path") == target_endpoint.path and
-                target_info.get("method", "").lower() == target_endpoint.method.lower()):
-                relevant_deps.append(dep)
+        relevant_deps = self._get_target_dependencies(target_endpoint)
         
         if not relevant_deps:
             return f"1. {target_endpoint.method.upper()} {target_endpoint.path} (target endpoint)"
@@ -1385,7 +2470,8 @@ class EnhancedEndpointChainGenerator(EndpointChainGenerator):
     より精度の高い関連エンドポイント情報の取得を実現します。
     """
     
-    def __init__(self, service_id: int, endpoints: List[Endpoint], schema: Dict = None, error_types: Optional[List[str]] = None):
+    def __init__(self, service_id: int, endpoints: List[Endpoint], schema: Dict = None, error_types: Optional[List[str]] = None,
+                 sample_body_cache_size: int = 1024):
         """
         拡張されたエンドポイントチェーンジェネレータの初期化
         
@@ -1394,14 +2480,12 @@ class EnhancedEndpointChainGenerator(EndpointChainGenerator):
             endpoints: 選択されたエンドポイントのリスト
             schema: OpenAPIスキーマ（オプション）
             error_types: エラータイプのリスト（オプション）
+            sample_body_cache_size: サンプルリクエストボディのテンプレートを保持する最大スキーマ数
         """
-        super().__init__(service_id, endpoints, schema, error_types)
+        super().__init__(service_id, endpoints, schema, error_types, sample_body_cache_size)
         
         # ハイブリッド検索の設定
         self.hybrid_search_enabled = True
-        self.vector_search_weight = 1.0
-        self.dependency_search_weight = 1.5
-        self.max_results = 10
         
         logger.info(f"EnhancedEndpointChainGenerator initialized with {len(self.dependencies)} dependencies")
     
@@ -1429,44 +2513,35 @@ class EnhancedEndpointChainGenerator(EndpointChainGenerator):
         # スキーマフィールド情報の追加
         if endpoint.request_body and self.dependency_analyzer:
             try:
-                id_fields = self.dependency_analyzer.extract_id_fields(endpoint.request_body)
-                for field_name, field_info in id_fields.items():
+                for field_name, resource_name in self._get_id_field_resources(endpoint.request_body):
                     embedding_parts.append(f"ID Field: {field_name}")
                     
-                    # リソース名の抽出
-                    resource_name = self.dependency_analyzer._extract_resource_name(field_name)
                     if resource_name:
                         embedding_parts.append(f"Related Resource: {resource_name}")
             except Exception as e:
                 logger.debug(f"Error extracting ID fields for embedding: {e}")
         
         # 依存関係情報の追加
-        for dep in self.dependencies:
+        for dep in self._get_target_dependencies(endpoint):
             target_info = dep.get("target", {})
             source_info = dep.get("source", {})
             
-            if (target_info.get("path") == endpoint.path and
-                target_info.get("method", "").lower() == endpoint.method.lower()):
-                
-                dep_type = dep.get("type", "unknown")
-                embedding_parts.append(f"Dependency: {dep_type}")
-                embedding_parts.append(f"Depends on: {source_info.get('method', '').upper()} {source_info.get('path', '')}")
-                
-                if dep_type == "body_reference":
-                    field = target_info.get("field", "")
-                    if field:
-                        embedding_parts.append(f"Required Field: {field}")
+            dep_type = dep.get("type", "unknown")
+            embedding_parts.append(f"Dependency: {dep_type}")
+            embedding_parts.append(f"Depends on: {source_info.get('method', '').upper()} {source_info.get('path', '')}")
+            
+            if dep_type == "body_reference":
+                field = target_info.get("field", "")
+                if field:
+                    embedding_parts.append(f"Required Field: {field}")
         
         # パスパラメータ情報
-        path_params = re.findall(r'{([^}]+)}', endpoint.path)
+        path_params = _path_params(endpoint.path)
         for param in path_params:
             embedding_parts.append(f"Path Parameter: {param}")
         
         # リソース情報
-        path_parts = endpoint.path.strip("/").split("/")
-        if path_parts:
-            resource_name = path_parts[0]
-            embedding_parts.append(f"Resource: {resource_name}")
+        embedding_parts.append(f"Resource: {_first_path_segment(endpoint.path)}")
         
         return " | ".join(embedding_parts)
     
@@ -1520,12 +2595,7 @@ class EnhancedEndpointChainGenerator(EndpointChainGenerator):
             return chain_info
         
         # ターゲットエンドポイントに関連する依存関係を抽出
-        relevant_deps = []
-        for dep in self.dependencies:
-            target_info = dep.get("target", {})
-            if (target_info.get("path") == target_endpoint.path and
-                target_info.get("method", "").lower() == target_endpoint.method.lower()):
-                relevant_deps.append(dep)
+        relevant_deps = self._get_target_dependencies(target_endpoint)
         
         if not relevant_deps:
             chain_info["warnings"].append("No dependencies found for this endpoint")
@@ -1552,10 +2622,11 @@ class EnhancedEndpointChainGenerator(EndpointChainGenerator):
         execution_order = self._build_execution_order_list(target_endpoint, relevant_deps)
         chain_info["execution_order"] = execution_order
         
-        # 循環参照のチェック
+        # 循環参照のチェック（循環の検出は依存関係全体に対して一度だけ行う）
         if self.dependency_analyzer:
-            circular_deps = self.dependency_analyzer.check_circular_dependencies(self.dependencies)
-            if len(circular_deps) != len(self.dependencies):
+            if self._circular_endpoints is None:
+                self._circular_endpoints = self.dependency_analyzer.find_circular_endpoints(self._dependencies)
+            if (target_endpoint.path, target_endpoint.method.lower()) in self._circular_endpoints:
                 chain_info["warnings"].append("Circular dependencies detected")
         
         return chain_info
@@ -1669,14 +2740,12 @@ class EnhancedEndpointChainGenerator(EndpointChainGenerator):
             dependency_results = self._perform_dependency_based_search(target_endpoint)
             metrics["dependency_search_results"] = len(dependency_results)
             
-            # ハイブリッド検索結果の取得
-            hybrid_results = self._perform_hybrid_search(target_endpoint)
+            # ハイブリッド検索結果の取得（上の検索結果を再利用し、ベクトル検索をやり直さない）
+            hybrid_results = self._perform_hybrid_search(target_endpoint, vector_results, dependency_results)
             metrics["hybrid_search_results"] = len(hybrid_results)
             
             # 依存関係カバレッジの計算
-            relevant_deps = [dep for dep in self.dependencies
-                           if (dep.get("target", {}).get("path") == target_endpoint.path and
-                               dep.get("target", {}).get("method", "").lower() == target_endpoint.method.lower())]
+            relevant_deps = self._get_target_dependencies(target_endpoint)
             
             if relevant_deps:
                 covered_deps = len([dep for dep in relevant_deps if dep.get("confidence", 0.0) > 0.5])
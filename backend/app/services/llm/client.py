@@ -7,8 +7,12 @@ LLMクライアントの抽象化モジュール
 
 import abc
 import json
+import orjson
 import asyncio
-from typing import Any, Dict, List, Optional, TypeVar
+import functools
+import threading
+import regex
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
 from enum import Enum
 
 from app.config import config
@@ -23,6 +27,10 @@ from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 T = TypeVar('T')
 LLMClientType = TypeVar('LLMClientType', bound='LLMClient')
 
+# LLMレスポンスからJSONを抽出する正規表現（再帰パターンで入れ子の波括弧に対応）
+_JSON_CODE_BLOCK_RE = regex.compile(r"```json\s*(\{(?:[^{}]|(?R))*\})\s*```", regex.DOTALL)
+_JSON_OBJECT_RE = regex.compile(r"(\{(?:[^{}]|(?R))*\})", regex.DOTALL)
+
 class LLMException(CaseforgeException):
     """LLM呼び出し関連の例外"""
     def __init__(
@@ -233,73 +241,111 @@ class LLMClient(abc.ABC):
 
         Args:
             messages: List of prompt messages.
-            **kwargs: Additional parameters.
+            **kwargs: Additional parameters. `response_schema` constrains the output
+                to the given JSON schema on providers that support it.
 
         Returns:
             Parsed JSON dictionary.
         """
         response = self.call(messages, **kwargs)
+        return self._parse_json_response(response)
+
+    async def acall_with_json_response(self, messages: List[Message], **kwargs) -> Dict[str, Any]:
+        """
+        LLMを非同期で呼び出し、JSONレスポンスを取得する
+        
+        Args:
+            messages: メッセージのリスト
+            **kwargs: その他のパラメータ（response_schema を指定すると、対応するプロバイダーでは
+                出力をそのJSONスキーマに制約する）
+            
+        Returns:
+            JSONとしてパースされたLLMレスポンス
+        """
+        response = await self.acall(messages, **kwargs)
+        return self._parse_json_response(response)
+
+    def _parse_json_response(self, response: str) -> Dict[str, Any]:
+        """
+        LLMレスポンスからJSONを抽出してパースする
+
+        レスポンス全体がJSONオブジェクトであればそのままパースし、そうでなければ
+        ```json``` コードブロック、最上位の波括弧、レスポンス全体の順に試行します。
+        同期・非同期の呼び出しで同じ抽出ロジックを共有するためのヘルパーです。
+
+        Args:
+            response: LLMからのレスポンス
+
+        Returns:
+            JSONとしてパースされたLLMレスポンス
+
+        Raises:
+            LLMResponseFormatException: JSONとしてパースできなかった場合
+        """
+        # JSONモードなどでレスポンス全体がJSONオブジェクトの場合は、正規表現による抽出を行わない
+        if response.lstrip().startswith("{"):
+            try:
+                return orjson.loads(response)
+            except orjson.JSONDecodeError:
+                pass
 
         try:
-            import regex
-            json_blocks = regex.findall(r"```json\s*(\{(?:[^{}]|(?R))*\})\s*```", response, regex.DOTALL)
+            # コードブロックがないレスポンスでは正規表現による走査を行わない
+            json_blocks = _JSON_CODE_BLOCK_RE.findall(response) if "```" in response else []
             for block in json_blocks:
                 try:
-                    return json.loads(block)
-                except json.JSONDecodeError as e:
+                    return orjson.loads(block)
+                except orjson.JSONDecodeError as e:
                     logger.warning(f"Failed to parse block from ```json``` code block: {e}")
                     continue
 
-            brace_match = regex.search(r"(\{(?:[^{}]|(?R))*\})", response, regex.DOTALL)
+            brace_match = _JSON_OBJECT_RE.search(response)
             if brace_match:
                 json_str = brace_match.group(1)
                 try:
-                    return json.loads(json_str)
-                except json.JSONDecodeError as e:
+                    return orjson.loads(json_str)
+                except orjson.JSONDecodeError as e:
                     logger.warning(f"Failed to parse top-level braces JSON: {e}")
 
             logger.warning("Attempting to parse entire response as JSON.")
-            return json.loads(response)
+            return orjson.loads(response)
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             raise LLMResponseFormatException("LLMレスポンスをJSONとしてパースできませんでした", details={
                 "response": response,
                 "error": str(e)
             })
 
-    async def acall_with_json_response(self, messages: List[Message], **kwargs) -> Dict[str, Any]:
+
+class OpenAIClient(LLMClient):
+    """OpenAI APIを使用するLLMクライアント"""
+    
+    @staticmethod
+    def _invoke_options(kwargs: Dict[str, Any]) -> Dict[str, Any]:
         """
-        LLMを非同期で呼び出し、JSONレスポンスを取得する
+        呼び出しパラメータからChat Completions APIに渡すオプションを組み立てる
+        
+        response_schema が指定された場合は、JSONスキーマによる出力形式の制約（Structured Outputs）を
+        指定します。OpenAI互換の推論サーバー（LM Studio、vLLM、llama.cpp など）では文法による
+        制約付きデコードとして処理されます。strict 指定はしないため、スキーマに従わない値が
+        返される可能性はあり、呼び出し側で応答を検証する必要があります。
         
         Args:
-            messages: メッセージのリスト
-            **kwargs: その他のパラメータ
+            kwargs: 呼び出しパラメータ
             
         Returns:
-            JSONとしてパースされたLLMレスポンス
+            invoke に渡すキーワード引数
         """
-        response = await self.acall(messages, **kwargs)
-        
-        try:
-            import re
-            json_match = re.search(r'```json\s*(.*?)\s*```', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-                return json.loads(json_str)
-            else:
-                logger.warning("JSON code block not found in LLM response, attempting to parse entire response as JSON.")
-                return json.loads(response)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {e}")
-            raise LLMResponseFormatException("LLMレスポンスをJSONとしてパースできませんでした", details={
-                "response": response,
-                "error": str(e)
-            })
-
-
-class OpenAIClient(LLMClient):
-    """OpenAI APIを使用するLLMクライアント"""
+        response_schema = kwargs.get("response_schema")
+        if response_schema is None:
+            return {}
+        return {
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": response_schema}
+            }
+        }
     
     def _setup_client(self) -> None:
         """OpenAIクライアントの設定"""
@@ -335,7 +381,7 @@ class OpenAIClient(LLMClient):
             elif message.role == MessageRole.ASSISTANT:
                 langchain_messages.append(AIMessage(content=message.content))
         
-        response = self.client.invoke(langchain_messages)
+        response = self.client.invoke(langchain_messages, **self._invoke_options(kwargs))
         
         return response.content
     
@@ -359,7 +405,7 @@ class OpenAIClient(LLMClient):
             elif message.role == MessageRole.ASSISTANT:
                 langchain_messages.append(AIMessage(content=message.content))
         
-        response = await self.client.ainvoke(langchain_messages)
+        response = await self.client.ainvoke(langchain_messages, **self._invoke_options(kwargs))
         
         return response.content
 
@@ -387,6 +433,19 @@ class AnthropicClient(LLMClient):
             logger.warning("Anthropic APIクライアントのインポートに失敗しました。モックを使用します。")
             self.client = None
     
+    @staticmethod
+    def _cacheable_system_content(content: str) -> List[Dict[str, Any]]:
+        """
+        システムメッセージをプロンプトキャッシュ対象のコンテンツブロックに変換する
+        
+        Args:
+            content: システムメッセージの本文
+            
+        Returns:
+            cache_control を付与したコンテンツブロックのリスト
+        """
+        return [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+    
     def _call_llm(self, messages: List[Message], **kwargs) -> str:
         """
         Anthropic APIを使用してLLMを呼び出す
@@ -404,7 +463,7 @@ class AnthropicClient(LLMClient):
         langchain_messages = []
         for message in messages:
             if message.role == MessageRole.SYSTEM:
-                langchain_messages.append(SystemMessage(content=message.content))
+                langchain_messages.append(SystemMessage(content=self._cacheable_system_content(message.content)))
             elif message.role == MessageRole.USER:
                 langchain_messages.append(HumanMessage(content=message.content))
             elif message.role == MessageRole.ASSISTANT:
@@ -431,7 +490,7 @@ class AnthropicClient(LLMClient):
         langchain_messages = []
         for message in messages:
             if message.role == MessageRole.SYSTEM:
-                langchain_messages.append(SystemMessage(content=message.content))
+                langchain_messages.append(SystemMessage(content=self._cacheable_system_content(message.content)))
             elif message.role == MessageRole.USER:
                 langchain_messages.append(HumanMessage(content=message.content))
             elif message.role == MessageRole.ASSISTANT:
@@ -499,6 +558,31 @@ class LLMClientFactory:
         
         return LLMClientFactory.create(provider_type, model_name, temperature, max_tokens, **kwargs)
     
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def get_shared(
+        provider_type: LLMProviderType,
+        model_name: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None
+    ) -> LLMClient:
+        """
+        プロセス内で共有するLLMクライアントを取得する
+        
+        同じ設定のクライアントは一度だけ作成し、接続プールとともに再利用します。
+        非同期呼び出しは run_llm_coroutine で同じイベントループ上から行ってください。
+        
+        Args:
+            provider_type: LLMプロバイダーの種類
+            model_name: モデル名（指定しない場合は設定から取得）
+            temperature: 温度パラメータ（0.0〜1.0）
+            max_tokens: 最大トークン数
+            
+        Returns:
+            LLMクライアント
+        """
+        return LLMClientFactory.create(provider_type, model_name, temperature, max_tokens)
+    
     @staticmethod
     def create_default() -> LLMClient:
         """
@@ -514,3 +598,39 @@ class LLMClientFactory:
             provider_type = LLMProviderType.OPENAI
         
         return LLMClientFactory.create(provider_type)
+
+
+_llm_event_loop: Optional[asyncio.AbstractEventLoop] = None
+_llm_event_loop_lock = threading.Lock()
+
+
+def _get_llm_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    LLM呼び出し用のイベントループを取得する（初回呼び出し時にバックグラウンドスレッドで起動）
+    
+    Returns:
+        イベントループ
+    """
+    global _llm_event_loop
+    with _llm_event_loop_lock:
+        if _llm_event_loop is None or _llm_event_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+            _llm_event_loop = loop
+        return _llm_event_loop
+
+
+def run_llm_coroutine(coro: Awaitable[T]) -> T:
+    """
+    LLM呼び出しを含むコルーチンを共有のイベントループ上で実行し、結果を待つ
+    
+    asyncio.run は呼び出しごとにイベントループを作り直すため、共有クライアントの非同期接続プールが
+    閉じたループに紐付いたままになります。常に同じループで実行することで接続を再利用できます。
+    
+    Args:
+        coro: 実行するコルーチン
+        
+    Returns:
+        コルーチンの戻り値
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_llm_event_loop()).result()
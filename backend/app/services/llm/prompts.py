@@ -5,28 +5,117 @@
 再利用可能な形で管理します。
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import json
+import string
 import yaml
 from pathlib import Path
 
 from app.logging_config import logger
 
 
+_CompiledTemplate = List[Tuple[str, Optional[str]]]
+
+
+def _compile_template(template: str) -> Optional[_CompiledTemplate]:
+    """
+    テンプレート文字列を (リテラル, フィールド名) の列に事前解析する
+    
+    書式指定・変換指定・属性/インデックス参照を含むテンプレートは対象外とし、
+    その場合は str.format にフォールバックさせるため None を返します。
+    
+    Args:
+        template: テンプレート文字列
+        
+    Returns:
+        事前解析済みのテンプレート（対象外の場合はNone）
+    """
+    compiled = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+        if field_name is not None and (format_spec or conversion or not field_name.isidentifier()):
+            return None
+        compiled.append((literal, field_name))
+    return compiled
+
+
+def _escape_braces(text: str) -> str:
+    """テンプレートのリテラルとして扱われるように波括弧をエスケープする"""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def _bind_template(template: str, kwargs: Dict[str, Any]) -> str:
+    """
+    テンプレート文字列の一部のフィールドを値で置き換えたテンプレート文字列を作成する
+    
+    書式指定・変換指定を含むフィールドや、値が指定されていないフィールドはそのまま残します。
+    
+    Args:
+        template: テンプレート文字列
+        kwargs: 埋め込む変数
+        
+    Returns:
+        値を埋め込んだテンプレート文字列
+    """
+    parts = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(template):
+        parts.append(_escape_braces(literal))
+        if field_name is None:
+            continue
+        if field_name in kwargs and not format_spec and not conversion:
+            parts.append(_escape_braces(str(kwargs[field_name])))
+            continue
+        field = field_name
+        if conversion:
+            field += f"!{conversion}"
+        if format_spec:
+            field += f":{format_spec}"
+        parts.append("{" + field + "}")
+    return "".join(parts)
+
+
+def _render_template(template: str, compiled: Optional[_CompiledTemplate], kwargs: Dict[str, Any]) -> str:
+    """
+    事前解析済みのテンプレートを変数で埋める
+    
+    Args:
+        template: テンプレート文字列
+        compiled: 事前解析済みのテンプレート
+        kwargs: テンプレートに埋め込む変数
+        
+    Returns:
+        フォーマット済みの文字列
+    """
+    if compiled is None:
+        return template.format(**kwargs)
+    return "".join([
+        literal if field_name is None else literal + str(kwargs[field_name])
+        for literal, field_name in compiled
+    ])
+
+
 class PromptTemplate:
     """プロンプトテンプレートクラス"""
     
-    def __init__(self, template: str, metadata: Optional[Dict[str, Any]] = None):
+    def __init__(self, template: str, metadata: Optional[Dict[str, Any]] = None, system_template: Optional[str] = None):
         """
         プロンプトテンプレートの初期化
         
         Args:
             template: テンプレート文字列
             metadata: テンプレートに関するメタデータ
+            system_template: システムメッセージ用のテンプレート文字列（オプション）
         """
         self.template = template
         self.metadata = metadata or {}
+        self.system_template = system_template
+        
+        # テンプレートは呼び出しごとに再解析せず、初期化時に一度だけ解析しておく
+        self._compiled = _compile_template(template)
+        self.variables = frozenset(
+            field_name for _, field_name, _, _ in string.Formatter().parse(template) if field_name
+        )
+        self._compiled_system = _compile_template(system_template) if system_template is not None else None
     
     def format(self, **kwargs) -> str:
         """
@@ -38,7 +127,43 @@ class PromptTemplate:
         Returns:
             フォーマット済みのプロンプト
         """
-        return self.template.format(**kwargs)
+        return _render_template(self.template, self._compiled, kwargs)
+    
+    def format_system(self, **kwargs) -> Optional[str]:
+        """
+        システムメッセージ用のテンプレートを変数で埋める
+        
+        システムメッセージには呼び出しごとに変わらない指示を置き、LLMサーバー側で
+        プロンプトの先頭部分（プレフィックス）のキャッシュが効くようにします。
+        
+        Args:
+            **kwargs: テンプレートに埋め込む変数
+            
+        Returns:
+            フォーマット済みのシステムプロンプト（システムテンプレートがない場合はNone）
+        """
+        if self.system_template is None:
+            return None
+        return _render_template(self.system_template, self._compiled_system, kwargs)
+    
+    def partial(self, **kwargs) -> 'PromptTemplate':
+        """
+        一部の変数をあらかじめ埋め込んだテンプレートを作成する
+        
+        呼び出しごとに変わらない変数を事前に埋め込んでおくことで、
+        繰り返しフォーマットする際に残りの変数だけを埋めれば済むようにします。
+        
+        Args:
+            **kwargs: 事前に埋め込む変数
+            
+        Returns:
+            変数を埋め込んだプロンプトテンプレート
+        """
+        return PromptTemplate(
+            template=_bind_template(self.template, kwargs),
+            metadata=self.metadata,
+            system_template=_bind_template(self.system_template, kwargs) if self.system_template is not None else None
+        )
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -47,10 +172,13 @@ class PromptTemplate:
         Returns:
             テンプレートの辞書表現
         """
-        return {
+        data = {
             "template": self.template,
             "metadata": self.metadata
         }
+        if self.system_template is not None:
+            data["system_template"] = self.system_template
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'PromptTemplate':
@@ -65,7 +193,8 @@ class PromptTemplate:
         """
         return cls(
             template=data["template"],
-            metadata=data.get("metadata", {})
+            metadata=data.get("metadata", {}),
+            system_template=data.get("system_template")
         )
 
 
@@ -237,13 +366,7 @@ You must strictly follow the format below.
         ))
         
         self.register("endpoint_test_generation", PromptTemplate(
-            template="""You are an expert in API testing. Based on the following target endpoint and related OpenAPI schema information, generate a complete test suite (TestSuite) in strict JSON format.
-
-Target endpoint:
-{target_endpoint_info}
-
-Related OpenAPI schema:
-{relevant_schema_info}
+            system_template="""You are an expert in API testing. Based on the target endpoint and related OpenAPI schema information given in the user message, generate a complete test suite (TestSuite) in strict JSON format.
 
 The test suite must include the following test cases:
 1. **Normal case**: A request that successfully triggers the expected behavior. Include any necessary setup steps (e.g. creating required resources).
@@ -299,25 +422,22 @@ Return only a single valid JSON object matching the following format. **Do not i
 8. For each test case, the `"name"` field should indicate the case type (e.g., "Normal case", "Invalid input").
 9. Use the appropriate `error_type` for abnormal cases: `"missing_field"`, `"invalid_input"`, `"unauthorized"`, `"not_found"`, etc. Use `null` for normal cases.
 10. Return only a single valid JSON object matching the following format. **Do not include any explanations, markdown formatting, or non-JSON text.**
+""",
+            template="""Target endpoint:
+{target_endpoint_info}
+
+Related OpenAPI schema:
+{relevant_schema_info}
 """,
             metadata={
                 "description": "特定のエンドポイントに対するテスト生成用のプロンプト",
-                "version": "1.2",
+                "version": "1.3",
                 "author": "Caseforge Team"
             }
         ))
         
         self.register("dependency_aware_rag", PromptTemplate(
-            template="""You are an expert in API testing. Based on the following target endpoint and related OpenAPI schema information, generate a complete test suite (TestSuite) in strict JSON format.
-
-Dependency information:
-{dependency_graph}
-
-Target endpoint:
-{target_endpoint}
-
-Related OpenAPI schema:
-{relevant_schema_info}
+            system_template="""You are an expert in API testing. Based on the dependency information, target endpoint and related OpenAPI schema information given in the user message, generate a complete test suite (TestSuite) in strict JSON format.
 
 The test suite must include the following test cases:
 1. **Normal case**: A request that successfully triggers the expected behavior. Include any necessary setup steps (e.g. creating required resources).
@@ -444,10 +564,19 @@ Return only a single valid JSON object matching the following format. **Do not i
 12. For each test case, the `"name"` field should indicate the case type (e.g., "Normal case", "Invalid input").
 13. Use the appropriate `error_type` for abnormal cases: `"missing_field"`, `"invalid_input"`, `"unauthorized"`, `"not_found"`, etc. Use `null` for normal cases.
 14. Return only a single valid JSON object matching the format above. **Do not include any explanations, markdown formatting, or non-JSON text.**
+""",
+            template="""Dependency information:
+{dependency_graph}
+
+Target endpoint:
+{target_endpoint}
+
+Related OpenAPI schema:
+{relevant_schema_info}
 """,
             metadata={
                 "description": "依存関係を考慮したRAGベースのテスト生成プロンプト",
-                "version": "2.0",
+                "version": "2.1",
                 "author": "Caseforge Team",
                 "phase": "2",
                 "features": [
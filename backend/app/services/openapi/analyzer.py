@@ -2,6 +2,9 @@ from typing import List, Dict, Tuple, Optional, Set
 import re
 from app.logging_config import logger
 
+# パスパラメータ（例: /users/{id} の id）を抽出する正規表現
+_PATH_PARAM_RE = re.compile(r'\{([^}]+)\}')
+
 class OpenAPIAnalyzer:
     """OpenAPIスキーマを解析して依存関係を抽出するクラス"""
     
@@ -72,7 +75,7 @@ class OpenAPIAnalyzer:
     
     def _extract_path_params(self, path: str) -> List[str]:
         """パスからパラメータ名を抽出する"""
-        return re.findall(r'{([^}]+)}', path)
+        return _PATH_PARAM_RE.findall(path)
     
     def _find_param_source_endpoints(self, param_name: str) -> List[Tuple[str, str, dict]]:
         """パラメータを生成できる可能性のあるエンドポイントを探す"""
@@ -567,3 +570,69 @@ class DependencyAnalyzer:
             logger.warning(f"Circular dependency detected: {' -> '.join(cycle)}")
         
         return dependencies
+    
+    @staticmethod
+    def find_circular_endpoints(dependencies: List[Dict]) -> Set[Tuple[str, str]]:
+        """
+        循環する依存関係に含まれるエンドポイントを求める
+        
+        依存関係グラフの強連結成分をTarjanのアルゴリズム（再帰を使わない実装）で一度だけ求め、
+        2つ以上のエンドポイントからなる成分と自己ループのエンドポイントを循環とみなします。
+        
+        Args:
+            dependencies: 依存関係のリスト
+        
+        Returns:
+            循環に含まれるエンドポイントの (パス, 小文字のHTTPメソッド) の集合
+        """
+        graph: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for dep in dependencies:
+            source = dep.get("source", {})
+            target = dep.get("target", {})
+            source_key = (source.get("path"), (source.get("method") or "").lower())
+            target_key = (target.get("path"), (target.get("method") or "").lower())
+            graph.setdefault(source_key, []).append(target_key)
+            graph.setdefault(target_key, [])
+        
+        index_of: Dict[Tuple[str, str], int] = {}
+        lowlink: Dict[Tuple[str, str], int] = {}
+        stack: List[Tuple[str, str]] = []
+        on_stack: Set[Tuple[str, str]] = set()
+        circular: Set[Tuple[str, str]] = set()
+        
+        for root in graph:
+            if root in index_of:
+                continue
+            index_of[root] = lowlink[root] = len(index_of)
+            stack.append(root)
+            on_stack.add(root)
+            # (ノード, 未訪問の隣接ノードのイテレータ) の探索スタック
+            work = [(root, iter(graph[root]))]
+            while work:
+                node, neighbors = work[-1]
+                for neighbor in neighbors:
+                    if neighbor not in index_of:
+                        index_of[neighbor] = lowlink[neighbor] = len(index_of)
+                        stack.append(neighbor)
+                        on_stack.add(neighbor)
+                        work.append((neighbor, iter(graph[neighbor])))
+                        break
+                    if neighbor in on_stack:
+                        lowlink[node] = min(lowlink[node], index_of[neighbor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index_of[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in graph[node]:
+                            circular.update(component)
+        
+        return circular
@@ -1,20 +1,66 @@
 from typing import List, Dict, Any, Optional, Tuple
+import re
 import yaml
 import json
-import re
-import copy
+import orjson
 from app.logging_config import logger
 from app.exceptions import OpenAPIParseException
 
-def _resolve_references(schema: Any, full_schema: Dict, resolved_refs: set = None) -> Any:
+# エンドポイントとして扱うパスアイテムのキー（HTTPメソッド）
+_HTTP_METHODS = frozenset({"get", "post", "put", "delete", "patch", "options", "head"})
+
+# 64ビット整数に収まらない可能性のある桁数の数字列（orjson はそのような整数を浮動小数点数として読み込む）
+_LONG_DIGITS_RE = re.compile(r"\d{19,}")
+
+# libyaml が利用できる場合はC実装のローダーを使う（純Python実装より大幅に速い）
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+def load_schema_content(schema_content: str) -> Any:
+    """
+    OpenAPIスキーマの内容（YAML or JSON）を読み込む
+
+    JSONと判別できる内容はYAMLとして解析せずにorjsonで読み込み、
+    それ以外（またはJSONとして読み込めなかった場合）はYAMLとして読み込みます。
+    64ビットを超える整数を含みうる内容は、値を正確に保つため標準の json で読み込みます。
+
+    Args:
+        schema_content: OpenAPIスキーマの内容
+
+    Returns:
+        読み込んだオブジェクト
+
+    Raises:
+        yaml.YAMLError: YAMLとして解析できない場合
+    """
+    if schema_content.lstrip().startswith(("{", "[")):
+        try:
+            if _LONG_DIGITS_RE.search(schema_content):
+                return json.loads(schema_content)
+            return orjson.loads(schema_content)
+        except ValueError:
+            pass
+    return yaml.load(schema_content, Loader=_YamlLoader)
+
+
+def _resolve_references(schema: Any, full_schema: Dict, resolved_refs: set = None,
+                        ref_cache: Optional[Dict[str, Any]] = None) -> Any:
     """
     $refを再帰的に解決する（循環参照対応版）
     辞書やリスト構造を汎用的に探索し、$refを解決する。
 
+    ref_cache を渡した場合、解決済みの$refの結果を保持し、同じ$refは一度だけ解決する。
+    また、$refを含まない部分木はコピーせずに入力のオブジェクトをそのまま返す。
+    この場合、返り値は入力や同じ$refの解決結果とオブジェクトを共有するため、返り値は変更しないこと。
+
     Args:
         schema: 解決対象のスキーマの一部（辞書、リスト、またはその他の型）
         full_schema: OpenAPIスキーマ全体
         resolved_refs: 現在の解決パス内で既に解決を試みた$refパスのセット (循環参照検出用)
+        ref_cache: $refパスごとの解決結果のキャッシュ（full_schemaごとに用意する）
 
     Returns:
         $refが解決されたスキーマの一部
@@ -29,6 +75,10 @@ def _resolve_references(schema: Any, full_schema: Dict, resolved_refs: set = Non
         if "$ref" in schema:
             ref_path = schema["$ref"]
 
+            # 解決済みの$refは解決結果を再利用する（解決結果は解決パスによらない）
+            if ref_cache is not None and ref_path in ref_cache:
+                return ref_cache[ref_path]
+
             # 現在の解決パス内で既に解決を試みている場合は循環参照
             if ref_path in resolved_refs:
                 logger.error(f"Circular reference detected: {ref_path}")
@@ -47,7 +97,7 @@ def _resolve_references(schema: Any, full_schema: Dict, resolved_refs: set = Non
                 try:
                     for part in parts:
                         # パスがリストのインデックスの場合
-                        if isinstance(ref_value, list) and re.match(r'^\d+$', part):
+                        if isinstance(ref_value, list) and part.isdecimal():
                             index = int(part)
                             if 0 <= index < len(ref_value):
                                 ref_value = ref_value[index]
@@ -72,11 +122,13 @@ def _resolve_references(schema: Any, full_schema: Dict, resolved_refs: set = Non
 
                 # 解決した値自体に$refが含まれていないか再帰的にチェック
                 # 現在の解決パスを引き継いで循環参照を検出
-                resolved_value = _resolve_references(ref_value, full_schema, resolved_refs)
+                resolved_value = _resolve_references(ref_value, full_schema, resolved_refs, ref_cache)
                 
                 # 解決パスから削除（バックトラック）
                 resolved_refs.discard(ref_path)
                 
+                if ref_cache is not None:
+                    ref_cache[ref_path] = resolved_value
                 return resolved_value
             else:
                  # 外部参照はここでは解決しない
@@ -84,17 +136,40 @@ def _resolve_references(schema: Any, full_schema: Dict, resolved_refs: set = Non
                  return schema
 
         # $ref キーが存在しない場合、辞書の値について再帰的に解決
-        resolved = copy.deepcopy(schema)
-        for key, value in resolved.items():
-            resolved[key] = _resolve_references(value, full_schema, resolved_refs)
-        return resolved
+        if ref_cache is None:
+            # 辞書とリストは解決しながら新しく作るため、元のスキーマをコピーしておく必要はない（スカラー値は不変なので共有する）
+            return {key: _resolve_references(value, full_schema, resolved_refs, ref_cache) for key, value in schema.items()}
+
+        # $refを含まない部分木は元のオブジェクトをそのまま返すため、値が変わった場合にだけ新しい辞書を作る
+        resolved_dict = None
+        for key, value in schema.items():
+            resolved_value = _resolve_references(value, full_schema, resolved_refs, ref_cache)
+            if resolved_dict is None:
+                if resolved_value is value:
+                    continue
+                # 最初に値が変わったキーより前の値は元のものを使う
+                resolved_dict = {}
+                for prev_key, prev_value in schema.items():
+                    if prev_key == key:
+                        break
+                    resolved_dict[prev_key] = prev_value
+            resolved_dict[key] = resolved_value
+        return schema if resolved_dict is None else resolved_dict
 
     # スキーマがリストの場合
     elif isinstance(schema, list):
-        resolved_list = []
-        for item in schema:
-            resolved_list.append(_resolve_references(item, full_schema, resolved_refs))
-        return resolved_list
+        if ref_cache is None:
+            return [_resolve_references(item, full_schema, resolved_refs, ref_cache) for item in schema]
+
+        resolved_list = None
+        for index, item in enumerate(schema):
+            resolved_item = _resolve_references(item, full_schema, resolved_refs, ref_cache)
+            if resolved_list is None:
+                if resolved_item is item:
+                    continue
+                resolved_list = schema[:index]
+            resolved_list.append(resolved_item)
+        return schema if resolved_list is None else resolved_list
 
     # その他の型の場合はそのまま返す
     else:
@@ -125,7 +200,7 @@ def parse_openapi_schema(schema_content: Optional[str] = None, file_path: Option
 
     if schema_content:
         try:
-            schema = yaml.safe_load(schema_content)
+            schema = load_schema_content(schema_content)
         except Exception as e:
             try:
                 schema = json.loads(schema_content)
@@ -143,7 +218,8 @@ def parse_openapi_schema(schema_content: Optional[str] = None, file_path: Option
         logger.warning("Schema does not contain 'paths' field")
         schema["paths"] = {}
 
-    resolved_schema = _resolve_references(copy.deepcopy(schema), schema)
+    # 共有のコンポーネントは多くのエンドポイントから参照されるため、$refごとに一度だけ解決する
+    resolved_schema = _resolve_references(schema, schema, ref_cache={})
 
     return schema, resolved_schema
 
@@ -156,6 +232,8 @@ class EndpointParser:
             schema_content: OpenAPIスキーマの内容（YAML or JSON）
         """
         self.schema, self.resolved_schema = parse_openapi_schema(schema_content=schema_content)
+        # resolved_schema に対する$refの解決結果のキャッシュ（全エンドポイントで共有する）
+        self._ref_cache: Dict[str, Any] = {}
     
     def parse_endpoints(self, service_id: int) -> List[Dict[str, Any]]:
         """
@@ -183,8 +261,9 @@ class EndpointParser:
                 continue
             
             for method_name, operation in methods.items():
-                if method_name.upper() not in {"GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS", "HEAD"}:
+                if method_name.lower() not in _HTTP_METHODS:
                     continue
+                method_upper = method_name.upper()
                 
                 
                 try:
@@ -198,7 +277,7 @@ class EndpointParser:
                     endpoint_data = {
                         "service_id": service_id,
                         "path": path,
-                        "method": method_name.upper(),
+                        "method": method_upper,
                         "summary": operation.get("summary"),
                         "description": operation.get("description"),
                         "request_body": self._resolve_request_body_schema(request_body),
@@ -220,7 +299,7 @@ class EndpointParser:
             return None
         
         # リクエストボディ全体を_resolve_referencesに渡して解決
-        resolved_request_body = _resolve_references(copy.deepcopy(request_body), self.resolved_schema)
+        resolved_request_body = _resolve_references(request_body, self.resolved_schema, ref_cache=self._ref_cache)
 
         return resolved_request_body
 
@@ -229,13 +308,17 @@ class EndpointParser:
         if not responses:
             return None
         
-        resolved_responses = copy.deepcopy(responses)
-        
-        for status_code, response in resolved_responses.items():
+        # 元のレスポンスをコピーしてから書き換えるのではなく、スキーマを解決しながら新しい辞書を組み立てる
+        # （スキーマ以外の値は元のオブジェクトを共有する）
+        resolved_responses = {}
+        for status_code, response in responses.items():
             if "content" in response:
-                for media_type, content in response["content"].items():
-                    if "schema" in content:
-                        resolved_responses[status_code]["content"][media_type]["schema"] = _resolve_references(content["schema"], self.resolved_schema)
+                response = {**response, "content": {
+                    media_type: {**content, "schema": _resolve_references(content["schema"], self.resolved_schema, ref_cache=self._ref_cache)}
+                    if "schema" in content else content
+                    for media_type, content in response["content"].items()
+                }}
+            resolved_responses[status_code] = response
         
         return resolved_responses
 
@@ -1,6 +1,7 @@
-from .embeddings import EmbeddingFunctionForCaseforge
+from .embeddings import EmbeddingFunctionForCaseforge, get_embedding_fn
 from .chunker import OpenAPISchemaChunker
 from .indexer import index_schema
+from .bm25 import BM25Index
 import signal
 import os
 from app.logging_config import logger
@@ -12,6 +13,8 @@ class HuggingFaceEmbeddings:
 
 __all__ = [
     "EmbeddingFunctionForCaseforge",
+    "get_embedding_fn",
     "OpenAPISchemaChunker",
-    "index_schema"
+    "index_schema",
+    "BM25Index"
 ]
@@ -0,0 +1,99 @@
+"""
+BM25によるキーワード検索モジュール
+
+このモジュールは、スキーマチャンクに対するBM25（Okapi BM25）のキーワード検索を提供します。
+埋め込みでは近くなりにくい `/users/{user_id}` や `employeeId` のような識別子を
+完全一致に近い形で検索するため、ベクトル検索と組み合わせて使用します。
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+# 英数字とアンダースコアの連続を1語とする
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+")
+# camelCase / PascalCase / snake_case の語を構成単語に分割する（例: employeeId -> employee, id）
+_SUBWORD_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    テキストをBM25用のトークンに分割する
+
+    識別子そのもの（小文字化したもの）に加えて、camelCase や snake_case の構成単語もトークンに含めます。
+
+    Args:
+        text: 分割するテキスト
+
+    Returns:
+        トークンのリスト
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        tokens.append(word.lower())
+        subwords = _SUBWORD_RE.findall(word)
+        if len(subwords) > 1:
+            tokens.extend(subword.lower() for subword in subwords)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 の転置インデックス"""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        """
+        ドキュメントのリストからインデックスを構築する
+
+        Args:
+            documents: 検索対象のドキュメントのテキスト
+            k1: 単語の出現頻度の飽和を調整するパラメータ
+            b: ドキュメント長による正規化の強さを調整するパラメータ
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(documents)
+        self.doc_lengths: List[int] = []
+        # 単語ごとの (ドキュメント番号, 出現回数) のリスト
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc_id, text in enumerate(documents):
+            term_freqs = Counter(tokenize(text))
+            self.doc_lengths.append(sum(term_freqs.values()))
+            for term, freq in term_freqs.items():
+                self.postings.setdefault(term, []).append((doc_id, freq))
+        self.avg_doc_length = sum(self.doc_lengths) / self.doc_count if self.doc_count else 0.0
+        # すべてのドキュメントに出現する単語でも負にならないIDF（Lucene と同じ定義）
+        self.idf: Dict[str, float] = {
+            term: math.log(1.0 + (self.doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        クエリに対するスコアの高いドキュメントを検索する
+
+        クエリ中で重複する単語は1回だけ数え、クエリの単語を含むドキュメントのみを採点します。
+
+        Args:
+            query: 検索クエリ
+            k: 取得するドキュメント数
+
+        Returns:
+            (ドキュメント番号, スコア) のリスト（スコアの降順）
+        """
+        if not self.doc_count:
+            return []
+
+        scores: Dict[int, float] = {}
+        length_norm = self.k1 / self.avg_doc_length if self.avg_doc_length else 0.0
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            idf = self.idf[term]
+            for doc_id, freq in posting:
+                denominator = freq + self.k1 * (1.0 - self.b) + length_norm * self.b * self.doc_lengths[doc_id]
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1.0) / denominator
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
@@ -6,6 +6,12 @@ from langchain_core.documents import Document
 from app.logging_config import logger
 from app.services.openapi.parser import parse_openapi_schema, _resolve_references
 
+class _NoAliasDumper(yaml.Dumper):
+    """同じオブジェクトが複数回現れてもアンカー・エイリアスを使わずに展開して出力するDumper"""
+    def ignore_aliases(self, data: Any) -> bool:
+        return True
+
+
 class OpenAPISchemaChunker:
     """
     OpenAPIスキーマを構造単位でチャンク化し、$refを解決するクラス
@@ -53,7 +59,8 @@ class OpenAPISchemaChunker:
                     }
                     chunk_content["responses"] = relevant_responses
 
-                page_content = yaml.dump(chunk_content, indent=2, sort_keys=False)
+                # $refの解決結果は複数箇所で共有されているため、アンカー・エイリアスにせず展開して出力する
+                page_content = yaml.dump(chunk_content, Dumper=_NoAliasDumper, indent=2, sort_keys=False)
 
                 metadata = {
                     "source": f"{self.path}::paths::{path}::{method}",
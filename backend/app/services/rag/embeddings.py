@@ -1,3 +1,4 @@
+import functools
 from typing import List
 from langchain_core.embeddings import Embeddings
 from app.logging_config import logger
@@ -61,3 +62,16 @@ class EmbeddingFunctionForCaseforge(Embeddings):
         except Exception as e:
             logger.error(f"Error creating query embedding: {e}", exc_info=True)
             return [0.0] * 384
+
+
+@functools.cache
+def get_embedding_fn() -> EmbeddingFunctionForCaseforge:
+    """
+    プロセス全体で共有する埋め込み関数を取得する
+
+    初回呼び出し時にのみ初期化し、以降は同じインスタンスを返します。
+
+    Returns:
+        埋め込み関数
+    """
+    return EmbeddingFunctionForCaseforge()
@@ -2,6 +2,9 @@ from typing import List, Dict, Tuple, Optional
 import re
 from app.logging_config import logger
 
+# パスパラメータ（例: /users/{id} の id）を抽出する正規表現
+_PATH_PARAM_RE = re.compile(r'\{([^}]+)\}')
+
 class OpenAPIAnalyzer:
     """OpenAPIスキーマを解析して依存関係を抽出するクラス"""
     
@@ -68,7 +71,7 @@ class OpenAPIAnalyzer:
     
     def _extract_path_params(self, path: str) -> List[str]:
         """パスからパラメータ名を抽出する"""
-        return re.findall(r'{([^}]+)}', path)
+        return _PATH_PARAM_RE.findall(path)
     
     def _find_param_source_endpoints(self, param_name: str) -> List[Tuple[str, str, dict]]:
         """パラメータを生成できる可能性のあるエンドポイントを探す"""
@@ -23,6 +23,7 @@ from app.logging_config import logger
 from app.models import Service, TestSuite, TestRun, StepResult, TestStep, TestCase, TestCaseResult
 from app.services.chain_generator import ChainStore
 from app.exceptions import TimeoutException, CaseforgeException, ErrorCode
+from app.utils.jsonpath import compile_jsonpath
 from app.utils.timeout import async_timeout
 from app.utils.retry import async_retry, RetryStrategy
 from app.services.test.variable_manager import VariableManager, VariableScope, VariableType
@@ -303,11 +304,9 @@ class TestRunner(Generic[ResultT], abc.ABC):
         for key, path in extract_rules.items():
             try:
                 if path.startswith("$."):
-                    import jsonpath_ng
-                    jsonpath_expr = jsonpath_ng.parse(path)
-                    matches = jsonpath_expr.find(response_body)
+                    matches = compile_jsonpath(path)(response_body)
                     if matches:
-                        extracted[key] = matches[0].value
+                        extracted[key] = matches[0]
             except Exception as e:
                 logger.error(f"Error extracting value for {key} with path {path}: {e}")
         
@@ -2,12 +2,16 @@
 ベクトルデータベース関連のモジュール
 """
 from .manager import VectorDBManagerFactory, VectorDBManager
-from .embeddings import EmbeddingModel, EmbeddingModelFactory, EmbeddingModelWrapper
+from .embeddings import EmbeddingModel, EmbeddingModelFactory, EmbeddingModelWrapper, get_default_embedding_model
+from .reranker import CrossEncoderReranker, get_default_reranker
 
 __all__ = [
     "VectorDBManagerFactory",
     "VectorDBManager",
     "EmbeddingModel",
     "EmbeddingModelFactory",
-    "EmbeddingModelWrapper"
+    "EmbeddingModelWrapper",
+    "get_default_embedding_model",
+    "CrossEncoderReranker",
+    "get_default_reranker"
 ]
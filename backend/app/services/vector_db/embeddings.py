@@ -6,6 +6,7 @@
 """
 
 import abc
+import functools
 import hashlib
 from typing import List, Dict, Any, Optional, TypeVar
 import os
@@ -445,6 +446,20 @@ class EmbeddingModelFactory:
         return EmbeddingModelFactory.create(model_type, model_name, dimension)
 
 
+@functools.cache
+def get_default_embedding_model() -> EmbeddingModel:
+    """
+    プロセス全体で共有するデフォルトの埋め込みモデルを取得する
+
+    HuggingFaceモデルの読み込みはサービスごとに繰り返すとコストが高いため、
+    初回呼び出し時にのみ生成し、以降は同じインスタンスを返します。
+
+    Returns:
+        埋め込みモデル
+    """
+    return EmbeddingModelFactory.create_default()
+
+
 class EmbeddingModelWrapper(Embeddings):
     """LangChain Embeddings互換のラッパークラス"""
     
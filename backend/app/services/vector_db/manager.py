@@ -29,7 +29,8 @@ from app.services.vector_db.embeddings import (
     EmbeddingModel,
     EmbeddingModelFactory,
     EmbeddingModelWrapper,
-    EmbeddingException
+    EmbeddingException,
+    get_default_embedding_model
 )
 
 T = TypeVar('T')
@@ -187,7 +188,7 @@ class VectorDBManager(abc.ABC):
             cache_config: キャッシュ設定
             **kwargs: その他のパラメータ
         """
-        self.embedding_model = embedding_model or EmbeddingModelFactory.create_default()
+        self.embedding_model = embedding_model or get_default_embedding_model()
         self.embedding_function = EmbeddingModelWrapper(self.embedding_model)
         
         self.persist_directory = persist_directory
@@ -252,6 +253,27 @@ class VectorDBManager(abc.ABC):
         """
         pass
     
+    def _similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        複数のクエリの類似度検索を実行する
+        
+        まとめて検索できるベクトルDBではサブクラスでオーバーライドします。
+        
+        Args:
+            queries: 検索クエリのリスト
+            k: クエリごとに取得するドキュメント数
+            filter: 検索フィルタ
+            
+        Returns:
+            クエリと同じ順序の、類似度の高いドキュメントのリストのリスト
+        """
+        return [self._similarity_search(query, k, filter) for query in queries]
+    
     @abc.abstractmethod
     def _similarity_search_with_score(
         self, 
@@ -439,6 +461,54 @@ class VectorDBManager(abc.ABC):
                 "error": str(e)
             })
     
+    @retry(retry_key="VECTOR_DB")
+    def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        複数のクエリの類似度検索をまとめて実行する（リトライ付き）
+        
+        キャッシュにないクエリだけをまとめて検索するため、クエリの埋め込みや
+        データベースへの接続をクエリごとに行うよりも効率的です。
+        
+        Args:
+            queries: 検索クエリのリスト
+            k: クエリごとに取得するドキュメント数
+            filter: 検索フィルタ
+            
+        Returns:
+            クエリと同じ順序の、類似度の高いドキュメントのリストのリスト
+        """
+        try:
+            results: List[Optional[List[Document]]] = [None] * len(queries)
+            missing_indices = []
+            
+            for i, query in enumerate(queries):
+                if self.use_cache:
+                    cached_results = self.document_cache.get(self._get_cache_key_for_query(query, k, filter))
+                    if cached_results:
+                        results[i] = cached_results
+                        continue
+                missing_indices.append(i)
+            
+            if missing_indices:
+                searched = self._similarity_search_batch([queries[i] for i in missing_indices], k, filter)
+                for i, documents in zip(missing_indices, searched):
+                    results[i] = documents
+                    if self.use_cache:
+                        self.document_cache.set(self._get_cache_key_for_query(queries[i], k, filter), documents)
+            
+            return results
+        except Exception as e:
+            logger.error(f"Error performing batch similarity search: {e}", exc_info=True)
+            raise VectorDBException(f"類似度検索中にエラーが発生しました: {e}", details={
+                "queries": len(queries),
+                "error": str(e)
+            })
+    
     @retry(retry_key="VECTOR_DB")
     @timeout(timeout_key="VECTOR_DB")
     def similarity_search_with_score(
@@ -664,7 +734,7 @@ class VectorDBManagerFactory:
         
         collection_name = str(service_id) if service_id is not None else "default"
 
-        embedding_model = EmbeddingModelFactory.create_default()
+        embedding_model = get_default_embedding_model()
 
         
         if db_type == "pgvector":
@@ -704,6 +774,8 @@ from app.services.vector_db.embeddings import EmbeddingModelWrapper
 from app.logging_config import logger
 
 DATABASE_URL = settings.DATABASE_URL
+# ドキュメント追加時に1回の呼び出しでまとめて埋め込むドキュメント数
+EMBEDDING_BATCH_SIZE = 128
 
 class PGVectorManager(VectorDBManager):
     """PGVectorベクトルDBマネージャー"""
@@ -763,29 +835,29 @@ class PGVectorManager(VectorDBManager):
         Args:
             documents: 追加するドキュメント
         """
-        schema_chunks = []
+        valid_documents = []
         for doc in documents:
             # Documentのmetadataからpathとmethodを取得することを想定
-            path = doc.metadata.get("path")
-            method = doc.metadata.get("method")
-            if not path or not method:
+            if not doc.metadata.get("path") or not doc.metadata.get("method"):
                 logger.warning(f"Skipping document due to missing path or method in metadata: {doc.metadata}")
                 continue
+            valid_documents.append(doc)
 
-            try:
-                # embedding_functionはVectorDBManagerの__init__で初期化済み
-                embedding = self.embedding_function.embed_query(doc.page_content)
-                schema_chunk = SchemaChunk(
+        schema_chunks = []
+        for start in range(0, len(valid_documents), EMBEDDING_BATCH_SIZE):
+            batch = valid_documents[start:start + EMBEDDING_BATCH_SIZE]
+            # embedding_functionはVectorDBManagerの__init__で初期化済み
+            for doc, embedding in zip(batch, self._embed_document_batch(batch)):
+                if embedding is None:
+                    # エラーが発生したドキュメントはスキップし、処理を続行
+                    continue
+                schema_chunks.append(SchemaChunk(
                     service_id=self.service_id,
-                    path=path,
-                    method=method,
+                    path=doc.metadata["path"],
+                    method=doc.metadata["method"],
                     content=doc.page_content,
                     embedding=embedding
-                )
-                schema_chunks.append(schema_chunk)
-            except Exception as e:
-                logger.error(f"Error creating SchemaChunk for document: {doc.metadata}. Error: {e}", exc_info=True)
-                # エラーが発生したドキュメントはスキップし、処理を続行
+                ))
 
         if not schema_chunks:
             logger.warning("No valid schema chunks to add.")
@@ -803,6 +875,36 @@ class PGVectorManager(VectorDBManager):
                     "error": str(e)
                 })
 
+    def _embed_document_batch(self, documents: List[Document]) -> List[Optional[List[float]]]:
+        """
+        ドキュメントの本文をまとめて埋め込む
+
+        埋め込みモデルの呼び出しはドキュメントごとではなく1回にまとめます。
+        まとめて埋め込めなかった場合は、失敗したドキュメントだけを除外できるように1件ずつ埋め込み直します。
+
+        Args:
+            documents: 埋め込むドキュメント
+
+        Returns:
+            ドキュメントと同じ順序の埋め込みベクトルのリスト（埋め込めなかったドキュメントはNone）
+        """
+        try:
+            embeddings = self.embedding_function.embed_documents([doc.page_content for doc in documents])
+            if len(embeddings) == len(documents):
+                return embeddings
+            logger.warning(f"Embedding batch returned {len(embeddings)} vectors for {len(documents)} documents")
+        except Exception as e:
+            logger.warning(f"Error embedding document batch, falling back to per-document embedding: {e}")
+
+        embeddings = []
+        for doc in documents:
+            try:
+                embeddings.append(self.embedding_function.embed_query(doc.page_content))
+            except Exception as e:
+                logger.error(f"Error embedding document: {doc.metadata}. Error: {e}", exc_info=True)
+                embeddings.append(None)
+        return embeddings
+
     def _similarity_search(
         self,
         query: str,
@@ -825,40 +927,87 @@ class PGVectorManager(VectorDBManager):
             query_embedding = self.embedding_function.embed_query(query)
 
             with Session(self.engine) as session:
-                # 類似度検索クエリの構築
-                # service_id でフィルタリングし、embedding の類似度でソート
-                # 類似度演算子 '<->' はL2距離（ユークリッド距離）
-                # 距離が小さいほど類似度が高いので、昇順でソート
-                statement = select(SchemaChunk).where(
-                    SchemaChunk.service_id == self.service_id
-                ).order_by(
-                    SchemaChunk.embedding.l2_distance(query_embedding)
-                ).limit(k)
+                return self._search_by_embedding(session, query_embedding, k)
 
-                results = session.exec(statement).all()
+        except Exception as e:
+            logger.error(f"Error performing PGVector similarity search: {e}", exc_info=True)
+            raise VectorDBException(f"PGVector類似度検索中にエラーが発生しました: {e}", details={
+                "query": query,
+                "k": k,
+                "filter": filter,
+                "error": str(e)
+            })
 
-                # 結果をLangChainのDocumentオブジェクトに変換
-                documents = []
-                for chunk in results:
-                    metadata = {
-                        "service_id": chunk.service_id,
-                        "path": chunk.path,
-                        "method": chunk.method,
-                        # embedding はメタデータに含めない
-                    }
-                    documents.append(Document(page_content=chunk.content, metadata=metadata))
+    def _similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """
+        PGVectorで複数のクエリの類似度検索を実行する
+
+        クエリの埋め込みは1回の呼び出しでまとめて計算し、検索は1つのセッションで実行します。
+
+        Args:
+            queries: 検索クエリのリスト
+            k: クエリごとに取得するドキュメント数
+            filter: 検索フィルタ (service_idでのフィルタリングを想定)
+
+        Returns:
+            クエリと同じ順序の、類似度の高いドキュメントのリストのリスト
+        """
+        try:
+            query_embeddings = self.embedding_function.embed_documents(queries)
 
-                return documents
+            with Session(self.engine) as session:
+                return [self._search_by_embedding(session, query_embedding, k) for query_embedding in query_embeddings]
 
         except Exception as e:
-            logger.error(f"Error performing PGVector similarity search: {e}", exc_info=True)
+            logger.error(f"Error performing PGVector batch similarity search: {e}", exc_info=True)
             raise VectorDBException(f"PGVector類似度検索中にエラーが発生しました: {e}", details={
-                "query": query,
+                "queries": len(queries),
                 "k": k,
                 "filter": filter,
                 "error": str(e)
             })
 
+    def _search_by_embedding(self, session: Session, query_embedding: List[float], k: int) -> List[Document]:
+        """
+        埋め込みベクトルに近いスキーマチャンクを検索する
+
+        Args:
+            session: データベースセッション
+            query_embedding: クエリの埋め込みベクトル
+            k: 取得するドキュメント数
+
+        Returns:
+            類似度の高いドキュメントのリスト
+        """
+        # service_id でフィルタリングし、embedding の類似度でソート
+        # 類似度演算子 '<->' はL2距離（ユークリッド距離）
+        # 距離が小さいほど類似度が高いので、昇順でソート
+        statement = select(SchemaChunk).where(
+            SchemaChunk.service_id == self.service_id
+        ).order_by(
+            SchemaChunk.embedding.l2_distance(query_embedding)
+        ).limit(k)
+
+        results = session.exec(statement).all()
+
+        # 結果をLangChainのDocumentオブジェクトに変換
+        documents = []
+        for chunk in results:
+            metadata = {
+                "service_id": chunk.service_id,
+                "path": chunk.path,
+                "method": chunk.method,
+                # embedding はメタデータに含めない
+            }
+            documents.append(Document(page_content=chunk.content, metadata=metadata))
+
+        return documents
+
     def _similarity_search_with_score(
         self,
         query: str,
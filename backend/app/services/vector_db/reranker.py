@@ -0,0 +1,59 @@
+"""
+検索結果の再ランキングモジュール
+
+このモジュールは、クエリと検索結果の組をクロスエンコーダーで採点し、
+LLMに渡す検索結果を関連度の高いものに絞り込むための機能を提供します。
+"""
+
+import functools
+from typing import List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.logging_config import logger
+
+
+class CrossEncoderReranker:
+    """sentence-transformers のクロスエンコーダーによる再ランキング"""
+
+    def __init__(self, model_name: str):
+        """
+        再ランキングモデルの初期化
+
+        Args:
+            model_name: クロスエンコーダーのモデル名
+        """
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name)
+
+    def score(self, pairs: Sequence[Tuple[str, str]]) -> List[float]:
+        """
+        (クエリ, 文書) の組ごとの関連度スコアを計算する
+
+        Args:
+            pairs: (クエリ, 文書) の組のリスト
+
+        Returns:
+            関連度スコアのリスト（入力と同じ順序）
+        """
+        if not pairs:
+            return []
+        return [float(score) for score in self.model.predict(list(pairs))]
+
+
+@functools.cache
+def get_default_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    プロセス全体で共有するデフォルトの再ランキングモデルを取得する
+
+    モデルの読み込みはコストが高いため、初回呼び出し時にのみ生成し、以降は同じインスタンスを返します。
+
+    Returns:
+        再ランキングモデル（初期化に失敗した場合はNone）
+    """
+    try:
+        return CrossEncoderReranker(settings.RERANK_MODEL_NAME)
+    except Exception as e:
+        logger.warning(f"Failed to initialize reranker model {settings.RERANK_MODEL_NAME}: {e}. Reranking is disabled.")
+        return None
@@ -0,0 +1,67 @@
+"""
+JSONPathのユーティリティモジュール
+
+このモジュールは、テストステップの extract_rules で使用するJSONPath式を
+解析済みの形でキャッシュし、レスポンスからの値の抽出に使用する関数を提供します。
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, List
+
+import jsonpath_ng
+
+# `$.a.b.c` のようにフィールド名をドットでつないだだけのパス
+_DOTTED_PATH_RE = re.compile(r"\$(?:\.[A-Za-z_][A-Za-z0-9_]*)+")
+# jsonpath_ng でキーワードとして扱われるフィールド名
+_RESERVED_FIELD_NAMES = frozenset({"where", "wherenot"})
+
+
+def _compile_dotted_path(fields: List[str]) -> Callable[[Any], List[Any]]:
+    """
+    ドット区切りのパスを辞書の参照だけで評価する関数を作成する
+
+    Args:
+        fields: ルートからのフィールド名のリスト
+
+    Returns:
+        データを受け取り、一致した値のリストを返す関数
+    """
+    def find(data: Any) -> List[Any]:
+        for field in fields:
+            if not isinstance(data, dict) or field not in data:
+                return []
+            data = data[field]
+        return [data]
+
+    return find
+
+
+@lru_cache(maxsize=2048)
+def compile_jsonpath(expr: str) -> Callable[[Any], List[Any]]:
+    """
+    JSONPath式を解析し、評価用の関数を作成する
+
+    同じ式は実行のたびに再解析せず、解析済みの関数を再利用します。
+    `$.id` のような単純なドット区切りのパスは jsonpath_ng を使わずに辞書の参照だけで評価します。
+
+    Args:
+        expr: JSONPath式
+
+    Returns:
+        データを受け取り、一致した値のリストを返す関数
+
+    Raises:
+        Exception: JSONPath式の解析に失敗した場合
+    """
+    if _DOTTED_PATH_RE.fullmatch(expr):
+        fields = expr[2:].split(".")
+        if not _RESERVED_FIELD_NAMES.intersection(fields):
+            return _compile_dotted_path(fields)
+
+    jsonpath_expr = jsonpath_ng.parse(expr)
+
+    def find(data: Any) -> List[Any]:
+        return [match.value for match in jsonpath_expr.find(data)]
+
+    return find
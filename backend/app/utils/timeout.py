@@ -78,7 +78,8 @@ def timeout(seconds: Optional[Union[float, str]] = None, timeout_key: Optional[s
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             timeout_value = _resolve_timeout(seconds, timeout_key)
             
-            if not hasattr(signal, 'SIGALRM'):
+            # SIGALRMはメインスレッドでしか扱えないため、ワーカースレッドからの呼び出しはスレッド方式で処理する
+            if not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
                 return _thread_based_timeout(func, timeout_value, *args, **kwargs)
             
             def timeout_handler(signum: int, frame: Any) -> None:
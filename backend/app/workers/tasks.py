@@ -1,10 +1,10 @@
 import json
 import os
-import yaml
 import logging
 from app.workers import celery_app
 from app.services.chain_generator import DependencyAwareRAG, ChainStore
 from app.services.schema import get_schema_content
+from app.services.openapi.parser import load_schema_content
 from app.services.endpoint_chain_generator import EndpointChainGenerator
 from app.config import settings
 from app.models import Endpoint, Service
@@ -39,7 +39,7 @@ def generate_test_suites_task(service_id: int, error_types: Optional[List[str]]
         if schema_file.endswith('.json'):
             schema = json.loads(schema_content)
         else:
-            schema = yaml.safe_load(schema_content)
+            schema = load_schema_content(schema_content)
         
         rag = DependencyAwareRAG(service_id, schema, error_types)
         
@@ -55,13 +55,16 @@ def generate_test_suites_task(service_id: int, error_types: Optional[List[str]]
         return {"status": "error", "message": str(e)}
 
 @celery_app.task
-def generate_test_suites_for_endpoints_task(service_id: int, endpoint_ids: List[str], error_types: Optional[List[str]] = None) -> Dict:
+def generate_test_suites_for_endpoints_task(service_id: int, endpoint_ids: List[str], error_types: Optional[List[str]] = None,
+                                            force_refresh: bool = False) -> Dict:
     """
     選択したエンドポイントからテストスイートを生成するタスク
     
     Args:
         service_id: サービスID (int)
         endpoint_ids: 選択したエンドポイントIDのリスト
+        error_types: 生成する異常系テストの種類のリスト
+        force_refresh: Trueの場合、キャッシュされたテストスイートを使用せずにLLMで生成し直す
         
     Returns:
         生成結果
@@ -98,14 +101,14 @@ def generate_test_suites_for_endpoints_task(service_id: int, endpoint_ids: List[
             if schema_file.endswith('.json'):
                 schema = json.loads(schema_content)
             else:
-                schema = yaml.safe_load(schema_content)
+                schema = load_schema_content(schema_content)
 
             generated_suites_count = 0
             all_generated_suites = []
             
             generator = EndpointChainGenerator(service_id, selected_endpoints, schema, error_types)
             
-            generated_suites = generator.generate_chains()
+            generated_suites = generator.generate_chains(force_refresh=force_refresh)
             for i, suite in enumerate(generated_suites):
                 if suite.get('test_cases'):
                     first_case = suite['test_cases'][0]
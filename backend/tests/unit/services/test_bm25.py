@@ -0,0 +1,42 @@
+"""
+BM25によるキーワード検索のユニットテスト
+"""
+
+import pytest
+
+from app.services.rag.bm25 import BM25Index, tokenize
+
+
+def test_tokenize_splits_identifiers_into_subwords():
+    """識別子そのものとcamelCase・snake_caseの構成単語がトークンになることのテスト"""
+    assert tokenize("GET /users/{user_id} employeeId") == [
+        "get", "users", "user_id", "user", "id", "employeeid", "employee", "id"
+    ]
+
+
+def test_search_ranks_documents_containing_rare_identifiers_first():
+    """クエリ中の出現の少ない識別子を含むドキュメントが上位になることのテスト"""
+    index = BM25Index([
+        "POST /users name email",
+        "POST /employees employeeId name",
+        "GET /projects name",
+    ])
+
+    results = index.search("employeeId name", k=3)
+
+    assert results[0][0] == 1
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_search_ignores_unknown_terms_and_empty_index():
+    """クエリの単語を含まないドキュメントが結果に含まれないことのテスト"""
+    assert BM25Index(["POST /users"]).search("orders", k=5) == []
+    assert BM25Index([]).search("users", k=5) == []
+
+
+@pytest.mark.parametrize("k", [1, 2])
+def test_search_limits_results_to_k(k):
+    """結果が指定した件数に制限されることのテスト"""
+    index = BM25Index(["users a", "users b", "users c"])
+
+    assert len(index.search("users", k=k)) == k
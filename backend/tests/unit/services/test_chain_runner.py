@@ -108,6 +108,22 @@ async def test_extract_values():
     assert extracted["user_id"] == "123"
     assert extracted["user_name"] == "Test User"
 
+@pytest.mark.asyncio
+async def test_extract_values_nested_and_indexed_paths():
+    """ネストしたパス・配列のインデックスを含むパス・存在しないパスの値抽出のテスト"""
+    runner = ChainRunner(session=MagicMock(), test_suite=MagicMock())
+    response_body = {"data": {"user": {"id": 1, "deleted_at": None}, "items": [{"id": "a"}, {"id": "b"}]}}
+    extract_rules = {
+        "user_id": "$.data.user.id",
+        "deleted_at": "$.data.user.deleted_at",
+        "second_item_id": "$.data.items[1].id",
+        "missing": "$.data.user.id.value",
+    }
+
+    extracted = runner._extract_values(response_body, extract_rules)
+
+    assert extracted == {"user_id": 1, "deleted_at": None, "second_item_id": "b"}
+
 @pytest.mark.asyncio
 async def test_variable_manager_replace():
     """VariableManagerによる変数置換のテスト"""
@@ -0,0 +1,983 @@
+"""
+EndpointChainGeneratorのユニットテスト
+
+エンドポイントごとのテストスイート生成処理のテストを行います。
+"""
+
+import asyncio
+import threading
+import orjson
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+
+from app.config import settings
+from app.services.endpoint_chain_generator import (
+    TEST_SUITE_SCHEMA, EndpointChainGenerator, _dumps_json, _first_path_segment, _path_params, schema_info_cache, suite_response_cache
+)
+from app.services.llm.client import LLMException, MessageRole
+from app.services.llm.prompts import PromptTemplate
+from app.models import Endpoint
+from app.schemas.service import Endpoint as EndpointSchema
+from langchain_core.documents import Document
+
+
+def _make_suite(method: str, path: str) -> dict:
+    """LLMが返すテストスイートのダミーデータを作成する"""
+    return {
+        "name": f"{method} {path} Test Suite",
+        "target_method": method,
+        "target_path": path,
+        "test_cases": [
+            {
+                "name": "Normal case",
+                "description": "正常系",
+                "error_type": None,
+                "test_steps": [
+                    {
+                        "method": method,
+                        "path": path,
+                        "request_headers": {},
+                        "request_body": None,
+                        "request_params": {},
+                        "extract_rules": {},
+                        "expected_status": 200
+                    }
+                ]
+            }
+        ]
+    }
+
+
+@pytest.fixture(autouse=True)
+def clear_schema_info_cache():
+    """テスト間で関連スキーマ情報とテストスイートのキャッシュを共有しないようにする"""
+    schema_info_cache.clear()
+    suite_response_cache.clear()
+    yield
+    schema_info_cache.clear()
+    suite_response_cache.clear()
+
+
+@pytest.fixture
+def endpoints():
+    """テスト用のエンドポイントリスト"""
+    return [
+        Endpoint(id=i, service_id=1, method="GET", path=f"/items{i}", summary=f"Get items {i}")
+        for i in range(6)
+    ]
+
+
+def _make_llm_client(respond):
+    """
+    個々のメッセージごとの応答関数でLLM呼び出しを処理するLLMクライアントのモックを作成する
+    """
+    async def call(messages, **kwargs):
+        result = respond(messages)
+        return await result if asyncio.iscoroutine(result) else result
+
+    mock_client = Mock()
+    mock_client.acall_with_json_response = AsyncMock(side_effect=call)
+    return mock_client
+
+
+def _sent_messages(mock_client):
+    """LLMクライアントのモックに送信されたメッセージのリストを取得する"""
+    return [call.args[0] for call in mock_client.acall_with_json_response.call_args_list]
+
+
+class TestGenerateChains:
+    """generate_chainsのテストクラス"""
+
+    def test_generate_chains_limits_concurrency_and_keeps_order(self, endpoints, monkeypatch):
+        """LLM呼び出しが同時実行数の上限内で並行して行われ、結果の順序が保持されることのテスト"""
+        monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 3)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def respond(messages):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            prompt = messages[-1].content
+            target = next(ep for ep in reversed(endpoints) if f"{ep.method} {ep.path}\n" in prompt)
+            return _make_suite(target.method, target.path)
+
+        mock_client = _make_llm_client(respond)
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            chains = generator.generate_chains()
+
+        assert [chain["target_path"] for chain in chains] == [ep.path for ep in endpoints]
+        assert mock_client.acall_with_json_response.call_count == len(endpoints)
+        assert 1 < max_in_flight <= 3
+
+    def test_generate_chains_sends_shared_system_prompt(self, endpoints):
+        """共通の指示がシステムメッセージとして全エンドポイントで同一内容で送信されることのテスト"""
+        mock_client = _make_llm_client(lambda messages: _make_suite("GET", "/items0"))
+
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints[:3], error_types=["not_found"])
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            generator.generate_chains()
+
+        sent_messages = _sent_messages(mock_client)
+        system_prompts = {messages[0].content for messages in sent_messages}
+
+        assert all(messages[0].role == MessageRole.SYSTEM for messages in sent_messages)
+        assert len(system_prompts) == 1
+        assert "not_found" in system_prompts.pop()
+        assert all(messages[-1].role == MessageRole.USER for messages in sent_messages)
+        for endpoint in endpoints[:3]:
+            assert any(f"{endpoint.method} {endpoint.path}\n" in messages[-1].content for messages in sent_messages)
+
+    def test_generate_chains_uses_fallback_template_when_not_registered(self, endpoints):
+        """テンプレートが登録されていない場合に組み込みのテンプレートで送信されることのテスト"""
+        mock_client = _make_llm_client(lambda messages: _make_suite("GET", "/items0"))
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints[:1])
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch("app.services.endpoint_chain_generator.get_prompt_template", side_effect=KeyError("endpoint_test_generation")), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            chains = generator.generate_chains()
+
+        messages = _sent_messages(mock_client)[0]
+        assert len(chains) == 1
+        assert messages[0].content.startswith("You are an expert in API testing.")
+        assert messages[-1].content.startswith("Target endpoint:\nEndpoint: GET /items0")
+
+    @pytest.mark.parametrize("structured_output", [True, False])
+    def test_generate_chains_requests_structured_output(self, endpoints, monkeypatch, structured_output):
+        """設定に応じてテストスイートのJSONスキーマで出力形式の制約を指定することのテスト"""
+        monkeypatch.setattr(settings, "LLM_STRUCTURED_OUTPUT", structured_output)
+        mock_client = _make_llm_client(lambda messages: _make_suite("GET", "/items0"))
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints[:1])
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            generator.generate_chains()
+
+        expected_schema = TEST_SUITE_SCHEMA if structured_output else None
+        assert mock_client.acall_with_json_response.call_args.kwargs == {"response_schema": expected_schema}
+
+    def test_generate_chains_builds_contexts_in_worker_threads(self, endpoints):
+        """コンテキスト構築がワーカースレッドで実行されることのテスト"""
+        context_threads = []
+
+        def fake_schema_info(endpoint):
+            context_threads.append(threading.current_thread())
+            return "No schema"
+
+        mock_client = _make_llm_client(lambda messages: _make_suite("GET", "/items0"))
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", side_effect=fake_schema_info):
+            chains = generator.generate_chains()
+
+        assert len(chains) == len(endpoints)
+        assert len(context_threads) == len(endpoints)
+        assert all(thread is not threading.main_thread() for thread in context_threads)
+
+    def test_generate_chains_falls_back_on_llm_error(self, endpoints):
+        """LLM呼び出しに失敗したエンドポイントはフォールバックチェーンになることのテスト"""
+        target_endpoints = endpoints[:2]
+
+        def respond(messages):
+            if "/items0\n" in messages[-1].content:
+                raise LLMException("LLM error")
+            return _make_suite("GET", "/items1")
+
+        mock_client = _make_llm_client(respond)
+        generator = EndpointChainGenerator(service_id=1, endpoints=target_endpoints)
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            chains = generator.generate_chains()
+
+        assert len(chains) == 2
+        assert chains[0] == generator._generate_fallback_chain(target_endpoints[0])
+        assert chains[1]["target_path"] == "/items1"
+
+    def test_generate_chains_deduplicates_identical_endpoints(self, endpoints):
+        """構造が同一のエンドポイントはLLMを1回だけ呼び出し、結果が複製されることのテスト"""
+        duplicate = Endpoint(id=99, service_id=1, method="GET", path="/items0", summary="Get items 0")
+        target_endpoints = [endpoints[0], endpoints[1], duplicate]
+
+        def respond(messages):
+            path = "/items0" if "/items0\n" in messages[-1].content else "/items1"
+            return _make_suite("GET", path)
+
+        mock_client = _make_llm_client(respond)
+        generator = EndpointChainGenerator(service_id=1, endpoints=target_endpoints)
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            chains = generator.generate_chains()
+
+        assert mock_client.acall_with_json_response.call_count == 2
+        assert [chain["target_path"] for chain in chains] == ["/items0", "/items1", "/items0"]
+        assert chains[2] == chains[0]
+        assert chains[2] is not chains[0]
+
+    def test_generate_chains_stream_yields_in_completion_order(self, endpoints):
+        """ストリーム生成では完了したものから順に返され、重複したエンドポイントにはコピーが返されることのテスト"""
+        duplicate = Endpoint(id=99, service_id=1, method="GET", path="/items0", summary="Get items 0")
+        target_endpoints = [endpoints[0], endpoints[1], duplicate]
+
+        async def respond(messages):
+            # /items0 の応答を遅らせ、/items1 が先に完了するようにする
+            if "/items0\n" in messages[-1].content:
+                await asyncio.sleep(0.05)
+                return _make_suite("GET", "/items0")
+            return _make_suite("GET", "/items1")
+
+        mock_client = _make_llm_client(respond)
+        generator = EndpointChainGenerator(service_id=1, endpoints=target_endpoints)
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            chains = list(generator.generate_chains_stream())
+
+        assert [chain["target_path"] for chain in chains] == ["/items1", "/items0", "/items0"]
+        assert chains[1] == chains[2]
+        assert chains[1] is not chains[2]
+        assert mock_client.acall_with_json_response.call_count == 2
+
+    def test_generate_chains_reuses_cached_suites(self, endpoints):
+        """同じプロンプトでの再生成時にキャッシュされたテストスイートが使用されることのテスト"""
+        mock_client = _make_llm_client(lambda messages: _make_suite("GET", "/items0"))
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints[:1])
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            first = generator.generate_chains()
+            first[0]["name"] = "modified"
+            second = generator.generate_chains()
+
+        assert mock_client.acall_with_json_response.call_count == 1
+        assert second[0]["target_path"] == "/items0"
+        assert second[0]["name"] != "modified"
+
+    def test_generate_chains_force_refresh_skips_cache(self, endpoints):
+        """force_refreshを指定した場合にキャッシュを使用せずLLMが呼び出されることのテスト"""
+        mock_client = _make_llm_client(lambda messages: _make_suite("GET", "/items0"))
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints[:1])
+
+        with patch("app.services.endpoint_chain_generator.LLMClientFactory.get_shared", return_value=mock_client), \
+             patch.object(generator, "_get_relevant_schema_info", return_value="No schema"):
+            generator.generate_chains()
+            generator.generate_chains(force_refresh=True)
+
+        assert mock_client.acall_with_json_response.call_count == 2
+
+
+class TestPromptTokenBudget:
+    """プロンプト長の制限のテストクラス"""
+
+    def test_relevant_schema_info_is_truncated_to_context_window(self, endpoints, monkeypatch):
+        """関連スキーマ情報がコンテキスト長に収まるように見出し単位で切り詰められることのテスト"""
+        monkeypatch.setattr(settings, "LLM_CONTEXT_WINDOW", 600)
+        monkeypatch.setattr(settings, "LLM_OUTPUT_TOKEN_BUDGET", 200)
+        schema_info = "\n".join(f"### Source {i}\n```\n{'x' * 400}\n```\n" for i in range(10))
+        template = PromptTemplate("{target_endpoint_info}\n{relevant_schema_info}\n{error_types_instruction}")
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+
+        with patch.object(generator, "_get_relevant_schema_info", return_value=schema_info):
+            messages = generator._build_prompt_messages(endpoints[0], template, "system", False, "")
+
+        prompt = messages[-1].content
+        assert len(prompt) <= (600 - 200) * 4
+        assert "### Source 0" in prompt
+        assert "### Source 9" not in prompt
+        assert prompt.rstrip().endswith("(Remaining schema information omitted due to context length.)")
+
+    def test_relevant_schema_info_is_kept_when_within_budget(self, endpoints):
+        """コンテキスト長に収まる場合は関連スキーマ情報がそのまま使われることのテスト"""
+        template = PromptTemplate("{target_endpoint_info}\n{relevant_schema_info}\n{error_types_instruction}")
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+
+        with patch.object(generator, "_get_relevant_schema_info", return_value="### Source 1\nschema"):
+            messages = generator._build_prompt_messages(endpoints[0], template, None, False, "")
+
+        assert "### Source 1\nschema\n" in messages[-1].content
+
+    def test_unreferenced_context_is_not_built(self, endpoints):
+        """テンプレートが参照しないコンテキスト項目は構築されないことのテスト"""
+        template = PromptTemplate("{dependency_graph}\n{target_endpoint}\n{relevant_schema_info}")
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+
+        with patch.object(generator, "_get_relevant_schema_info", return_value="No schema"), \
+             patch.object(generator, "_determine_execution_order") as mock_order:
+            generator._build_prompt_messages(endpoints[0], template, None, True, "")
+
+        mock_order.assert_not_called()
+
+
+class TestProcessSuiteResponse:
+    """LLM応答の検証処理のテストクラス"""
+
+    def test_process_suite_response_accepts_valid_suite(self, endpoints):
+        """正しい構造のテストスイートがそのまま返されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        suite = _make_suite("GET", "/items0")
+
+        assert generator._process_suite_response(suite, endpoints[0], False) == suite
+
+    @pytest.mark.parametrize("remove", [
+        lambda suite: suite.pop("target_path"),
+        lambda suite: suite["test_cases"][0].pop("error_type"),
+        lambda suite: suite["test_cases"][0]["test_steps"][0].pop("expected_status"),
+        lambda suite: suite.update(test_cases="not a list"),
+        lambda suite: suite["test_cases"][0]["test_steps"][0].update(expected_status="201"),
+        lambda suite: suite["test_cases"][0]["test_steps"][0].update(request_headers=["Accept"]),
+    ])
+    def test_process_suite_response_rejects_invalid_structure(self, endpoints, remove):
+        """必須項目が欠けたテストスイートが破棄されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        suite = _make_suite("GET", "/items0")
+        remove(suite)
+
+        assert generator._process_suite_response(suite, endpoints[0], False) is None
+
+    def test_process_suite_response_normalizes_step_fields(self, endpoints):
+        """文字列やNoneで返されたステップのフィールドが辞書に正規化されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        suite = _make_suite("GET", "/items0")
+        step = suite["test_cases"][0]["test_steps"][0]
+        step["extract_rules"] = '{"item_id": "$.id"}'
+        step["request_body"] = None
+
+        result = generator._process_suite_response(suite, endpoints[0], False)
+
+        normalized_step = result["test_cases"][0]["test_steps"][0]
+        assert normalized_step["extract_rules"] == {"item_id": "$.id"}
+        assert normalized_step["request_body"] == {}
+
+    @pytest.mark.parametrize("value, expected", [
+        (" null ", {}),
+        ("None", {}),
+        ("{}", {}),
+        ('  {"a": 1}\n', {"a": 1}),
+        ("not json", {}),
+        (None, {}),
+        (1, {}),
+        ({"a": 1}, {"a": 1}),
+    ])
+    def test_normalize_step_data_fields(self, endpoints, value, expected):
+        """各種形式のフィールド値が辞書に正規化されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+
+        normalized = generator._normalize_step_data_fields({"method": "GET", "request_headers": value})
+
+        assert normalized == {"method": "GET", "request_headers": expected}
+
+
+    def test_normalize_step_data_fields_returns_input_when_unchanged(self, endpoints):
+        """変換が不要なステップはコピーされず、変換が必要なステップは入力を変更しないことのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        valid_step = {"method": "GET", "request_headers": {}, "request_body": {"a": 1}}
+        string_step = {"method": "GET", "request_headers": "{}", "request_body": {"a": 1}}
+
+        assert generator._normalize_step_data_fields(valid_step) is valid_step
+        normalized = generator._normalize_step_data_fields(string_step)
+        assert normalized == {"method": "GET", "request_headers": {}, "request_body": {"a": 1}}
+        assert string_step["request_headers"] == "{}"
+
+class TestVectorSearch:
+    """ベクトル検索のテストクラス"""
+
+    @patch("app.services.endpoint_chain_generator.VectorDBManagerFactory")
+    def test_vectordb_manager_is_reused_across_endpoints(self, mock_factory, endpoints):
+        """ベクトルDBマネージャーがエンドポイントごとに再生成されないことのテスト"""
+        mock_manager = Mock()
+        mock_manager.similarity_search_batch.side_effect = lambda queries, k: [[] for _ in queries]
+        mock_factory.create_default.return_value = mock_manager
+
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        for endpoint in endpoints:
+            generator._perform_vector_search(endpoint)
+
+        mock_factory.create_default.assert_called_once_with(service_id=1)
+
+    @patch("app.services.endpoint_chain_generator.VectorDBManagerFactory")
+    def test_vector_search_queries_are_batched(self, mock_factory, endpoints):
+        """全エンドポイントのベクトル検索が1回のバッチ検索で実行され、結果が各エンドポイントに対応することのテスト"""
+        def fake_batch(queries, k):
+            return [[Document(page_content=f"chunk for {query}", metadata={})] for query in queries]
+
+        mock_manager = Mock()
+        mock_manager.similarity_search_batch.side_effect = fake_batch
+        mock_factory.create_default.return_value = mock_manager
+
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        results = [generator._perform_vector_search(endpoint) for endpoint in endpoints]
+
+        mock_manager.similarity_search_batch.assert_called_once()
+        assert len(mock_manager.similarity_search_batch.call_args.args[0]) == len(endpoints)
+        mock_manager.similarity_search.assert_not_called()
+        for endpoint, endpoint_results in zip(endpoints, results):
+            assert endpoint_results[0]["content"] == f"chunk for {generator._build_enhanced_query(endpoint)}"
+
+    @patch("app.services.endpoint_chain_generator.VectorDBManagerFactory")
+    def test_vector_search_falls_back_when_batch_fails(self, mock_factory, endpoints):
+        """バッチ検索に失敗した場合はエンドポイントごとの検索にフォールバックすることのテスト"""
+        mock_manager = Mock()
+        mock_manager.similarity_search_batch.side_effect = RuntimeError("batch failed")
+        mock_manager.similarity_search.return_value = [Document(page_content="chunk", metadata={})]
+        mock_factory.create_default.return_value = mock_manager
+
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints[:2])
+        results = [generator._perform_vector_search(endpoint) for endpoint in endpoints[:2]]
+
+        assert mock_manager.similarity_search_batch.call_count == 1
+        assert mock_manager.similarity_search.call_count == 2
+        assert all(endpoint_results[0]["content"] == "chunk" for endpoint_results in results)
+
+    def test_enhanced_query_uses_field_names_and_is_truncated(self):
+        """検索クエリにはパラメータ名とボディの最上位プロパティ名のみが含まれ、長さが制限されることのテスト"""
+        endpoint = Endpoint(
+            id=1,
+            service_id=1,
+            method="POST",
+            path="/users",
+            description="x" * 5000,
+            request_body={"content": {"application/json": {"schema": {
+                "type": "object",
+                "properties": {"name": {"type": "string", "description": "User name"}, "email": {"type": "string"}}
+            }}}},
+            request_query_params={"dry_run": {"required": False}}
+        )
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint])
+
+        query = generator._build_enhanced_query(endpoint)
+        short_query = generator._build_enhanced_query(Endpoint(
+            id=2, service_id=1, method="POST", path="/users",
+            request_body=endpoint.request_body, request_query_params=endpoint.request_query_params
+        ))
+
+        assert len(query) <= 1000
+        assert "params: dry_run" in short_query
+        assert "body_keys: name,email" in short_query
+        assert "User name" not in short_query
+
+
+class TestRelevantSchemaInfoCache:
+    """関連スキーマ情報キャッシュのテストクラス"""
+
+    @pytest.fixture
+    def schema(self):
+        """テスト用のOpenAPIスキーマ"""
+        return {
+            "openapi": "3.0.0",
+            "info": {"title": "Test API", "version": "1.0.0"},
+            "paths": {"/items0": {"get": {"summary": "Get items 0", "responses": {"200": {"description": "OK"}}}}}
+        }
+
+    def test_relevant_schema_info_is_reused_across_generators(self, endpoints, schema):
+        """同じスキーマとエンドポイントであれば別インスタンスでも検索結果が再利用されることのテスト"""
+        hybrid_results = [{"source": "vector_search", "score": 1.0, "content": "schema chunk", "metadata": {}, "search_type": "semantic"}]
+
+        with patch.object(EndpointChainGenerator, "_perform_hybrid_search", return_value=hybrid_results) as mock_search:
+            first = EndpointChainGenerator(service_id=1, endpoints=endpoints, schema=schema)._get_relevant_schema_info(endpoints[0])
+            second = EndpointChainGenerator(service_id=1, endpoints=endpoints, schema=schema)._get_relevant_schema_info(endpoints[0])
+
+        assert first == second
+        mock_search.assert_called_once()
+
+    def test_relevant_schema_info_is_recomputed_when_schema_changes(self, endpoints, schema):
+        """スキーマが変わった場合は検索をやり直すことのテスト"""
+        hybrid_results = [{"source": "vector_search", "score": 1.0, "content": "schema chunk", "metadata": {}, "search_type": "semantic"}]
+        changed_schema = {**schema, "info": {"title": "Test API", "version": "2.0.0"}}
+
+        with patch.object(EndpointChainGenerator, "_perform_hybrid_search", return_value=hybrid_results) as mock_search:
+            EndpointChainGenerator(service_id=1, endpoints=endpoints, schema=schema)._get_relevant_schema_info(endpoints[0])
+            EndpointChainGenerator(service_id=1, endpoints=endpoints, schema=changed_schema)._get_relevant_schema_info(endpoints[0])
+
+        assert mock_search.call_count == 2
+
+    def test_relevant_schema_info_handles_integers_beyond_64_bits(self, endpoints, schema):
+        """orjsonで変換できない64ビットを超える整数を含むスキーマでも検索結果が得られることのテスト"""
+        hybrid_results = [{"source": "vector_search", "score": 1.0, "content": "schema chunk", "metadata": {}, "search_type": "semantic"}]
+        big_schema = {
+            **schema,
+            "components": {"schemas": {"Item": {"type": "integer", "maximum": 99999999999999999999}}},
+            "x-status": {200: "OK", "default": "Error"},
+        }
+
+        with patch.object(EndpointChainGenerator, "_perform_hybrid_search", return_value=hybrid_results):
+            schema_info = EndpointChainGenerator(service_id=1, endpoints=endpoints, schema=big_schema)._get_relevant_schema_info(endpoints[0])
+
+        assert "schema chunk" in schema_info
+        assert _dumps_json({"maximum": 99999999999999999999}) == '{"maximum":99999999999999999999}'
+
+    def test_relevant_schema_info_skips_cache_when_key_cannot_be_built(self, endpoints, schema):
+        """キャッシュキーを生成できない場合もキャッシュを使わずに検索結果が得られることのテスト"""
+        hybrid_results = [{"source": "vector_search", "score": 1.0, "content": "schema chunk", "metadata": {}, "search_type": "semantic"}]
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints, schema=schema)
+
+        with patch.object(generator, "_get_schema_fingerprint", side_effect=RuntimeError("boom")), \
+             patch.object(EndpointChainGenerator, "_perform_hybrid_search", return_value=hybrid_results) as mock_search:
+            first = generator._get_relevant_schema_info(endpoints[0])
+            second = generator._get_relevant_schema_info(endpoints[0])
+            queries = generator._collect_vector_search_queries("query")
+
+        assert "schema chunk" in first
+        assert first == second
+        assert mock_search.call_count == 2
+        assert len(queries) == 1 + len({generator._build_enhanced_query(endpoint) for endpoint in endpoints} - {"query"})
+
+
+class TestDirectSchemaExtraction:
+    """スキーマからの直接抽出のテストクラス"""
+
+    @pytest.fixture
+    def schema(self):
+        """$refを含むテスト用のOpenAPIスキーマ"""
+        return {
+            "openapi": "3.0.0",
+            "info": {"title": "Test API", "version": "1.0.0"},
+            "paths": {
+                "/users": {
+                    "post": {
+                        "requestBody": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/UserCreate"}}}},
+                        "responses": {"201": {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/User"}}}}}
+                    }
+                }
+            },
+            "components": {
+                "schemas": {
+                    "UserCreate": {"type": "object", "properties": {"name": {"type": "string"}}},
+                    "User": {"type": "object", "properties": {"id": {"type": "integer"}, "name": {"type": "string"}}}
+                }
+            }
+        }
+
+    def test_resolve_ref_uses_index_and_json_pointer(self, schema):
+        """components配下は索引から、それ以外はJSON Pointerとして解決されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=[], schema=schema)
+
+        assert generator._resolve_ref("#/components/schemas/User") is schema["components"]["schemas"]["User"]
+        assert generator._resolve_ref("#/components/schemas/User/properties/id") == {"type": "integer"}
+        assert generator._resolve_ref("#/paths/~1users/post") is schema["paths"]["/users"]["post"]
+        assert generator._resolve_ref("#/components/schemas/Missing") is None
+
+    def test_ref_index_uses_escaped_component_names(self, schema):
+        """名前に "/" や "~" を含むコンポーネントがエスケープされた$refのパスで索引されることのテスト"""
+        schema["components"]["schemas"]["v1/User~Old"] = {"type": "object"}
+        generator = EndpointChainGenerator(service_id=1, endpoints=[], schema=schema)
+
+        assert "#/components/schemas/v1~1User~0Old" in generator._ref_index
+        assert generator._resolve_ref("#/components/schemas/v1~1User~0Old") is schema["components"]["schemas"]["v1/User~Old"]
+
+    def test_related_schemas_match_case_insensitively_and_are_cached(self, schema):
+        """リソース名を大文字小文字を区別せずに含むスキーマが取得され、結果が再利用されることのテスト"""
+        schema["components"]["schemas"]["Post"] = {"type": "object"}
+        generator = EndpointChainGenerator(service_id=1, endpoints=[], schema=schema)
+
+        related = generator._get_related_schemas("USER")
+
+        assert [name for name, _ in related] == ["UserCreate", "User"]
+        assert generator._get_related_schemas("user") is related
+
+    def test_extract_schema_info_directly_includes_resolved_refs(self, schema):
+        """リクエスト・レスポンスの$ref先の定義が抽出結果に含まれることのテスト"""
+        endpoint = Endpoint(
+            id=1,
+            service_id=1,
+            method="POST",
+            path="/users",
+            request_body=schema["paths"]["/users"]["post"]["requestBody"],
+            responses=schema["paths"]["/users"]["post"]["responses"]
+        )
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        info = generator._extract_schema_info_directly(endpoint)
+
+        assert "## Request Body Schema Reference: #/components/schemas/UserCreate" in info
+        assert "## Response Schema Reference for status 201: #/components/schemas/User" in info
+        assert generator._dumps_schema_node(schema["components"]["schemas"]["User"]) in info
+
+    def test_keyword_search_finds_endpoint_info_by_identifier(self, schema):
+        """キーワード検索で識別子を含むエンドポイント情報が見つかり、依存関係ベース検索と同じ内容になることのテスト"""
+        schema["paths"]["/projects"] = {"get": {"summary": "List projects", "responses": {"200": {"description": "OK"}}}}
+        endpoint = Endpoint(id=1, service_id=1, method="GET", path="/users/{user_id}", summary="Get a user")
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        results = generator._perform_keyword_search(endpoint)
+
+        assert results[0]["search_type"] == "keyword"
+        assert results[0]["metadata"] == {"path": "/users", "method": "POST"}
+        assert results[0]["content"] == generator._get_endpoint_info_from_schema("/users", "post")
+        assert generator._get_keyword_index() is generator._get_keyword_index()
+
+    def test_extract_schema_info_directly_reads_dict_fields_without_validation(self, schema):
+        """辞書として読み込まれたフィールドはスキーマモデルに変換せずに参照されることのテスト"""
+        endpoint = Endpoint(
+            id=1,
+            service_id=1,
+            method="POST",
+            path="/users",
+            request_body=schema["paths"]["/users"]["post"]["requestBody"],
+            responses=schema["paths"]["/users"]["post"]["responses"]
+        )
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        with patch("app.services.endpoint_chain_generator.EndpointSchema.model_validate") as model_validate:
+            info = generator._extract_schema_info_directly(endpoint)
+
+        model_validate.assert_not_called()
+        assert "## Request Body Schema Reference: #/components/schemas/UserCreate" in info
+
+    def test_extract_schema_info_directly_parses_json_string_fields(self, schema):
+        """JSON文字列のフィールドはスキーマモデルで変換して参照されることのテスト"""
+        endpoint = Endpoint(
+            id=1,
+            service_id=1,
+            method="POST",
+            path="/users",
+            request_body=orjson.dumps(schema["paths"]["/users"]["post"]["requestBody"]).decode()
+        )
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        info = generator._extract_schema_info_directly(endpoint)
+
+        assert "## Request Body Schema Reference: #/components/schemas/UserCreate" in info
+
+    def test_extract_schema_info_directly_outputs_each_ref_once(self, schema):
+        """複数箇所から参照されるコンポーネントの定義が1回だけ出力されることのテスト"""
+        user_ref = {"content": {"application/json": {"schema": {"$ref": "#/components/schemas/User"}}}}
+        endpoint = Endpoint(
+            id=1,
+            service_id=1,
+            method="PUT",
+            path="/user",
+            responses={"200": user_ref, "201": user_ref}
+        )
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        info = generator._extract_schema_info_directly(endpoint)
+
+        assert "## Response Schema Reference for status 200: #/components/schemas/User" in info
+        assert "## Response Schema Reference for status 201: #/components/schemas/User\nSame schema as shown above." in info
+        assert "## Related Component Schema: User\n" not in info
+        assert "## Related Component Schema: UserCreate" in info
+        assert info.count(generator._dumps_schema_node(schema["components"]["schemas"]["User"])) == 1
+
+
+class TestMergeAndRankResults:
+    """ハイブリッド検索結果の統合のテストクラス"""
+
+    @staticmethod
+    def _result(content: str, score: float, search_type: str) -> dict:
+        return {"content": content, "score": score, "search_type": search_type, "metadata": {}}
+
+    def test_results_are_fused_by_rank(self, endpoints):
+        """両方の検索で見つかった結果が上位になり、入力が変更されないことのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        dependency_results = [
+            self._result("dep-low", 0.5, "dependency"),
+            self._result("shared", 0.9, "dependency"),
+        ]
+        vector_results = [
+            self._result("vec-top", 1.0, "semantic"),
+            self._result("shared", 0.9, "semantic"),
+        ]
+
+        results = generator._merge_and_rank_results(vector_results, dependency_results, endpoints[0])
+
+        assert [result["content"] for result in results] == ["shared", "dep-low", "vec-top"]
+        assert results[0]["search_type"] == "dependency"
+        assert results[0]["final_score"] == pytest.approx(1.5 / 61 + 1.0 / 62)
+        assert all("final_score" not in result for result in dependency_results + vector_results)
+
+    def test_results_with_common_prefix_are_kept(self, endpoints):
+        """先頭が共通するだけの異なる内容の結果が重複として除去されないことのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        prefix = "## Path: /users\n" + "x" * 200
+        vector_results = [
+            self._result(prefix + "GET", 1.0, "semantic"),
+            self._result(prefix + "POST", 0.9, "semantic"),
+            self._result(prefix + "GET", 0.8, "semantic"),
+        ]
+
+        results = generator._merge_and_rank_results(vector_results, [], endpoints[0])
+
+        assert [result["content"] for result in results] == [prefix + "GET", prefix + "POST"]
+
+    def test_results_are_limited_to_max_results(self, endpoints):
+        """統合後の結果が最大件数に制限されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        generator.max_results = 3
+        vector_results = [self._result(f"doc-{i}", 1.0 - i * 0.1, "semantic") for i in range(5)]
+
+        results = generator._merge_and_rank_results(vector_results, [], endpoints[0])
+
+        assert [result["content"] for result in results] == ["doc-0", "doc-1", "doc-2"]
+
+    def test_rerank_keeps_top_k_by_rerank_score(self, endpoints):
+        """再ランキングが有効な場合、候補全体を採点して上位 rerank_top_k 件に絞り込まれることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        generator.rerank_enabled = True
+        generator.max_results = 2
+        generator.rerank_candidates = 4
+        generator.rerank_top_k = 2
+        vector_results = [self._result(f"doc-{i}", 1.0 - i * 0.1, "semantic") for i in range(5)]
+        reranker = Mock()
+        reranker.score.side_effect = lambda pairs: [float(content[-1]) for _, content in pairs]
+
+        candidates = generator._merge_and_rank_results(vector_results, [], endpoints[0])
+        with patch("app.services.endpoint_chain_generator.get_default_reranker", return_value=reranker):
+            results = generator._rerank("query", candidates)
+
+        assert len(candidates) == 4
+        assert reranker.score.call_args.args[0][0] == ("query", "doc-0")
+        assert [(result["content"], result["rerank_score"]) for result in results] == [("doc-3", 3.0), ("doc-2", 2.0)]
+
+    def test_rerank_falls_back_to_fused_ranking_without_model(self, endpoints):
+        """再ランキングモデルを利用できない場合は統合時の上位 max_results 件が返されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=endpoints)
+        generator.max_results = 2
+        results = [self._result(f"doc-{i}", 1.0, "semantic") for i in range(3)]
+
+        with patch("app.services.endpoint_chain_generator.get_default_reranker", return_value=None):
+            assert generator._rerank("query", results) == results[:2]
+
+
+class TestBuildEndpointContext:
+    """_build_endpoint_contextのテストクラス"""
+
+    def test_build_endpoint_context_includes_all_sections(self):
+        """エンドポイントの各情報がコンテキストに順に含まれることのテスト"""
+        schema = {
+            "paths": {
+                "/users/{id}": {
+                    "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                    "put": {"parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "integer"}}]}
+                }
+            }
+        }
+        endpoint = Endpoint(
+            id=1,
+            service_id=1,
+            method="PUT",
+            path="/users/{id}",
+            summary="Update user",
+            request_body={"content": {"application/json": {"schema": {"type": "object"}}}},
+            request_headers={"X-Token": {"required": True}},
+            request_query_params={"dry_run": {}},
+            responses={"200": {"description": "OK", "content": {"application/json": {"schema": {"type": "object"}}}}}
+        )
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        context = generator._build_endpoint_context(endpoint)
+
+        expected_lines = [
+            "Endpoint: PUT /users/{id}",
+            "Summary: Update user",
+            "Request Body:",
+            "- X-Token (in header, required)",
+            "- dry_run (in query, optional)",
+            "Path Parameters:",
+            "- id (in path, required, type: integer)",
+            "- Status: 200",
+            "  Description: OK",
+            "  Content Type: application/json",
+        ]
+        positions = [context.index(line) for line in expected_lines]
+        assert positions == sorted(positions)
+        assert context.count("- id (in path") == 1
+
+    def test_build_endpoint_context_serializes_non_ascii_and_non_str_keys(self):
+        """日本語の説明や数値キーを含むスキーマも空白を含まないJSONとして出力されることのテスト"""
+        endpoint = Endpoint(
+            id=1,
+            service_id=1,
+            method="POST",
+            path="/users",
+            request_body={"description": "ユーザー作成", "x-examples": {1: "first"}},
+        )
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint])
+
+        context = generator._build_endpoint_context(endpoint)
+
+        assert '```json\n{"description":"ユーザー作成","x-examples":{"1":"first"}}\n```' in context
+
+    def test_endpoint_contexts_are_built_once(self):
+        """エンドポイントのコンテキストと依存元エンドポイントの情報が再利用されることのテスト"""
+        schema = {"paths": {"/users": {"post": {"summary": "Create user", "responses": {"201": {"description": "Created"}}}}}}
+        endpoint = Endpoint(id=1, service_id=1, method="POST", path="/users")
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        with patch.object(generator, "_format_endpoint_context", wraps=generator._format_endpoint_context) as format_context, \
+             patch.object(generator, "_format_endpoint_info_from_schema", wraps=generator._format_endpoint_info_from_schema) as format_info:
+            assert generator._build_endpoint_context(endpoint) == generator._build_endpoint_context(endpoint)
+            info = generator._get_endpoint_info_from_schema("/users", "post")
+            assert generator._get_endpoint_info_from_schema("/users", "POST") == info
+            assert generator._get_endpoint_info_from_schema("/missing", "get") is None
+            assert generator._get_endpoint_info_from_schema("/missing", "get") is None
+
+        assert format_context.call_count == 1
+        assert format_info.call_count == 2
+        assert info.startswith("## POST /users\n")
+
+    def test_endpoint_model_is_validated_once(self):
+        """コンテキスト構築とスキーマ情報の抽出で同じエンドポイントのモデルが再利用されることのテスト"""
+        schema = {"paths": {"/users": {"post": {"summary": "Create user"}}}}
+        endpoint = Endpoint(id=1, service_id=1, method="POST", path="/users")
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint], schema=schema)
+
+        with patch("app.services.endpoint_chain_generator.EndpointSchema.model_validate",
+                   wraps=EndpointSchema.model_validate) as model_validate:
+            generator._build_endpoint_context(endpoint)
+            generator._extract_schema_info_directly(endpoint)
+
+        assert model_validate.call_count == 1
+
+
+class TestGenerateSampleBody:
+    """サンプルリクエストボディ生成のテストクラス"""
+
+    def test_sample_body_uses_type_defaults(self):
+        """プロパティの型に応じたサンプル値が生成されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=[])
+        schema = {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "nickname": {},
+                "age": {"type": "integer"},
+                "score": {"type": "number"},
+                "active": {"type": "boolean"},
+                "tags": {"type": "array"},
+                "profile": {"type": "object"},
+                "deleted_at": {"type": ["string", "null"]},
+                "unknown": {"type": "null"},
+            }
+        }
+
+        sample_body = generator._generate_sample_body_from_schema(schema)
+
+        assert list(sample_body) == ["name", "nickname", "age", "score", "active", "tags", "profile"]
+        assert sample_body == {
+            "name": "Test name",
+            "nickname": "Test nickname",
+            "age": 1,
+            "score": 1,
+            "active": True,
+            "tags": [],
+            "profile": {},
+        }
+
+    def test_sample_body_does_not_share_mutable_values(self):
+        """配列とオブジェクトのサンプル値が呼び出し間で共有されないことのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=[])
+        schema = {"properties": {"tags": {"type": "array"}, "profile": {"type": "object"}}}
+
+        first = generator._generate_sample_body_from_schema(schema)
+        first["tags"].append("tag")
+        first["profile"]["key"] = "value"
+        second = generator._generate_sample_body_from_schema(schema)
+
+        assert second == {"tags": [], "profile": {}}
+        assert isinstance(second["tags"], list)
+
+    def test_sample_body_falls_back_to_default_body(self):
+        """プロパティがない場合は既定のボディが返されることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=[])
+
+        assert generator._generate_sample_body_from_schema({"type": "object"}) == {
+            "name": "Test name", "description": "Test description"
+        }
+
+    def test_fallback_chain_creates_path_parameter_resources(self):
+        """パスパラメータごとに作成ステップが追加され、既定のボディでターゲットが呼ばれることのテスト"""
+        endpoint = Endpoint(id=1, service_id=1, method="PUT", path="/users/{user_id}/posts/{id}")
+        generator = EndpointChainGenerator(service_id=1, endpoints=[endpoint])
+
+        chain = generator._generate_fallback_chain(endpoint)
+
+        create_user, create_post, target = chain["steps"]
+        assert (create_user["path"], create_user["response"]["extract"]) == ("/users", {"user_id": "$.id"})
+        assert (create_post["path"], create_post["response"]["extract"]) == ("/users", {"id": "$.id"})
+        assert target["request"]["body"] == {"name": "Test name", "description": "Test description"}
+
+    @pytest.mark.parametrize("path, expected", [
+        ("/users/{user_id}/posts", "users"),
+        ("users/", "users"),
+        ("/", ""),
+        ("", ""),
+    ])
+    def test_first_path_segment(self, path, expected):
+        """パスの先頭のセグメントが取得されることのテスト"""
+        assert _first_path_segment(path) == expected
+
+    def test_path_params_are_parsed_once_per_path(self):
+        """パスパラメータ名がパス中の順序で取得され、同じパスでは解析結果が再利用されることのテスト"""
+        path = "/users/{user_id}/posts/{id}"
+
+        assert _path_params(path) == ("user_id", "id")
+        assert _path_params(path) is _path_params(path)
+        assert _path_params("/users") == ()
+
+    def test_sample_body_is_built_once_per_schema(self):
+        """同じスキーマのテンプレートへの変換が一度だけ行われることのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=[])
+        schema = {"properties": {"name": {"type": "string"}}}
+
+        with patch.object(generator, "_compile_sample_body_template", wraps=generator._compile_sample_body_template) as mock_compile:
+            first = generator._generate_sample_body_from_schema(schema)
+            second = generator._generate_sample_body_from_schema(schema)
+
+        assert mock_compile.call_count == 1
+        assert first == second == {"name": "Test name"}
+        assert first is not second
+
+    def test_sample_body_resolves_refs(self):
+        """$refの参照先スキーマからサンプルボディが生成されることのテスト"""
+        schema = {
+            "components": {
+                "schemas": {
+                    "User": {"type": "object", "properties": {"name": {"type": "string"}, "age": {"type": "integer"}}},
+                    "UserAlias": {"$ref": "#/components/schemas/User"},
+                    "Loop": {"$ref": "#/components/schemas/Loop"},
+                }
+            }
+        }
+        generator = EndpointChainGenerator(service_id=1, endpoints=[], schema=schema)
+
+        assert generator._generate_sample_body_from_schema({"$ref": "#/components/schemas/UserAlias"}) == {
+            "name": "Test name", "age": 1
+        }
+        assert generator._generate_sample_body_from_schema({"$ref": "#/components/schemas/Loop"}) == {
+            "name": "Test name", "description": "Test description"
+        }
+        assert generator._generate_sample_body_from_schema({"$ref": "#/components/schemas/Missing"}) == {
+            "name": "Test name", "description": "Test description"
+        }
+
+    def test_sample_body_template_is_shared_by_ref_target(self):
+        """同じコンポーネントを参照するスキーマの間でテンプレートが共有されることのテスト"""
+        schema = {"components": {"schemas": {"User": {"properties": {"name": {"type": "string"}}}}}}
+        generator = EndpointChainGenerator(service_id=1, endpoints=[], schema=schema)
+
+        first = generator._get_sample_body_template({"$ref": "#/components/schemas/User"})
+        second = generator._get_sample_body_template({"$ref": "#/components/schemas/User"})
+
+        assert first is second
+        assert first is generator._get_sample_body_template(schema["components"]["schemas"]["User"])
+
+    def test_sample_body_template_cache_is_bounded(self):
+        """テンプレートのキャッシュが指定した件数を超えないことのテスト"""
+        generator = EndpointChainGenerator(service_id=1, endpoints=[], sample_body_cache_size=2)
+        schemas = [{"properties": {f"field{i}": {"type": "string"}}} for i in range(5)]
+
+        for schema in schemas:
+            generator._generate_sample_body_from_schema(schema)
+
+        assert len(generator._sample_body_templates) == 2
+        assert generator._generate_sample_body_from_schema(schemas[0]) == {"field0": "Test field0"}
@@ -3,7 +3,7 @@ from app.services.openapi.parser import EndpointParser
 
 TEST_SERVICE_ID = 1
 
-from app.services.openapi.parser import EndpointParser, _resolve_references, parse_openapi_schema # Import the common parser and resolver function
+from app.services.openapi.parser import EndpointParser, _resolve_references, load_schema_content, parse_openapi_schema # Import the common parser and resolver function
 
 TEST_SERVICE_ID = 1
 
@@ -181,6 +181,73 @@ components:
     assert "$ref" in resolved_schema_with_bad_ref
     assert resolved_schema_with_bad_ref["$ref"] == '#/components/schemas/NonExistentSchema'
 
+def test_resolve_references_does_not_share_containers_with_input():
+    """解決結果の辞書・リストが元のスキーマや参照先と共有されず、元のスキーマが変更されないことのテスト"""
+    user = {"type": "object", "properties": {"tags": {"type": "array", "items": {"type": "string"}}}}
+    full_schema = {"components": {"schemas": {"User": user}}}
+    schema = {"allOf": [{"$ref": "#/components/schemas/User"}], "properties": {"id": {"type": "integer"}}}
+
+    resolved = _resolve_references(schema, full_schema)
+    resolved["allOf"][0]["properties"]["tags"]["items"]["type"] = "integer"
+    resolved["properties"]["id"]["type"] = "string"
+
+    assert resolved["allOf"][0] is not user
+    assert user["properties"]["tags"]["items"] == {"type": "string"}
+    assert schema == {"allOf": [{"$ref": "#/components/schemas/User"}], "properties": {"id": {"type": "integer"}}}
+
+def test_resolve_references_reuses_cached_resolution():
+    """ref_cache を渡した場合に同じ$refが一度だけ解決され、結果が共有されることのテスト"""
+    full_schema = {"components": {"schemas": {"User": {"type": "object", "properties": {"id": {"type": "integer"}}}}}}
+    schema = {"request": {"$ref": "#/components/schemas/User"}, "response": {"$ref": "#/components/schemas/User"}}
+    ref_cache = {}
+
+    resolved = _resolve_references(schema, full_schema, ref_cache=ref_cache)
+
+    assert resolved["request"] == full_schema["components"]["schemas"]["User"]
+    assert resolved["request"] is resolved["response"]
+    assert ref_cache == {"#/components/schemas/User": resolved["request"]}
+
+def test_resolve_references_returns_ref_free_subtrees_as_is():
+    """ref_cache を渡した場合に$refを含まない部分木がコピーされずにそのまま返されることのテスト"""
+    full_schema = {"components": {"schemas": {"User": {"type": "object"}}}}
+    tags = {"type": "array", "items": {"type": "string"}}
+    schema = {"properties": {"tags": tags, "owner": {"$ref": "#/components/schemas/User"}}, "required": ["tags"]}
+
+    resolved = _resolve_references(schema, full_schema, ref_cache={})
+
+    assert resolved is not schema
+    assert resolved["properties"]["tags"] is tags
+    assert resolved["properties"]["owner"] == {"type": "object"}
+    assert resolved["required"] is schema["required"]
+    assert _resolve_references(tags, full_schema, ref_cache={}) is tags
+
+def test_resolve_references_list_index():
+    """$refのパス中の数値がリストのインデックスとして解決されることのテスト"""
+    full_schema = {"x-shared": [{"type": "string"}, {"type": "integer"}]}
+
+    assert _resolve_references({"$ref": "#/x-shared/1"}, full_schema) == {"type": "integer"}
+    assert _resolve_references({"$ref": "#/x-shared/2"}, full_schema) == {"$ref": "#/x-shared/2"}
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"openapi": "3.0.0", "paths": {}}', {"openapi": "3.0.0", "paths": {}}),
+    ("openapi: 3.0.0\npaths: {}\n", {"openapi": "3.0.0", "paths": {}}),
+    ("{openapi: 3.0.0, paths: {}}", {"openapi": "3.0.0", "paths": {}}),
+])
+def test_load_schema_content_reads_json_and_yaml(content, expected):
+    """JSONとYAML（JSONに見えるフロースタイルのYAMLを含む）が読み込まれることのテスト"""
+    assert load_schema_content(content) == expected
+
+@pytest.mark.parametrize("content", [
+    '{"maximum": 99999999999999999999, "minimum": -9223372036854775809}',
+    "{maximum: 99999999999999999999, minimum: -9223372036854775809}",
+])
+def test_load_schema_content_keeps_integers_beyond_64_bits(content):
+    """64ビットを超える整数が浮動小数点数にならずに正確に読み込まれることのテスト"""
+    loaded = load_schema_content(content)
+
+    assert loaded == {"maximum": 99999999999999999999, "minimum": -9223372036854775809}
+    assert all(isinstance(value, int) for value in loaded.values())
+
 def test_resolve_references_circular():
     """循環参照が検出された場合に適切な例外が投げられることをテスト"""
     import pytest
@@ -283,3 +350,45 @@ components:
     assert response_schema["properties"]["id"]["type"] == "integer"
     assert "name" in response_schema["properties"]
     assert response_schema["properties"]["name"]["type"] == "string"
+
+def test_resolve_response_schemas_does_not_modify_input():
+    """レスポンスのスキーマが解決され、元のレスポンスは変更されないことのテスト"""
+    parser = EndpointParser("""
+openapi: 3.0.0
+paths: {}
+components:
+  schemas:
+    Item:
+      type: object
+""")
+    responses = {
+        "200": {"description": "OK", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Item"}}}},
+        "204": {"description": "No content"},
+    }
+
+    resolved = parser._resolve_response_schemas(responses)
+
+    assert resolved == {
+        "200": {"description": "OK", "content": {"application/json": {"schema": {"type": "object"}}}},
+        "204": {"description": "No content"},
+    }
+    assert responses["200"]["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/Item"}
+
+
+def test_parse_endpoints_skips_non_method_keys():
+    """パスアイテムのHTTPメソッド以外のキーが無視され、メソッド名が大文字になることのテスト"""
+    parser = EndpointParser("""
+openapi: 3.0.0
+paths:
+  /items:
+    summary: Items
+    parameters: []
+    get:
+      summary: List items
+    Delete:
+      summary: Delete items
+""")
+
+    endpoints = parser.parse_endpoints(TEST_SERVICE_ID)
+
+    assert [endpoint["method"] for endpoint in endpoints] == ["GET", "DELETE"]
@@ -172,6 +172,27 @@ class TestEnhancedEndpointChainGenerator:
         assert "Create article" in embedding_text
         assert "Resource: articles" in embedding_text
     
+    def test_id_fields_are_extracted_once_per_request_body(self, sample_endpoints, sample_schema):
+        """検索クエリと埋め込み用テキストで同じリクエストボディのIDフィールド抽出が再利用されることのテスト"""
+        endpoint = sample_endpoints[0]
+        request_body = {"type": "object", "properties": {"authorId": {"type": "integer"}}}
+        endpoint.request_body = request_body
+        generator = EnhancedEndpointChainGenerator(
+            service_id=1,
+            endpoints=sample_endpoints,
+            schema=sample_schema
+        )
+        
+        with patch.object(generator.dependency_analyzer, "extract_id_fields",
+                          wraps=generator.dependency_analyzer.extract_id_fields) as extract_id_fields:
+            query = generator._build_enhanced_query(endpoint)
+            embedding_text = generator.generate_enhanced_embeddings(endpoint)
+        
+        assert [call.args[0] for call in extract_id_fields.call_args_list].count(request_body) == 1
+        assert "author resource" in query
+        assert "ID Field: authorId" in embedding_text
+        assert "Related Resource: author" in embedding_text
+    
     @patch('app.services.endpoint_chain_generator.VectorDBManagerFactory')
     def test_hybrid_search(self, mock_vector_factory, sample_endpoints, sample_schema):
         """ハイブリッド検索のテスト"""
@@ -235,7 +256,19 @@ class TestEnhancedEndpointChainGenerator:
         assert chain_info["target_endpoint"] == "POST /articles"
         assert len(chain_info["dependencies"]) == 1
         assert chain_info["confidence_score"] == 0.9
-    
+        assert "Circular dependencies detected" not in chain_info["warnings"]
+
+        # 依存関係を差し替えると循環の検出結果も更新される
+        generator.dependencies = generator.dependencies + [
+            {
+                "type": "resource_operation",
+                "source": {"path": "/articles", "method": "post"},
+                "target": {"path": "/users", "method": "post"}
+            }
+        ]
+        chain_info = generator.get_dependency_chain_info(endpoint)
+        assert "Circular dependencies detected" in chain_info["warnings"]
+
     def test_build_dependency_graph_text(self, sample_endpoints, sample_schema):
         """依存関係グラフテキスト構築のテスト"""
         generator = EnhancedEndpointChainGenerator(
@@ -355,7 +388,9 @@ class TestEnhancedEndpointChainGenerator:
         assert "confidence_score" in metrics
         assert "search_effectiveness" in metrics
         assert metrics["endpoint"] == "POST /articles"
-    
+        # ハイブリッド検索はベクトル検索の結果を再利用する
+        assert mock_vector_manager.similarity_search.call_count == 1
+
     def test_build_dependency_aware_context(self, sample_endpoints, sample_schema):
         """依存関係対応コンテキスト構築のテスト"""
         generator = EnhancedEndpointChainGenerator(
@@ -397,6 +432,47 @@ class TestEnhancedEndpointChainGenerator:
         assert "error_types_instruction" in context
         assert "POST /articles" in context["target_endpoint"]
         assert "Create article" in context["target_endpoint"]
+    
+    def test_get_target_dependencies_uses_current_dependencies(self, sample_endpoints, sample_schema):
+        """ターゲットの依存関係が種類ごとに取得でき、依存関係の再設定後は新しい内容が使われることのテスト"""
+        generator = EnhancedEndpointChainGenerator(
+            service_id=1,
+            endpoints=sample_endpoints,
+            schema=sample_schema
+        )
+        body_dep = {
+            "type": "body_reference",
+            "source": {"path": "/users", "method": "post"},
+            "target": {"path": "/articles", "method": "POST", "field": "authorId"}
+        }
+        other_dep = {
+            "type": "resource_operation",
+            "source": {"path": "/users", "method": "post"},
+            "target": {"path": "/users/{id}", "method": "get"}
+        }
+        generator.dependencies = [body_dep, other_dep]
+        
+        endpoint = sample_endpoints[0]
+        assert generator._get_target_dependencies(endpoint) == [body_dep]
+        assert generator._get_target_dependencies(endpoint, "body_reference") == [body_dep]
+        assert generator._get_target_dependencies(endpoint, "path_parameter") == []
+        
+        generator.dependencies = [other_dep]
+        assert generator._get_target_dependencies(endpoint) == []
+    
+    def test_endpoint_info_from_schema_uses_operation_index(self, sample_endpoints, sample_schema):
+        """パスレベルの定義を除いたオペレーションの索引からエンドポイント情報が取得されることのテスト"""
+        sample_schema["paths"]["/users"]["parameters"] = [{"name": "X-Trace", "in": "header"}]
+        generator = EnhancedEndpointChainGenerator(
+            service_id=1,
+            endpoints=sample_endpoints,
+            schema=sample_schema
+        )
+        
+        assert set(generator._operations) == {("/users", "post"), ("/articles", "post")}
+        assert "Create user" in generator._get_endpoint_info_from_schema("/users", "POST")
+        assert generator._get_endpoint_info_from_schema("/users", "parameters") is None
+        assert generator._get_endpoint_info_from_schema("/users", "get") is None
 
 
 class TestHybridSearchIntegration:
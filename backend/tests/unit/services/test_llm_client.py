@@ -0,0 +1,100 @@
+"""
+LLMクライアントのユニットテスト
+"""
+
+import asyncio
+import json
+from typing import List
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.services.llm.client import (
+    LLMClient, LLMClientFactory, LLMProviderType, Message, MessageRole,
+    OpenAIClient, run_llm_coroutine
+)
+
+
+class FakeLLMClient(LLMClient):
+    """プロンプトをそのままJSONに包んで返すテスト用のLLMクライアント"""
+
+    def _setup_client(self) -> None:
+        pass
+
+    def _call_llm(self, messages: List[Message], **kwargs) -> str:
+        return self._respond(messages)
+
+    async def _acall_llm(self, messages: List[Message], **kwargs) -> str:
+        return self._respond(messages)
+
+    @staticmethod
+    def _respond(messages: List[Message]) -> str:
+        prompt = messages[-1].content
+        return f"```json\n{json.dumps({'prompt': prompt})}\n```"
+
+
+def test_call_and_acall_with_json_response_parse_the_same_way():
+    """同期・非同期のJSON抽出結果が一致することのテスト"""
+    client = FakeLLMClient("fake-model")
+    messages = [Message(MessageRole.USER, "hello")]
+
+    assert client.call_with_json_response(messages) == {"prompt": "hello"}
+    assert asyncio.run(client.acall_with_json_response(messages)) == {"prompt": "hello"}
+
+
+@pytest.mark.parametrize("response", [
+    '{"name": "suite", "nested": {"ok": true}}',
+    'Here is the suite:\n```json\n{"name": "suite", "nested": {"ok": true}}\n```',
+    'Result: {"name": "suite", "nested": {"ok": true}} Done.',
+])
+def test_parse_json_response_extracts_object(response):
+    """JSONのみ・コードブロック・前後に説明文を含むレスポンスからJSONが取得できることのテスト"""
+    client = FakeLLMClient("fake-model")
+
+    assert client._parse_json_response(response) == {"name": "suite", "nested": {"ok": True}}
+
+
+def test_openai_client_passes_response_schema_as_response_format():
+    """response_schemaがJSONスキーマのresponse_formatとしてAPIに渡されることのテスト"""
+    client = OpenAIClient("fake-model", api_base="http://localhost:1/v1", api_key="fake-key")
+    client.client = Mock()
+    client.client.ainvoke = AsyncMock(return_value=Mock(content='{"name": "suite"}'))
+    messages = [Message(MessageRole.USER, "prompt")]
+    schema = {"type": "object", "required": ["name"]}
+
+    assert run_llm_coroutine(client.acall_with_json_response(messages, response_schema=schema)) == {"name": "suite"}
+    assert run_llm_coroutine(client.acall_with_json_response(messages)) == {"name": "suite"}
+
+    schema_call, plain_call = client.client.ainvoke.call_args_list
+    assert schema_call.kwargs == {
+        "response_format": {"type": "json_schema", "json_schema": {"name": "response", "schema": schema}}
+    }
+    assert plain_call.kwargs == {}
+
+
+def test_get_shared_reuses_client_for_same_settings():
+    """同じ設定の共有クライアントは一度だけ作成されることのテスト"""
+    LLMClientFactory.get_shared.cache_clear()
+    try:
+        with patch.object(LLMClientFactory, "create", side_effect=lambda *args: FakeLLMClient("fake-model")) as mock_create:
+            first = LLMClientFactory.get_shared(LLMProviderType.LOCAL, "model-a", 0.2)
+            second = LLMClientFactory.get_shared(LLMProviderType.LOCAL, "model-a", 0.2)
+            other = LLMClientFactory.get_shared(LLMProviderType.LOCAL, "model-b", 0.2)
+
+        assert first is second
+        assert other is not first
+        assert mock_create.call_count == 2
+    finally:
+        LLMClientFactory.get_shared.cache_clear()
+
+
+def test_run_llm_coroutine_uses_the_same_event_loop():
+    """LLM呼び出し用のコルーチンが常に同じイベントループで実行されることのテスト"""
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = run_llm_coroutine(current_loop())
+    second = run_llm_coroutine(current_loop())
+
+    assert first is second
+    assert first.is_running()
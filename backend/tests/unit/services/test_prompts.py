@@ -0,0 +1,70 @@
+"""
+プロンプトテンプレートのユニットテスト
+"""
+
+import string
+import pytest
+
+from app.services.llm.prompts import PromptTemplate, PromptTemplateRegistry
+
+
+def _field_names(template: str) -> set:
+    """テンプレート中のフィールド名を取得する"""
+    return {field for _, field, _, _ in string.Formatter().parse(template) if field}
+
+
+def test_default_templates_render_same_as_str_format():
+    """事前解析したテンプレートの出力がstr.formatと一致することのテスト"""
+    registry = PromptTemplateRegistry()
+    registry.load_default_templates()
+
+    for name, template in registry._templates.items():
+        kwargs = {field: f"<{field} {{braces}}>" for field in _field_names(template.template)}
+        assert template.format(**kwargs) == template.template.format(**kwargs), name
+
+        if template.system_template is not None:
+            kwargs = {field: f"<{field}>" for field in _field_names(template.system_template)}
+            assert template.format_system(**kwargs) == template.system_template.format(**kwargs), name
+
+
+def test_format_with_format_spec_falls_back_to_str_format():
+    """書式指定を含むテンプレートもstr.formatと同じ結果になることのテスト"""
+    template = PromptTemplate("score: {score:.2f}, name: {name!r}")
+
+    assert template.format(score=0.5, name="x") == "score: 0.50, name: 'x'"
+
+
+def test_format_missing_variable_raises_key_error():
+    """変数が不足している場合にKeyErrorが発生することのテスト"""
+    template = PromptTemplate("Target: {target}")
+
+    with pytest.raises(KeyError):
+        template.format()
+
+
+def test_format_system_returns_none_without_system_template():
+    """システムテンプレートがない場合にNoneが返ることのテスト"""
+    template = PromptTemplate("Target: {target}")
+
+    assert template.format_system(target="x") is None
+
+
+def test_variables_lists_user_template_fields():
+    """ユーザーテンプレートが参照する変数名が取得できることのテスト"""
+    template = PromptTemplate("{{literal}} {target} {schema}", system_template="{instruction}")
+
+    assert template.variables == {"target", "schema"}
+
+
+def test_partial_binds_constant_variables():
+    """事前に埋め込んだ変数を除いてフォーマットできることのテスト"""
+    template = PromptTemplate(
+        "{{literal}} {target} {instruction} {score:.1f}",
+        system_template="{instruction}"
+    )
+
+    bound = template.partial(instruction="use {braces}")
+
+    assert bound.variables == {"target", "score"}
+    assert bound.format(target="x", score=0.5) == template.format(target="x", instruction="use {braces}", score=0.5)
+    assert bound.format_system() == "use {braces}"
@@ -127,6 +127,44 @@ def test_openapi_schema_chunker_generates_documents(dummy_openapi_schema):
         assert isinstance(doc.metadata, dict)
 
 
+def test_openapi_schema_chunker_expands_shared_references(tmp_path):
+    """同じ$refの解決結果が複数箇所に現れてもYAMLのエイリアスにならず展開されることのテスト"""
+    schema_file = tmp_path / "shared.yaml"
+    schema_file.write_text("""
+openapi: 3.0.0
+info:
+  title: Test API
+  version: 1.0.0
+paths:
+  /users:
+    put:
+      requestBody:
+        content:
+          application/json:
+            schema:
+              $ref: '#/components/schemas/User'
+      responses:
+        '200':
+          description: Updated user
+          content:
+            application/json:
+              schema:
+                $ref: '#/components/schemas/User'
+components:
+  schemas:
+    User:
+      type: object
+      properties:
+        name:
+          type: string
+""")
+
+    documents = OpenAPISchemaChunker(str(schema_file)).get_documents()
+
+    assert "&id" not in documents[0].page_content
+    assert documents[0].page_content.count("name:") == 2
+
+
 @patch('app.services.rag.indexer.OpenAPISchemaChunker')
 @patch('app.services.vector_db.manager.VectorDBManagerFactory')
 def test_index_schema_success(mock_factory_cls, mock_chunker_cls, dummy_openapi_schema):
@@ -217,4 +255,18 @@ def test_index_schema_timeout(mock_logger, mock_factory_cls, mock_chunker_cls, d
     index_schema(service_id, schema_path)
 
     mock_logger.error.assert_any_call(mock_logger.error.call_args_list[0][0][0], exc_info=True)
-  
\ No newline at end of file
+  
+@patch('app.services.rag.embeddings.EmbeddingFunctionForCaseforge')
+def test_get_embedding_fn_returns_shared_instance(mock_embedding_fn_cls):
+    """get_embedding_fnがプロセス内で同一インスタンスを返すことのテスト"""
+    from app.services.rag.embeddings import get_embedding_fn
+    get_embedding_fn.cache_clear()
+
+    try:
+        first = get_embedding_fn()
+        second = get_embedding_fn()
+
+        assert first is second
+        mock_embedding_fn_cls.assert_called_once_with()
+    finally:
+        get_embedding_fn.cache_clear()
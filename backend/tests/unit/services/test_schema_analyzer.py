@@ -474,6 +474,29 @@ def test_dependency_analyzer_confidence_calculation():
     confidence = analyzer._calculate_confidence("unknownId", low_confidence_schema)
     assert confidence < 0.8, f"低信頼度ケースの信頼度が高すぎます: {confidence}"
 
+
+def test_dependency_analyzer_find_circular_endpoints():
+    """DependencyAnalyzer の循環する依存関係の検出テスト"""
+    def dep(source, target):
+        return {
+            "type": "resource_operation",
+            "source": {"path": source[0], "method": source[1]},
+            "target": {"path": target[0], "method": target[1]}
+        }
+
+    dependencies = [
+        dep(("/users", "POST"), ("/articles", "post")),
+        dep(("/articles", "post"), ("/comments", "post")),
+        dep(("/comments", "post"), ("/articles", "post")),
+        dep(("/tags", "put"), ("/tags", "put")),
+        dep(("/comments", "post"), ("/likes", "post")),
+    ]
+
+    circular = DependencyAnalyzer.find_circular_endpoints(dependencies)
+
+    assert circular == {("/articles", "post"), ("/comments", "post"), ("/tags", "put")}
+    assert DependencyAnalyzer.find_circular_endpoints(dependencies[:2]) == set()
+
 REALWORLD_SCHEMA = {
   "openapi": "3.0.1",
   "info": {
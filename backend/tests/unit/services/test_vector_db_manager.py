@@ -0,0 +1,65 @@
+"""
+PGVectorManagerのユニットテスト
+"""
+
+from unittest.mock import Mock, patch
+
+from langchain_core.documents import Document
+
+from app.services.vector_db import manager as manager_module
+from app.services.vector_db.manager import PGVectorManager
+
+
+def _make_manager(embedding_function) -> PGVectorManager:
+    """データベースに接続せずにPGVectorManagerを作成する"""
+    vector_db_manager = PGVectorManager.__new__(PGVectorManager)
+    vector_db_manager.service_id = 1
+    vector_db_manager.embedding_function = embedding_function
+    vector_db_manager.engine = Mock()
+    return vector_db_manager
+
+
+def _document(path: str) -> Document:
+    """エンドポイントのスキーマチャンクを表すドキュメントを作成する"""
+    return Document(page_content=f"POST {path}", metadata={"path": path, "method": "post"})
+
+
+@patch.object(manager_module, "Session")
+def test_add_documents_embeds_in_batches(mock_session, monkeypatch):
+    """ドキュメントの埋め込みがバッチサイズごとにまとめて行われることのテスト"""
+    monkeypatch.setattr(manager_module, "EMBEDDING_BATCH_SIZE", 2)
+    embedding_function = Mock()
+    embedding_function.embed_documents.side_effect = lambda texts: [[float(len(text))] for text in texts]
+    vector_db_manager = _make_manager(embedding_function)
+    documents = [_document(f"/items{i}") for i in range(3)]
+    documents.append(Document(page_content="no metadata", metadata={}))
+
+    vector_db_manager._add_documents(documents)
+
+    assert [call.args[0] for call in embedding_function.embed_documents.call_args_list] == [
+        ["POST /items0", "POST /items1"], ["POST /items2"]
+    ]
+    embedding_function.embed_query.assert_not_called()
+    chunks = mock_session.return_value.__enter__.return_value.add_all.call_args.args[0]
+    assert [(chunk.path, chunk.content) for chunk in chunks] == [
+        ("/items0", "POST /items0"), ("/items1", "POST /items1"), ("/items2", "POST /items2")
+    ]
+
+
+@patch.object(manager_module, "Session")
+def test_add_documents_skips_documents_that_fail_to_embed(mock_session):
+    """まとめて埋め込めない場合に1件ずつ埋め込み、失敗したドキュメントだけが除外されることのテスト"""
+    def embed_query(text):
+        if text == "POST /broken":
+            raise ValueError("embedding failed")
+        return [1.0]
+
+    embedding_function = Mock()
+    embedding_function.embed_documents.side_effect = ValueError("embedding failed")
+    embedding_function.embed_query.side_effect = embed_query
+    vector_db_manager = _make_manager(embedding_function)
+
+    vector_db_manager._add_documents([_document("/items"), _document("/broken")])
+
+    chunks = mock_session.return_value.__enter__.return_value.add_all.call_args.args[0]
+    assert [chunk.path for chunk in chunks] == ["/items"]
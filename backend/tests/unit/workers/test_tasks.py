@@ -253,6 +253,11 @@ def test_generate_test_suites_for_endpoints_task_success(monkeypatch):
     assert "Successfully generated" in result["message"]
     # ChainStore.save_chainsが呼ばれたことを確認
     mock_store.save_suites.assert_called_once()
+    mock_generator.generate_chains.assert_called_once_with(force_refresh=False)
+
+    # force_refresh を指定した場合はキャッシュを使わずに生成する
+    generate_test_suites_for_endpoints_task(1, ["endpoint1", "endpoint2"], force_refresh=True)
+    mock_generator.generate_chains.assert_called_with(force_refresh=True)
 
 def test_generate_test_suites_for_endpoints_task_service_not_found(monkeypatch):
     """サービスが存在しない場合のテスト"""